@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# encoding: utf8
+"""Times building the move tables on the Pokémon pages with the most moves,
+with `LearnsetTable` and with the scanning code it replaced, and checks that
+both give the same table.
+
+Usage: benchmark-learnset.py [database-url]
+"""
+from __future__ import division
+import sys
+import time
+
+import pokedex.db
+import pokedex.db.tables as tables
+from sqlalchemy.orm import contains_eager
+
+from splinext.pokedex.learnset import LearnsetTable
+from splinext.pokedex.tests.test_learnset import legacy_learnset_table
+
+worst_pokemon = [u'Mew', u'Smeargle', u'Pikachu']
+repetitions = 20
+
+def learnset_entries(session, pokemon):
+    """Returns {method: [(move, version_group, data), ...]}, just as the
+    Pokémon page would feed them to the table.
+    """
+    q = session.query(tables.PokemonMove) \
+        .filter_by(pokemon_id=pokemon.id) \
+        .outerjoin((tables.Machine, tables.PokemonMove.machine)) \
+        .options(contains_eager(tables.PokemonMove.machine)) \
+        .order_by(tables.PokemonMove.level.asc(),
+                  tables.Machine.machine_number.asc(),
+                  tables.PokemonMove.order.asc(),
+                  tables.PokemonMove.version_group_id.asc())
+
+    entries = {}
+    for pokemon_move in q:
+        vg_data = dict()
+        if pokemon_move.method.name == 'Machine':
+            vg_data['machine'] = pokemon_move.machine.machine_number
+        if pokemon_move.method.name in ('Level up', 'Machine'):
+            vg_data['sort'] = (pokemon_move.level,
+                               vg_data.get('machine', None),
+                               pokemon_move.order)
+            vg_data['level'] = pokemon_move.level
+
+        entries.setdefault(pokemon_move.method, []).append(
+            (pokemon_move.move, pokemon_move.version_group, vg_data))
+    return entries
+
+def build_indexed(entries):
+    method_tables = {}
+    for method, method_entries in entries.items():
+        table = LearnsetTable()
+        for move, version_group, data in method_entries:
+            table.add(move, version_group, data)
+        method_tables[method] = table.rows()
+    return method_tables
+
+def build_legacy(entries):
+    return dict(
+        (method, legacy_learnset_table(method_entries))
+        for method, method_entries in entries.items()
+    )
+
+def time_builder(builder, entries):
+    """Returns the best time for one build, in milliseconds."""
+    best = None
+    for _ in range(repetitions):
+        start = time.time()
+        builder(entries)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1000
+
+def main(argv):
+    if len(argv) > 1:
+        session = pokedex.db.connect(argv[1])
+    else:
+        session = pokedex.db.connect()
+
+    for name in worst_pokemon:
+        pokemon = session.query(tables.Pokemon) \
+            .filter_by(name=name, forme_base_pokemon_id=None) \
+            .one()
+        entries = learnset_entries(session, pokemon)
+        row_count = sum(len(_) for _ in entries.values())
+
+        if build_indexed(entries) != build_legacy(entries):
+            print "{0}: TABLES DIFFER".format(name)
+            return 1
+
+        print "{0:10} {1:5} entries  indexed {2:8.2f} ms  scanning {3:8.2f} ms" \
+            .format(name, row_count,
+                    time_builder(build_indexed, entries),
+                    time_builder(build_legacy, entries))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
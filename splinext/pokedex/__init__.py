@@ -1,9 +1,13 @@
 # encoding: utf8
+import hashlib
 import os.path
+import sys
 from pkg_resources import resource_filename
 
 import markdown
 import markdown.inlinepatterns
+from beaker.cache import CacheManager
+from beaker.util import parse_cache_config_options
 from pylons import config, tmpl_context as c
 from routes import url_for as url
 from sqlalchemy.orm.exc import NoResultFound
@@ -13,6 +17,7 @@ from pokedex.db.markdown import MarkdownString
 import pokedex.db.tables as tables
 import pokedex.lookup
 import spline.lib.markdown
+from splinext.pokedex import caching
 import splinext.pokedex.model
 import splinext.pokedex.db
 from splinext.pokedex import helpers as pokedex_helpers
@@ -26,6 +31,7 @@ def add_routes_hook(map, *args, **kwargs):
     map.connect('/dex/media/*path', controller='dex', action='media')
     map.connect('/dex/lookup', controller='dex', action='lookup')
     map.connect('/dex/suggest', controller='dex', action='suggest')
+    map.connect('/dex/suggest/corpus/{version}.json', controller='dex', action='suggest_corpus')
     map.connect('/dex/parse_size', controller='dex', action='parse_size')
 
     # These are more specific than the general pages below, so must be first
@@ -57,6 +63,8 @@ def add_routes_hook(map, *args, **kwargs):
 
     # JSON API
     map.connect('/dex/api/pokemon', controller='dex_api', action='pokemon')
+    map.connect('/dex/api/caches', controller='dex_api', action='caches')
+    map.connect('/dex/api/lookup', controller='dex_api', action='lookup')
 
 
 ### Extend markdown to turn [Eevee]{pokemon} into a link in effects and
@@ -85,13 +93,7 @@ class PokedexLinkPattern(markdown.inlinepatterns.Pattern):
             target = m.group(2)
 
         # Find the thingy and figure out its URL
-        if self.thingy_type.lower() == u'pokemon':
-            obj = splinext.pokedex.db.pokemon_query(target).one()
-            name = obj.full_name
-        else:
-            obj = splinext.pokedex.db.get_by_name_query(self.thingy_table, target).one()
-            name = obj.name
-        url = pokedex_helpers.make_thingy_url(obj)
+        name, url = splinext.pokedex.db.link_target(self.thingy_table, target)
 
         # Construct a link node
         el = markdown.etree.Element('a')
@@ -120,6 +122,47 @@ class PokedexExtension(markdown.Extension):
             = PokedexMechanicsPattern(mechanics_regex)
 
 
+### Cache rendered markdown, which is slow and, for move effects in
+### particular, often the same text over and over
+
+markdown_cache = caching.register('markdown', caching.LRUCache(
+    4 * 1024 * 1024, sizeof=sys.getsizeof))
+
+def cache_markdown_rendering(as_html):
+    """Wraps the `as_html` property of `MarkdownString` so the HTML is cached
+    by (source hash, request language, data version), since the HTML links
+    to pages by name.  The cache is bounded by the size of
+    the HTML in bytes.  A property that's already wrapped is returned as is.
+    """
+    if getattr(as_html.fget, 'caches_markdown', False):
+        return as_html
+
+    def cached_as_html(self):
+        source = self.source_text
+        if isinstance(source, unicode):
+            source = source.encode('utf8')
+        key = (hashlib.sha1(source).hexdigest(), i18n.current_language(),
+               splinext.pokedex.db.data_version)
+
+        html = markdown_cache.get(key)
+        if html is None:
+            html = as_html.fget(self)
+            markdown_cache.set(key, html)
+        return html
+
+    cached_as_html.caches_markdown = True
+    return property(cached_as_html, doc=as_html.__doc__)
+
+
+### Cache the cached parts of pages ourselves, rather than leaving it to
+### spline's cache_content; see PokedexController.cache_content
+
+page_cache = caching.register('pages', caching.PageCache(
+    caching.LRUCache(32 * 1024 * 1024,
+                     sizeof=lambda entry: sys.getsizeof(entry[1])),
+    max_age=3600,
+))
+
 def after_setup_hook(config, *args, **kwargs):
     """Hook to do some housekeeping after the app starts."""
     # Connect to the database
@@ -127,6 +170,21 @@ def after_setup_hook(config, *args, **kwargs):
 
     # Extend Markdown via monkey-patching..  boo  :(
     MarkdownString.markdown_extensions.append(PokedexExtension())
+    MarkdownString.as_html = cache_markdown_rendering(MarkdownString.as_html)
+    markdown_cache.max_size = int(config.get(
+        'spline-pokedex.markdown_cache_bytes', markdown_cache.max_size))
+
+    # Page cache.  The shared tier is whatever Beaker is set up to use, unless
+    # that's just memory, which the local tier already covers
+    page_cache.local.max_size = int(config.get(
+        'spline-pokedex.page_cache_bytes', page_cache.local.max_size))
+    page_cache.max_age = int(config.get(
+        'spline-pokedex.page_cache_expire', page_cache.max_age))
+    cache_options = parse_cache_config_options(config)
+    if cache_options.get('type', 'memory') != 'memory':
+        cache_manager = CacheManager(**cache_options)
+        page_cache.backend = caching.BeakerBackend(cache_manager.get_cache(
+            'spline-pokedex-pages', expire=page_cache.max_age))
 
     # And extend spline's markdowning a slightly less terrible way
     spline.lib.markdown.register_extension(PokedexExtension())
@@ -201,4 +259,5 @@ class PokedexPlugin(PluginBase):
         return [
             ('page_header', Priority.NORMAL, 'widgets/pokedex_lookup.mako'),
             ('head_tag',    Priority.NORMAL, 'widgets/pokedex_suggestion_css.mako'),
+            ('head_tag',    Priority.NORMAL, 'widgets/pokedex_suggestion_js.mako'),
         ]
@@ -0,0 +1,289 @@
+# encoding: utf8
+u"""In-process caches for things that are expensive to compute but cheap to
+keep around.
+"""
+from __future__ import absolute_import, division
+
+import hashlib
+import threading
+import time
+
+# Every cache worth reporting on, by name; see `register()`
+caches = {}
+
+def register(name, cache):
+    """Adds `cache` to the `caches` that get reported on, and returns it."""
+    caches[name] = cache
+    return cache
+
+def all_stats():
+    """Returns a dict of cache names to their `stats()`."""
+    return dict((name, cache.stats()) for name, cache in caches.items())
+
+class LRUCache(object):
+    u"""Dictionary-ish cache that forgets the least recently used entries once
+    it's full.  Safe to share between threads.
+
+    `max_size` is a number of entries, unless `sizeof` is given; then it's a
+    budget in whatever units `sizeof(value)` returns, e.g. bytes.
+
+    `hits` and `misses` count calls to `get()`.
+    """
+
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Circular doubly-linked list of [prev, next, key, value, size], most
+        # recently used first.  The root is a sentinel that holds no entry
+        self._root = root = []
+        root[:] = [root, root, None, None, 0]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Returns the cached value for `key`, or `default` if there isn't
+        one.
+        """
+        with self._lock:
+            link = self._entries.get(key)
+            if link is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._unlink(link)
+            self._link_first(link)
+            return link[3]
+
+    def set(self, key, value):
+        """Caches `value` under `key`, evicting old entries as necessary.
+        Values bigger than the whole cache aren't kept at all.
+        """
+        if self.sizeof:
+            size = self.sizeof(value)
+        else:
+            size = 1
+
+        with self._lock:
+            old_link = self._entries.pop(key, None)
+            if old_link is not None:
+                self._unlink(old_link)
+                self.size -= old_link[4]
+
+            if size > self.max_size:
+                return
+
+            while self.size + size > self.max_size:
+                oldest = self._root[0]
+                self._unlink(oldest)
+                del self._entries[oldest[2]]
+                self.size -= oldest[4]
+
+            link = [None, None, key, value, size]
+            self._link_first(link)
+            self._entries[key] = link
+            self.size += size
+
+    def clear(self):
+        """Forgets everything, but keeps the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._root[:] = [self._root, self._root, None, None, 0]
+            self.size = 0
+
+    def stats(self):
+        """Returns a dict of the counters and current size, for reporting."""
+        lookups = self.hits + self.misses
+        return dict(
+            entries=len(self._entries),
+            size=self.size,
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            hit_ratio=self.hits / lookups if lookups else None,
+        )
+
+    def _unlink(self, link):
+        prev_link, next_link = link[0], link[1]
+        prev_link[1] = next_link
+        next_link[0] = prev_link
+
+    def _link_first(self, link):
+        root = self._root
+        first = root[1]
+        link[0] = root
+        link[1] = first
+        first[0] = link
+        root[1] = link
+
+
+class _Flight(object):
+    """One computation of a `PageCache` key, for other threads to wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+class PageCache(object):
+    u"""Two-tier cache for rendered pages: an in-process `LRUCache` in front of
+    a shared `backend`, which is anything with `get(key)`, returning None for
+    a miss, and `set(key, value)`.  Without a backend it's in-process only.
+
+    Only one thread computes a given key at a time.  Other requests for the
+    same key get the old value if there is one, even if it's older than
+    `max_age` seconds; otherwise they wait up to `wait_timeout` seconds for
+    the first thread to finish, and only then give up and compute it
+    themselves.
+
+    Counts and compute times are kept per action; see `stats()`.
+    """
+
+    def __init__(self, local, backend=None, max_age=None, wait_timeout=30):
+        self.local = local
+        self.backend = backend
+        self.max_age = max_age
+        self.wait_timeout = wait_timeout
+
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._action_stats = {}
+
+    def get_or_create(self, action, key, create):
+        """Returns the value for `key`, calling `create()` to make it if
+        neither tier has it.  `action` is only used for the counters.  None
+        is never cached.
+        """
+        # Local entries are (time created, value)
+        entry = self.local.get(key)
+        if entry is not None and not self._is_stale(entry):
+            self._count(action, 'local_hits')
+            return entry[1]
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if entry is not None:
+                self._count(action, 'stale_hits')
+                return entry[1]
+
+            flight.done.wait(self.wait_timeout)
+            if flight.value is not None:
+                self._count(action, 'waits')
+                return flight.value
+
+            # The other thread failed or is taking forever; go it alone
+            return self._create(action, key, create)
+
+        try:
+            value = None
+            if self.backend is not None:
+                value = self.backend.get(key)
+            if value is not None:
+                self._count(action, 'shared_hits')
+            else:
+                value = self._create(action, key, create)
+
+            if value is not None:
+                self.local.set(key, (time.time(), value))
+            flight.value = value
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        return value
+
+    def clear(self):
+        """Forgets everything in the local tier; the shared one is left
+        alone.
+        """
+        self.local.clear()
+
+    def stats(self):
+        """Returns the local tier's stats, plus a dict of counters per action
+        under 'actions'.
+        """
+        stats = self.local.stats()
+        with self._lock:
+            actions = dict((action, dict(action_stats))
+                           for action, action_stats
+                           in self._action_stats.items())
+
+        for action_stats in actions.values():
+            computed = action_stats['misses']
+            action_stats['mean_compute_time'] = (
+                action_stats['compute_time'] / computed if computed else None)
+        stats['actions'] = actions
+        return stats
+
+    def _is_stale(self, entry):
+        return self.max_age is not None \
+            and time.time() - entry[0] >= self.max_age
+
+    def _create(self, action, key, create):
+        start = time.time()
+        value = create()
+        elapsed = time.time() - start
+
+        with self._lock:
+            action_stats = self._stats_for(action)
+            action_stats['misses'] += 1
+            action_stats['compute_time'] += elapsed
+            action_stats['max_compute_time'] = max(
+                action_stats['max_compute_time'], elapsed)
+
+        if value is not None and self.backend is not None:
+            self.backend.set(key, value)
+        return value
+
+    def _count(self, action, counter):
+        with self._lock:
+            self._stats_for(action)[counter] += 1
+
+    def _stats_for(self, action):
+        # Caller holds the lock
+        if action not in self._action_stats:
+            self._action_stats[action] = dict(
+                local_hits=0,
+                shared_hits=0,
+                stale_hits=0,
+                waits=0,
+                misses=0,
+                compute_time=0.0,
+                max_compute_time=0.0,
+            )
+        return self._action_stats[action]
+
+class BeakerBackend(object):
+    """Adapts a Beaker cache to be the shared tier of a `PageCache`.  Keys are
+    hashed, as some Beaker backends only take short plain strings.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, key):
+        try:
+            return self.cache.get_value(self._hash(key))
+        except KeyError:
+            return None
+
+    def set(self, key, value):
+        self.cache.set_value(self._hash(key), value)
+
+    def _hash(self, key):
+        return hashlib.sha1(repr(key)).hexdigest()
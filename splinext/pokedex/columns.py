@@ -0,0 +1,376 @@
+# encoding: utf8
+u"""Every Pokémon's searchable attributes, held in memory a column at a time,
+so the Pokémon search can filter and sort without the database.
+
+There are only a few hundred Pokémon, so a set of them is a plain int used as
+a bitmask: bit i is the Pokémon at position i.  Single-valued attributes are
+lists indexed by position; multi-valued ones, like types, are a bitmask per
+value.
+"""
+from __future__ import absolute_import, division
+
+import re
+
+# Attributes every Pokémon has a column for
+scalar_columns = [
+    'id', 'national_id', 'name', 'forme_name', 'species', 'generation_id',
+    'evolution_chain_id', 'growth_rate_id', 'gender_rate', 'is_baby',
+    'hatch_counter', 'base_experience', 'capture_rate', 'base_happiness',
+    'height', 'weight', 'color_id', 'color_name', 'habitat_id',
+    'habitat_name', 'shape_id', 'type1_name', 'type2_name',
+]
+
+# Numeric columns that get searched by range; see `PokemonColumns.in_range`
+range_columns = [
+    'national_id', 'hatch_counter', 'base_experience', 'capture_rate',
+    'base_happiness', 'height', 'weight',
+]
+
+def like_matcher(pattern):
+    u"""Returns a function that checks a string against `pattern` the same
+    way `pokedex_search.ilike` does in SQL: case-insensitively, with * and ?
+    as wildcards, and as a substring match if there are no wildcards.  None
+    never matches.
+    """
+    pattern = pattern.lower()
+    if '*' not in pattern and '?' not in pattern:
+        pattern = u"*{0}*".format(pattern)
+
+    regex = re.compile(
+        u''.join(
+            u'.*' if char == u'*' else u'.' if char == u'?' else re.escape(char)
+            for char in pattern
+        ) + r'\Z',
+        re.DOTALL | re.UNICODE,
+    )
+
+    def matches(value):
+        return value is not None and regex.match(value.lower()) is not None
+    return matches
+
+class PokemonColumns(object):
+    u"""Searchable attributes of every Pokémon and form.
+
+    `pokemon` is an iterable of dicts with a value for every name in
+    `scalar_columns`.  `relations` maps the names of multi-valued attributes,
+    like 'type', to iterables of (pokemon id, value id).  `stats` is an
+    iterable of (pokemon id, stat id, base stat, effort), and `evolutions` of
+    (from pokemon id, to pokemon id).
+
+    `columns` maps each name in `scalar_columns` to a list of values, by
+    position; `base_stats` and `efforts` do the same by stat id, with None
+    for a missing stat.  `stat_totals`, `parents`, `grandparents` and
+    `child_counts` are lists too, with parents as positions.  `masks` maps a
+    relation name and value id to the Pokémon that have it, and
+    `evolution_masks` maps the values of the search form's evolution stage,
+    position and special checkboxes to the Pokémon they match.
+
+    `sorted_columns` has a sorted copy of each of the `range_columns`, and of
+    the base stats and effort, keyed by ('base_stat', stat id) and ('effort',
+    stat id), for `in_range`.
+
+    Sorting should come out the same as the database's.  `collations` maps
+    the names of text columns to a list of their values in the order the
+    database sorts them, so `sort_column` can sort by rank rather than by
+    codepoint; `nulls_first` says where the database puts NULL when sorting
+    ascending.
+    """
+
+    def __init__(self, pokemon, relations, stats, evolutions,
+                 collations={}, nulls_first=False):
+        pokemon = sorted(pokemon, key=lambda row: row['id'])
+        self.ids = [row['id'] for row in pokemon]
+        self.positions = dict((id, i) for i, id in enumerate(self.ids))
+        self.all = (1 << len(self.ids)) - 1
+
+        self.columns = dict(
+            (name, [row[name] for row in pokemon])
+            for name in scalar_columns
+        )
+
+        self.masks = {}
+        for relation, pairs in relations.items():
+            masks = self.masks[relation] = {}
+            for pokemon_id, value_id in pairs:
+                if pokemon_id in self.positions:
+                    masks[value_id] = masks.get(value_id, 0) \
+                                    | 1 << self.positions[pokemon_id]
+
+        self.base_stats = {}
+        self.efforts = {}
+        self.stat_totals = [None] * len(self.ids)
+        for pokemon_id, stat_id, base_stat, effort in stats:
+            i = self.positions.get(pokemon_id)
+            if i is None:
+                continue
+            if stat_id not in self.base_stats:
+                self.base_stats[stat_id] = [None] * len(self.ids)
+                self.efforts[stat_id] = [None] * len(self.ids)
+            self.base_stats[stat_id][i] = base_stat
+            self.efforts[stat_id][i] = effort
+            self.stat_totals[i] = (self.stat_totals[i] or 0) + base_stat
+
+        self.parents = [None] * len(self.ids)
+        self.child_counts = [0] * len(self.ids)
+        for from_pokemon_id, to_pokemon_id in evolutions:
+            if from_pokemon_id not in self.positions \
+                or to_pokemon_id not in self.positions:
+                continue
+            parent = self.positions[from_pokemon_id]
+            self.parents[self.positions[to_pokemon_id]] = parent
+            self.child_counts[parent] += 1
+        self.grandparents = [
+            None if parent is None else self.parents[parent]
+            for parent in self.parents
+        ]
+
+        # Masks for the evolution checkboxes, keyed by their values
+        is_baby = self.columns['is_baby']
+        def baby(i):
+            return i is not None and is_baby[i]
+        def grown(i):
+            return i is not None and not is_baby[i]
+        positions = range(len(self.ids))
+        parents = self.parents
+        grandparents = self.grandparents
+        child_counts = self.child_counts
+
+        self.evolution_masks = dict(
+            baby=self.where(positions, baby),
+            basic=self.where(positions, lambda i:
+                not is_baby[i] and (parents[i] is None or baby(parents[i]))),
+            stage1=self.where(positions, lambda i:
+                grown(parents[i]) and (grandparents[i] is None
+                                       or baby(grandparents[i]))),
+            stage2=self.where(positions, lambda i: grown(grandparents[i])),
+
+            first=self.where(parents, lambda parent: parent is None),
+            middle=self.where(positions, lambda i:
+                parents[i] is not None and child_counts[i]),
+            last=self.where(child_counts, lambda count: not count),
+            only=self.where(positions, lambda i:
+                parents[i] is None and not child_counts[i]),
+
+            branching=self.where(child_counts, lambda count: count > 1),
+            branched=self.where(parents, lambda parent:
+                parent is not None and child_counts[parent] > 1),
+        )
+
+        self.nulls_first = nulls_first
+        self.ranked_columns = {}
+        for name, ordered_values in collations.items():
+            ranks = dict((value, i) for i, value in enumerate(ordered_values))
+            self.ranked_columns[name] = [
+                None if value is None else ranks[value]
+                for value in self.columns[name]
+            ]
+
+        self.sorted_columns = {}
+        for name in range_columns:
+            self.sorted_columns[name] = self._sort_column(self.columns[name])
+        for stat_id in self.base_stats:
+            self.sorted_columns['base_stat', stat_id] \
+                = self._sort_column(self.base_stats[stat_id])
+            self.sorted_columns['effort', stat_id] \
+                = self._sort_column(self.efforts[stat_id])
+
+    def _sort_column(self, values):
+        # (sorted values, their positions), leaving out None
+        pairs = sorted((value, i) for i, value in enumerate(values)
+                       if value is not None)
+        return [value for value, i in pairs], [i for value, i in pairs]
+
+    def where(self, values, predicate):
+        u"""Returns the mask of Pokémon for which `predicate` is true of their
+        value in `values`, a column or any other list by position.
+        """
+        mask = 0
+        for i, value in enumerate(values):
+            if predicate(value):
+                mask |= 1 << i
+        return mask
+
+    def in_range(self, key, evaluator):
+        u"""Returns the mask of Pokémon whose value in the sorted column
+        `key` is in range of `evaluator`, a `RangeQueryEvaluator`.  Only
+        looks at the values actually in range, rather than every Pokémon.
+        """
+        if key not in self.sorted_columns:
+            return 0
+
+        values, positions = self.sorted_columns[key]
+        mask = 0
+        for start, stop in evaluator.slices(values):
+            for i in positions[start:stop]:
+                mask |= 1 << i
+        return mask
+
+    def mask_of(self, ids):
+        u"""Returns the mask of the Pokémon with the given ids."""
+        mask = 0
+        for id in ids:
+            if id in self.positions:
+                mask |= 1 << self.positions[id]
+        return mask
+
+    def any_of(self, relation, value_ids):
+        u"""Returns the mask of Pokémon with at least one of the values."""
+        masks = self.masks[relation]
+        mask = 0
+        for value_id in value_ids:
+            mask |= masks.get(value_id, 0)
+        return mask
+
+    def all_of(self, relation, value_ids):
+        u"""Returns the mask of Pokémon with every one of the values."""
+        masks = self.masks[relation]
+        mask = self.all
+        for value_id in value_ids:
+            mask &= masks.get(value_id, 0)
+        return mask
+
+    def only(self, relation, value_ids):
+        u"""Returns the mask of Pokémon with none of the values other than
+        the given ones, including Pokémon with no values at all.
+        """
+        value_ids = set(value_ids)
+        return self.all & ~ self.any_of(relation, [
+            value_id for value_id in self.masks[relation]
+            if value_id not in value_ids
+        ])
+
+    def positions_in(self, mask):
+        u"""Returns the positions in `mask`, in order."""
+        positions = []
+        i = 0
+        while mask:
+            if mask & 1:
+                positions.append(i)
+            mask >>= 1
+            i += 1
+        return positions
+
+    def ids_in(self, mask):
+        u"""Returns the ids of the Pokémon in `mask`, in id order."""
+        return [self.ids[i] for i in self.positions_in(mask)]
+
+    def sort_column(self, name):
+        u"""Returns the column to sort by for `name`: the database's ranks for
+        text columns with a collation, or just the column.
+        """
+        if name in self.ranked_columns:
+            return self.ranked_columns[name]
+        return self.columns[name]
+
+    def order(self, positions, sort_keys):
+        u"""Sorts `positions` and returns them as ids.  `sort_keys` is a list
+        of (values, descending), most significant first, where `values` is a
+        list by position.  None sorts after everything else, or before if
+        `nulls_first`, and the other way around when descending; this is how
+        the database does it.
+        """
+        positions = list(positions)
+        nulls_first = self.nulls_first
+        # Sorting is stable, so sort by the least significant key first
+        for values, descending in reversed(sort_keys):
+            positions.sort(
+                key=lambda i: ((values[i] is None) != nulls_first, values[i]),
+                reverse=descending,
+            )
+        return [self.ids[i] for i in positions]
+
+class MoveLearnerIndex(object):
+    u"""Which Pokémon learn which moves, as a mask per (move, version group,
+    method), using the positions of a `PokemonColumns`.
+
+    `positions` is the columns' dict of pokemon id => position.
+    `pokemon_moves` is an iterable of (pokemon id, move id, version group id,
+    method id), and `move_effects` of (move id, effect id).
+    """
+
+    def __init__(self, positions, pokemon_moves, move_effects):
+        # masks[move id][version group id, method id] => mask
+        self.masks = {}
+        for pokemon_id, move_id, version_group_id, method_id in pokemon_moves:
+            if pokemon_id not in positions:
+                continue
+            move_masks = self.masks.setdefault(move_id, {})
+            key = version_group_id, method_id
+            move_masks[key] = move_masks.get(key, 0) \
+                            | 1 << positions[pokemon_id]
+
+        self.moves_by_effect = {}
+        self.effects = {}
+        for move_id, effect_id in move_effects:
+            self.moves_by_effect.setdefault(effect_id, []).append(move_id)
+            self.effects[move_id] = effect_id
+
+    def same_effect(self, move_id):
+        u"""Returns the ids of every move with the same effect as the given
+        one, including itself.
+        """
+        effect_id = self.effects.get(move_id)
+        if effect_id is None:
+            return [move_id]
+        return self.moves_by_effect[effect_id]
+
+    def count_by_method(self, move_id):
+        u"""Returns a dict of method id => how many Pokémon learn the given
+        move that way, in any version group.
+        """
+        masks = {}
+        for (version_group_id, method_id), mask \
+            in self.masks.get(move_id, {}).items():
+
+            masks[method_id] = masks.get(method_id, 0) | mask
+        return dict(
+            (method_id, bin(mask).count('1'))
+            for method_id, mask in masks.items()
+        )
+
+    def learners(self, move_ids, version_group_ids=None, method_ids=None):
+        u"""Returns the mask of Pokémon that learn any of the given moves, in
+        any of the given version groups, by any of the given methods.  None
+        means any version group or method at all.
+        """
+        mask = 0
+        for move_id in move_ids:
+            for (version_group_id, method_id), move_mask \
+                in self.masks.get(move_id, {}).items():
+
+                if version_group_ids is not None \
+                    and version_group_id not in version_group_ids:
+                    continue
+                if method_ids is not None and method_id not in method_ids:
+                    continue
+                mask |= move_mask
+        return mask
+
+    def learners_of_all(self, move_groups, version_group_ids=None,
+                        method_ids=None, same_version_group=False):
+        u"""Returns the mask of Pokémon that learn a move from every one of
+        `move_groups`, a list of lists of move ids; e.g., one list for each
+        move and its alternatives.
+
+        Normally each move can be learned in a different version group.  With
+        `same_version_group`, a Pokémon has to learn them all within one.
+        """
+        if not same_version_group:
+            mask = -1
+            for move_ids in move_groups:
+                mask &= self.learners(move_ids, version_group_ids, method_ids)
+            return mask if move_groups else 0
+
+        if version_group_ids is None:
+            version_group_ids = set()
+            for move_ids in move_groups:
+                for move_id in move_ids:
+                    version_group_ids.update(
+                        version_group_id for version_group_id, method_id
+                        in self.masks.get(move_id, {}))
+
+        mask = 0
+        for version_group_id in version_group_ids:
+            mask |= self.learners_of_all(move_groups, set([version_group_id]),
+                                         method_ids)
+        return mask
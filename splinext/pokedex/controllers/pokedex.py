@@ -3,6 +3,7 @@ from __future__ import absolute_import, division
 
 from collections import defaultdict, namedtuple
 import colorsys
+import hashlib
 import json
 import logging
 import mimetypes
@@ -12,25 +13,40 @@ import pokedex.db
 import pokedex.db.tables as tables
 import pkg_resources
 from pylons import config, request, response, session, tmpl_context as c, url
-from pylons.controllers.util import abort, redirect
+from pylons.controllers.util import abort, etag_cache, redirect
 from pylons.decorators import jsonify
 from sqlalchemy import and_, or_, not_
 from sqlalchemy.orm import aliased, contains_eager, eagerload, eagerload_all, join, joinedload, subqueryload, subqueryload_all
 from sqlalchemy.orm import subqueryload, subqueryload_all
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.sql import func
+from webob.exc import HTTPFound
 
 from spline import model
 from spline.model import meta
 from spline.lib.base import BaseController, render
 from spline.lib import helpers as h
 
-from splinext.pokedex import db, helpers as pokedex_helpers
+from splinext.pokedex import caching, db, helpers as pokedex_helpers, i18n
+from splinext.pokedex import page_cache
 import splinext.pokedex.db as db
+from splinext.pokedex.learnset import LearnsetTable
 from splinext.pokedex.magnitude import parse_size
 
 log = logging.getLogger(__name__)
 
+# Suggestions and lookup redirects for the same few names, over and over
+suggest_cache = caching.register('suggest', caching.LRUCache(5000))
+lookup_redirect_cache = caching.register(
+    'lookup_redirects', caching.LRUCache(5000))
+
+def index_etag(*args):
+    """Returns an ETag for something derived from the lookup index and the
+    given arguments, so it changes whenever the index does.
+    """
+    key = u'\0'.join([db.pokedex_suggestions.version] + map(unicode, args))
+    return hashlib.sha1(key.encode('utf8')).hexdigest()
+
 def bar_color(hue, pastelness):
     """Returns a color in the form #rrggbb that has the provided hue and
     lightness/saturation equal to the given "pastelness".
@@ -68,49 +84,49 @@ def _collapse_pokemon_move_columns(table, thing):
     like `[ [ [gs, c] ], [ [rs, e], [fl] ], ... ]`
     """
 
+    # Boil each version group's column down to a signature: the rows it has
+    # data in, and the data.  Adjacent columns with the same signature are
+    # identical, so they can be combined.
+    # Tutors are special; they will NEVER collapse, so ignore them for now.
+    # When we actually print the table, we'll concatenate all the tutor cells
+    # instead of just using the first one like with everything else
+    column_cells = defaultdict(list)
+    row_number = 0
+    for method, method_list in table:
+        if method.name == 'Tutor':
+            continue
+
+        for move, version_group_data in method_list:
+            for version_group, data in version_group_data.iteritems():
+                column_cells[version_group].append(
+                    (row_number, tuple(sorted(data.items()))))
+            row_number += 1
+
+    signatures = dict(
+        (version_group, tuple(cells))
+        for version_group, cells in column_cells.iteritems()
+    )
+
     # What we really need to know is what versions are ultimately collapsed
     # into each column.  We also need to know how the columns are grouped into
     # generations.  So we need a list of lists of lists of version groups:
     move_columns = []
 
     # Only even consider versions in which this thing actually exists
-    q = db.pokedex_session.query(tables.Generation) \
-                       .filter(tables.Generation.id >= thing.generation_id) \
-                       .order_by(tables.Generation.id.asc())
-    for generation in q:
+    for generation in db.generations(min_id=thing.generation_id):
         move_columns.append( [] ) # A new column group for this generation
         for i, version_group in enumerate(generation.version_groups):
-            if i == 0:
-                # Can't collapse these versions anywhere!  Create a new column
-                move_columns[-1].append( [version_group] )
-                continue
-
             # Test to see if this version group column is identical to the one
-            # immediately to its left; if so, we can combine them
-            squashable = True
-            for method, method_list in table:
-                # Tutors are special; they will NEVER collapse, so ignore them
-                # for now.  When we actually print the table, we'll concatenate
-                # all the tutor cells instead of just using the first one like
-                # with everything else
-                if method.name == 'Tutor':
-                    continue
-
-                for move, version_group_data in method_list:
-                    if version_group_data.get(version_group, None) != \
-                       version_group_data.get(move_columns[-1][-1][-1], None):
-                        break
-                else:
-                    continue
+            # immediately to its left; if so, we can combine them.  The first
+            # column in a generation can't be collapsed anywhere!
+            if i > 0 and signatures.get(version_group, ()) \
+                == signatures.get(move_columns[-1][-1][-1], ()):
 
-                break # We broke out and didn't get to continue—not squashable
-            else:
                 # Stick this version group in the previous column
                 move_columns[-1][-1].append(version_group)
-                continue
-
-            # Create a new column
-            move_columns[-1].append( [version_group] )
+            else:
+                # Create a new column
+                move_columns[-1].append( [version_group] )
 
     return move_columns
 
@@ -140,15 +156,107 @@ def level_range(a, b):
     else:
         return u"L{0}–{1}".format(a, b)
 
+def _encounter_bits(summary):
+    """Returns the level ranges in an `EncounterSummary` as the dicts the
+    location templates expect.
+    """
+    return [
+        dict(min_level=min_level, max_level=max_level, rarity=rarity)
+        for min_level, max_level, rarity in summary.levels
+    ]
+
+def location_cache_key(locations):
+    """Returns the `cache_content` key for the page listing the given
+    locations, which all share a name.
+    """
+    return u';'.join(sorted(unicode(location.id) for location in locations))
+
+def group_location_encounters(areas):
+    """Groups the wild encounters in the given location areas as the location
+    page shows them.  Returns a tuple of (grouped_encounters, group_versions).
+
+    This doesn't need `c`, so the page's cache can be warmed outside of a
+    request.
+    """
+    # For the most part, our data represents exactly what we're going to
+    # show.  For a given area in a given game, this Pokémon is guaranteed
+    # to appear some x% of the time no matter what the state of the world
+    # is, and various things like swarms or the radar may add on to this
+    # percentage.
+
+    # Encounters are grouped by area -- <h2>s.
+    # Then by terrain -- table sections.
+    # Then by pokemon -- table rows.
+    # Then by version -- table columns.
+    # Finally, condition values associated with levels/rarity.
+
+    # area => terrain => pokemon => version => condition =>
+    #     condition_values => encounter_bits
+    grouped_encounters = defaultdict(
+        lambda: defaultdict(
+            lambda: defaultdict(
+                lambda: defaultdict(
+                    lambda: defaultdict(
+                        lambda: defaultdict(
+                            list
+                        )
+                    )
+                )
+            )
+        )
+    )
+
+    # To avoid an ultra-wide table when not necessary, only *generations*
+    # that actually contain this Pokémon should appear.
+    # So if the Pokémon appears in Kanto in Crystal, show all of G/S/C.  If
+    # it doesn't appear in any of the three, show none of them.
+    # Last but not least, show generations in reverse order, so the more
+    # important (i.e., recent) versions are on the left.
+    # Got all that?
+    area_generations = defaultdict(set)
+
+    # Encounters come already folded together, with the rarities of
+    # identical level ranges added up; see `EncounterIndex`
+    encounters = db.encounters(
+        location_area_ids=[area.id for area in areas])
+    for summary, pokemon, version, location_area, terrain, \
+        condition_values in encounters:
+
+        # n.b.: conditions and values must be tuples because lists aren't
+        # hashable.
+        grouped_encounters \
+            [location_area] \
+            [terrain] \
+            [pokemon] \
+            [version] \
+            [ tuple(cv.condition for cv in condition_values) ] \
+            [ condition_values ] \
+            .extend(_encounter_bits(summary))
+
+        # Remember that this generation appears in this area
+        area_generations[location_area].add(version.version_group.generation)
+
+    # See above.  Versions for each major group are those that are part of
+    # a generation where this Pokémon appears -- in reverse generation
+    # order.
+    group_versions = defaultdict(list)
+    for area, generations in area_generations.items():
+        for version_group in area.location.region.version_groups:
+            if version_group.generation not in generations:
+                continue
+            group_versions[area][0:0] = version_group.versions
+
+    return grouped_encounters, group_versions
+
 class CombinedEncounter(object):
-    """Represents several encounter rows, collapsed together.  Rarities and
-    level ranges are combined correctly.
+    """Represents several encounter summaries, collapsed together.  Rarities
+    and level ranges are combined correctly.
 
     Assumed to have the same terrain.  Also location and area and so forth, but
     those aren't actually needed.
     """
     def __init__(self, encounter=None):
-        self.terrain = None
+        self.terrain_id = None
         self.rarity = 0
         self.min_level = 0
         self.max_level = 0
@@ -157,13 +265,15 @@ class CombinedEncounter(object):
             self.combine_with(encounter)
 
     def combine_with(self, encounter):
-        if self.terrain and self.terrain != encounter.slot.terrain:
+        """Adds in an `EncounterSummary`."""
+        if self.terrain_id and self.terrain_id != encounter.terrain_id:
             raise ValueError(
                 "Can't combine terrain {0} with {1}"
-                .format(self.terrain.name, encounter.slot.terrain.name)
+                .format(self.terrain_id, encounter.terrain_id)
             )
 
-        self.rarity += encounter.slot.rarity
+        self.terrain_id = encounter.terrain_id
+        self.rarity += encounter.rarity
         self.max_level = max(self.max_level, encounter.max_level)
 
         if not self.min_level:
@@ -239,6 +349,38 @@ class PokedexController(BaseController):
         finally:
             db.pokedex_session.remove()
 
+    def cache_content(self, key, template, do_work):
+        """Renders `template`, with the part inside its
+        `<%dexlib:cache_content>` block cached in `page_cache` by action, key,
+        request language and data version.  `do_work(key)` is only called when
+        that part has to be rendered afresh, and then only by one request at a
+        time.
+
+        This replaces spline's version, which has a single shared tier and
+        lets any number of requests compute the same page at once.
+        """
+        action = request.environ['pylons.routes_dict']['action']
+        cache_key = action, key, i18n.current_language(), db.data_version
+
+        # The template's cache_content block stashes its output in
+        # c.pokedex_page_body, or outputs it instead if it's already there
+        rendered_pages = []
+        def render_body():
+            c.pokedex_page_body = None
+            do_work(key)
+            rendered_pages.append(render(template))
+            return c.pokedex_page_body
+
+        c.pokedex_page_body = page_cache.get_or_create(
+            action, cache_key, render_body)
+        if rendered_pages:
+            # Rendered the whole page just now; no need to do it again
+            return rendered_pages[0]
+
+        # Let the footer know, like spline's version does
+        c.timer.from_cache = True
+        return render(template)
+
     def index(self):
         return ''
 
@@ -281,6 +423,20 @@ class PokedexController(BaseController):
             valid_types = [u'pokemon']
             name = re.sub('(?i) locations$', '', name)
 
+        # Redirects are remembered, because the same names get looked up all
+        # the time.  Exact matches don't flash a message, so browsers and
+        # proxies can remember them too.  Like the ETag, the key includes the
+        # index version, so a reload doesn't leave old targets behind
+        cache_key = name.lower(), c.subpage, db.pokedex_suggestions.version
+        cached_redirect = lookup_redirect_cache.get(cache_key)
+        if cached_redirect:
+            redirect_url, exact = cached_redirect
+            if exact:
+                self._cached_lookup_redirect(name, redirect_url)
+            else:
+                self._flash_inexact_lookup(name)
+            return redirect(redirect_url)
+
         results = db.pokedex_lookup.lookup(name, valid_types=valid_types)
 
         if len(results) == 0:
@@ -291,15 +447,19 @@ class PokedexController(BaseController):
         elif len(results) == 1:
             # Only one possibility!  Hooray!
 
-            if not results[0].exact:
+            redirect_url = pokedex_helpers.make_thingy_url(
+                results[0].object, subpage=c.subpage)
+            lookup_redirect_cache.set(
+                cache_key, (redirect_url, results[0].exact))
+
+            if results[0].exact:
+                self._cached_lookup_redirect(name, redirect_url)
+            else:
                 # Wasn't an exact match, but we can only figure out one thing
                 # the user might have meant, so redirect to it anyway
-                h.flash(u"""Nothing in the Pokédex is exactly called "{0}".  """
-                        u"""This is the only close match.""".format(name),
-                        icon='spell-check-error')
+                self._flash_inexact_lookup(name)
 
-            return redirect(pokedex_helpers.make_thingy_url(
-                results[0].object, subpage=c.subpage))
+            return redirect(redirect_url)
 
         else:
             # Multiple matches.  Could be exact (e.g., Metronome) or a fuzzy
@@ -310,6 +470,29 @@ class PokedexController(BaseController):
             c.table_labels = self.table_labels
             return render('/pokedex/lookup_results.mako')
 
+    def _cached_lookup_redirect(self, name, redirect_url):
+        """Redirects to `redirect_url` in a way the browser can keep for as
+        long as the index stays the same, or responds 304 if it already has
+        it.  Either way, raises rather than returning.
+
+        `redirect()` would lose the headers, as Pylons only copies cookies
+        from the response onto a raised redirect, so this builds its own.
+        """
+        etag = index_etag(u'lookup', name, c.subpage)
+        etag_cache(etag)
+
+        if isinstance(redirect_url, unicode):
+            redirect_url = redirect_url.encode('utf8')
+        raise HTTPFound(location=redirect_url, headers=[
+            ('ETag', '"{0}"'.format(etag)),
+            ('Cache-Control', 'public, max-age=86400'),
+        ])
+
+    def _flash_inexact_lookup(self, name):
+        h.flash(u"""Nothing in the Pokédex is exactly called "{0}".  """
+                u"""This is the only close match.""".format(name),
+                icon='spell-check-error')
+
     def _not_found(self):
         # XXX make this do fuzzy search or whatever
         abort(404)
@@ -324,6 +507,26 @@ class PokedexController(BaseController):
         return render('/pokedex/cheat_unlocked.mako')
 
 
+    def suggest_corpus(self, version):
+        """Returns every suggestion as JSON, so the suggestion box can search
+        without asking the server.  Each version has its own URL, so browsers
+        can keep it forever.
+        """
+        corpus = pokedex_helpers.suggestion_corpus(db.pokedex_suggestions)
+        if version != corpus.version:
+            return redirect(url(controller='dex', action='suggest_corpus',
+                                version=corpus.version))
+
+        response.headers['Content-Type'] = 'application/json; charset=UTF-8'
+        response.headers['Cache-Control'] = 'public, max-age=31536000'
+        response.headers['ETag'] = '"{0}"'.format(corpus.version)
+        response.headers['Vary'] = 'Accept-Encoding'
+
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response.headers['Content-Encoding'] = 'gzip'
+            return corpus.gzipped
+        return corpus.json
+
     def suggest(self):
         """Returns a JSON array of Pokédex lookup suggestions, compatible with
         the OpenSearch spec.
@@ -334,57 +537,27 @@ class PokedexController(BaseController):
             return '[]'
 
         valid_types = request.params.getall('type')
-
-        suggestions = db.pokedex_lookup.prefix_lookup(
-            prefix,
-            valid_types=valid_types,
-        )
-
-        names = []     # actual terms that will appear in the list
-        metadata = []  # parallel array of metadata my suggest widget uses
-        for suggestion in suggestions:
-            row = suggestion.object
-            names.append(suggestion.name)
-            meta = dict(
-                type=row.__singlename__,
-                indexed_name=suggestion.indexed_name,
-            )
-
-            # Get an accompanying image.  Moves get their type; abilities get
-            # nothing; everything else gets the obvious corresponding icon
-            image = None
-            if isinstance(row, tables.Pokemon):
-                if row.forme_name:
-                    image = u"icons/{0}-{1}.png".format(row.national_id, row.forme_name)
-                else:
-                    image = u"icons/{0}.png".format(row.national_id)
-            elif isinstance(row, tables.Move):
-                image = u"chrome/types/{0}.png".format(row.type.name)
-            elif isinstance(row, tables.Type):
-                image = u"chrome/types/{0}.png".format(row.name)
-            elif isinstance(row, tables.Item):
-                image = u"items/{0}.png".format(
-                    pokedex_helpers.filename_from_name(row.name))
-
-            if image:
-                meta['image'] = url(controller='dex', action='media',
-                                    path=image,
-                                    qualified=True)
-
-            # Give a country icon so JavaScript doesn't have to hardcore Spline
-            # paths.  Don't *think* we need to give the long language name...
-            meta['language'] = suggestion.iso3166
-            meta['language_icon'] = h.static_uri(
-                'spline',
-                'flags/{0}.png'.format(suggestion.iso3166),
-                qualified=True
-            )
-
-            metadata.append(meta)
-
-        normalized_name = db.pokedex_lookup.normalize_name(prefix)
-        if ':' in normalized_name:
-            _, normalized_name = normalized_name.split(':', 1)
+        callback = request.params.get('callback', None)
+
+        # Nothing here changes until the index does
+        etag_cache(index_etag(u'suggest', prefix, u','.join(valid_types),
+                              callback))
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+
+        # The same few prefixes make up most requests.  The URLs in the
+        # metadata are qualified, so the host is part of the key too, and so
+        # is the index version, to match the ETag
+        normalized_name, type_prefix = \
+            db.pokedex_suggestions.normalize_prefix(prefix)
+        cache_key = (request.host, normalized_name, type_prefix,
+                     tuple(sorted(valid_types)),
+                     db.pokedex_suggestions.version)
+        cached = suggest_cache.get(cache_key)
+        if cached:
+            names, metadata = cached
+        else:
+            names, metadata = self._suggestions(prefix, valid_types)
+            suggest_cache.set(cache_key, (names, metadata))
 
         data = [
             prefix,
@@ -400,10 +573,10 @@ class PokedexController(BaseController):
         ### appropriately.
         json_data = json.dumps(data)
 
-        if 'callback' in request.params:
+        if callback is not None:
             # Pad and change the content-type to match a script tag
             json_data = "{callback}({json})".format(
-                callback=request.params['callback'],
+                callback=callback,
                 json=json_data,
             )
             response.headers['Content-Type'] = 'text/javascript; charset=UTF-8'
@@ -413,17 +586,44 @@ class PokedexController(BaseController):
 
         return json_data
 
+    def _suggestions(self, prefix, valid_types):
+        """Returns names and metadata for the suggestions for `prefix`, as two
+        parallel lists.
+        """
+        suggestions = db.pokedex_suggestions.prefix_lookup(
+            prefix,
+            valid_types=valid_types,
+        )
+
+        names = []     # actual terms that will appear in the list
+        metadata = []  # parallel array of metadata my suggest widget uses
+        for suggestion in suggestions:
+            names.append(suggestion.name)
+            meta = dict(
+                type=suggestion.type,
+                indexed_name=suggestion.key,
+            )
+
+            # Get an accompanying image, if the index has one
+            if suggestion.image:
+                meta['image'] = url(controller='dex', action='media',
+                                    path=suggestion.image,
+                                    qualified=True)
+
+            # Give a country icon so JavaScript doesn't have to hardcore Spline
+            # paths.  Don't *think* we need to give the long language name...
+            meta['language'] = suggestion.iso3166
+            meta['language_icon'] = h.static_uri(
+                'spline', suggestion.flag, qualified=True)
+
+            metadata.append(meta)
+
+        return names, metadata
+
 
     def _prev_next_pokemon(self, pokemon):
         """Returns a 2-tuple of the previous and next Pokémon."""
-        max_id = db.pokedex_session.query(tables.Pokemon) \
-                                .filter_by(forme_base_pokemon_id=None) \
-                                .count()
-        prev_pokemon = db.pokedex_session.query(tables.Pokemon).get(
-            (c.pokemon.national_id - 1 - 1) % max_id + 1)
-        next_pokemon = db.pokedex_session.query(tables.Pokemon).get(
-            (c.pokemon.national_id - 1 + 1) % max_id + 1)
-        return prev_pokemon, next_pokemon
+        return db.neighbors(tables.Pokemon, pokemon.national_id)
 
     @jsonify
     def parse_size(self):
@@ -464,7 +664,7 @@ class PokedexController(BaseController):
                 eagerload('pokemon_habitat'),
                 eagerload('shape'),
                 subqueryload_all('stats.stat'),
-                subqueryload_all('types.target_efficacies.damage_type'),
+                subqueryload('types'),
 
                 # XXX SQLAlchemy totally barfs if I try to eagerload things
                 # that are only on the normal_form.  No idea why.  This
@@ -495,62 +695,26 @@ class PokedexController(BaseController):
             form = None
 
         ### Type efficacy
-        c.type_efficacies = defaultdict(lambda: 100)
-        for target_type in c.pokemon.types:
-            for type_efficacy in target_type.target_efficacies:
-                c.type_efficacies[type_efficacy.damage_type] *= \
-                    type_efficacy.damage_factor
-
-                # The defaultdict starts at 100, and every damage factor is
-                # a percentage.  Dividing by 100 with every iteration turns the
-                # damage factor into a decimal percentage taken of the starting
-                # 100, without using floats and regardless of number of types
-                c.type_efficacies[type_efficacy.damage_type] //= 100
+        types_by_id = dict((type.id, type) for type in db.types())
+        defending_row = db.reference_data.type_efficacy.defending_row(
+            [type.id for type in c.pokemon.types])
+        c.type_efficacies = dict(
+            (types_by_id[damage_type_id], damage_factor)
+            for damage_type_id, damage_factor in defending_row.items()
+        )
 
         ### Breeding compatibility
-        # To simplify this list considerably, we want to find the BASE FORM of
-        # every Pokémon compatible with this one.  The base form is either:
-        # - a Pokémon that has breeding groups and no evolution parent, or
-        # - a Pokémon whose parent has no breeding groups (i.e. 15 only)
-        #   and no evolution parent.
-        # The below query self-joins `pokemon` to itself and tests the above
-        # conditions.
-        # ASSUMPTION: Every base-form Pokémon in a breedable family can breed.
-        # ASSUMPTION: Every family has the same breeding groups throughout.
+        # To simplify this list considerably, we only show the BASE FORM of
+        # every Pokémon compatible with this one.  These are worked out ahead
+        # of time for every set of egg groups; see `BreedingIndex`
         if c.pokemon.gender_rate == -1:
             # Genderless; Ditto only
-            ditto = db.pokedex_session.query(tables.Pokemon) \
-                .filter_by(name=u'Ditto').one()
-            c.compatible_families = [ditto]
+            c.compatible_families = [db.reference_row('ditto')]
         elif c.pokemon.egg_groups[0].id == 15:
             # No Eggs group
             pass
         else:
-            parent_a = aliased(tables.Pokemon)
-            grandparent_a = aliased(tables.Pokemon)
-            egg_group_ids = [_.id for _ in c.pokemon.egg_groups]
-            q = db.pokedex_session.query(tables.Pokemon)
-            q = q.join(tables.PokemonEggGroup) \
-                 .outerjoin((parent_a, tables.Pokemon.parent_pokemon)) \
-                 .outerjoin((grandparent_a, parent_a.parent_pokemon)) \
-                 .filter(tables.Pokemon.gender_rate != -1) \
-                 .filter(tables.Pokemon.forme_base_pokemon_id == None) \
-                 .filter(
-                    # This is a "base form" iff either:
-                    or_(
-                        # This is the root form (no parent)
-                        # (It has to be breedable too, but we're filtering by
-                        # an egg group so that's granted)
-                        parent_a.id == None,
-                        # Or this can breed and evolves from something that
-                        # can't
-                        and_(parent_a.egg_groups.any(id=15),
-                             grandparent_a.id == None),
-                    )
-                 ) \
-                 .filter(tables.PokemonEggGroup.egg_group_id.in_(egg_group_ids)) \
-                 .order_by(tables.Pokemon.id)
-            c.compatible_families = q.all()
+            c.compatible_families = db.compatible_families(c.pokemon.egg_groups)
 
         ### Wild held items
         # Stored separately per version due to *rizer shenanigans (grumble).
@@ -567,9 +731,7 @@ class PokedexController(BaseController):
         # n.b.: the keys are tuples of versions, not individual versions!
         version_held_items = {}
         # Preload with a list of versions so we know which ones are empty
-        generations = db.pokedex_session.query(tables.Generation) \
-            .options( eagerload('versions') ) \
-            .filter(tables.Generation.id >= max(3, c.pokemon.generation.id))
+        generations = db.generations(min_id=max(3, c.pokemon.generation.id))
         for generation in generations:
             version_held_items[generation] = {}
             for version in generation.versions:
@@ -597,131 +759,21 @@ class PokedexController(BaseController):
                 c.held_items[generation][version_tuple] = item_rarity_tuple
 
         ### Evolution
-        # Format is a matrix as follows:
-        # [
-        #   [ None, Eevee, Vaporeon, None ]
-        #   [ None, None, Jolteon, None ]
-        #   [ None, None, Flareon, None ]
-        #   ... etc ...
-        # ]
-        # That is, each row is a physical row in the resulting table, and each
-        # contains four elements, one per row: Baby, Base, Stage 1, Stage 2.
-        # The Pokémon are actually dictionaries with 'pokemon' and 'span' keys,
-        # where the span is used as the HTML cell's rowspan -- e.g., Eevee has a
-        # total of seven descendents, so it would need to span 7 rows.
-        c.evolution_table = []
-        family = c.pokemon.evolution_chain.pokemon
-        # Prefetch the evolution details
-        db.pokedex_session.query(tables.Pokemon) \
-            .filter(tables.Pokemon.id.in_(_.id for _ in family)) \
-            .options(
-                eagerload_all('parent_evolution.trigger'),
-                eagerload_all('parent_evolution.trigger_item'),
-                eagerload_all('parent_evolution.held_item'),
-                eagerload_all('parent_evolution.location'),
-                eagerload_all('parent_evolution.known_move'),
-                eagerload_all('parent_evolution.party_pokemon'),
-            ) \
-            .all()
-        # Strategy: build this table going backwards.
-        # Find a leaf, build the path going back up to its root.  Remember all
-        # of the nodes seen along the way.  Find another leaf not seen so far.
-        # Build its path backwards, sticking it to a seen node if one exists.
-        # Repeat until there are no unseen nodes.
-        seen_nodes = {}
-        while True:
-            # First, find some unseen nodes
-            unseen_leaves = []
-            for pokemon in family:
-                if pokemon in seen_nodes:
-                    continue
-
-                children = []
-                # A Pokémon is a leaf if it has no evolutionary children, so...
-                for possible_child in family:
-                    if possible_child in seen_nodes:
-                        continue
-                    if possible_child.parent_pokemon == pokemon:
-                        children.append(possible_child)
-                if len(children) == 0:
-                    unseen_leaves.append(pokemon)
-
-            # If there are none, we're done!  Bail.
-            # Note that it is impossible to have any unseen non-leaves if there
-            # are no unseen leaves; every leaf's ancestors become seen when we
-            # build a path to it.
-            if len(unseen_leaves) == 0:
-                break
-
-            # Sort by id, then by forme if any.  This keeps evolutions in about
-            # the order people expect, while clustering formes together.
-            unseen_leaves.sort(key=lambda x: (x.national_id, x.forme_name))
-            leaf = unseen_leaves[0]
-
-            # root, parent_n, ... parent2, parent1, leaf
-            current_path = []
-
-            # Finally, go back up the tree to the root
-            current_pokemon = leaf
-            while current_pokemon:
-                # The loop bails just after current_pokemon is no longer the
-                # root, so this will give us the root after the loop ends;
-                # we need to know if it's a baby to see whether to indent the
-                # entire table below
-                root_pokemon = current_pokemon
-
-                if current_pokemon in seen_nodes:
-                    current_node = seen_nodes[current_pokemon]
-                    # Don't need to repeat this node; the first instance will
-                    # have a rowspan
-                    current_path.insert(0, None)
-                else:
-                    current_node = {
-                        'pokemon': current_pokemon,
-                        'span':    0,
-                    }
-                    current_path.insert(0, current_node)
-                    seen_nodes[current_pokemon] = current_node
-
-                # This node has one more row to span: our current leaf
-                current_node['span'] += 1
-
-                current_pokemon = current_pokemon.parent_pokemon
-
-            # We want every path to have four nodes: baby, basic, stage 1 and 2.
-            # Every root node is basic, unless it's defined as being a baby.
-            # So first, add an empty baby node at the beginning if this is not
-            # a baby.
-            # We use an empty string to indicate an empty cell, as opposed to a
-            # complete lack of cell due to a tall cell from an earlier row.
-            if not root_pokemon.is_baby:
-                current_path.insert(0, '')
-            # Now pad to four if necessary.
-            while len(current_path) < 4:
-                current_path.append('')
-
-            c.evolution_table.append(current_path)
+        # The table is the same for the whole family, so it's only worked out
+        # once per chain; see splinext.pokedex.evolution for the format
+        c.evolution_table = db.evolution_table(c.pokemon.evolution_chain_id)
 
         ### Stats
-        # This takes a lot of queries  :(
+        # Percentiles come from a precomputed index of every base stat
         c.stats = {}  # stat_name => { border, background, percentile }
                       #              (also 'value' for total)
+        stat_percentiles = db.reference_data.stat_percentiles
         stat_total = 0
-        total_stat_rows = db.pokedex_session.query(tables.PokemonStat) \
-                                         .filter_by(stat=c.pokemon.stats[0].stat) \
-                                         .count()
-        physical_attack = None
-        special_attack = None
         for pokemon_stat in c.pokemon.stats:
             stat_info = c.stats[pokemon_stat.stat.name] = {}
             stat_total += pokemon_stat.base_stat
-            q = db.pokedex_session.query(tables.PokemonStat) \
-                               .filter_by(stat=pokemon_stat.stat)
-            less = q.filter(tables.PokemonStat.base_stat < pokemon_stat.base_stat) \
-                    .count()
-            equal = q.filter(tables.PokemonStat.base_stat == pokemon_stat.base_stat) \
-                     .count()
-            percentile = (less + equal * 0.5) / total_stat_rows
+            percentile = stat_percentiles[pokemon_stat.stat_id] \
+                .percentile(pokemon_stat.base_stat)
             stat_info['percentile'] = percentile
 
             # Colors for the stat bars, based on percentile
@@ -731,17 +783,7 @@ class PokedexController(BaseController):
         c.better_damage_class = c.pokemon.better_damage_class
 
         # Percentile for the total
-        # Need to make a derived table that fakes pokemon_id, total_stats
-        stat_sum_tbl = db.pokedex_session.query(
-                func.sum(tables.PokemonStat.base_stat).label('stat_total')
-            ) \
-            .group_by(tables.PokemonStat.pokemon_id) \
-            .subquery()
-
-        q = db.pokedex_session.query(stat_sum_tbl)
-        less = q.filter(stat_sum_tbl.c.stat_total < stat_total).count()
-        equal = q.filter(stat_sum_tbl.c.stat_total == stat_total).count()
-        percentile = (less + equal * 0.5) / total_stat_rows
+        percentile = stat_percentiles['total'].percentile(stat_total)
         c.stats['total'] = {
             'percentile': percentile,
             'value': stat_total,
@@ -773,21 +815,17 @@ class PokedexController(BaseController):
             )
         )
 
-        q = db.pokedex_session.query(tables.Encounter) \
-            .filter_by(pokemon=c.pokemon) \
-            .options(
-                eagerload_all('condition_value_map.condition_value'),
-                eagerload_all('version'),
-                eagerload_all('slot.terrain'),
-                eagerload_all('location_area.location'),
-            )
-        for encounter in q:
-            condition_values = [cv for cv in encounter.condition_values
+        # Encounters come already folded together per version, area,
+        # terrain and condition values; see `EncounterIndex`
+        for summary, pokemon, version, location_area, terrain, \
+            condition_values in db.encounters(pokemon_id=c.pokemon.id):
+
+            condition_values = [cv for cv in condition_values
                                    if not cv.is_default]
-            c.locations[encounter.version] \
-                       [encounter.slot.terrain] \
-                       [encounter.location_area] \
-                       [tuple(condition_values)].combine_with(encounter)
+            c.locations[version] \
+                       [terrain] \
+                       [location_area] \
+                       [tuple(condition_values)].combine_with(summary)
 
         # Strip each version+location down to just the condition values that
         # are the most common per terrain
@@ -824,7 +862,7 @@ class PokedexController(BaseController):
         # list.
         # "data" is a dictionary of whatever per-version information is
         # appropriate for this move method, such as a TM number or level.
-        move_methods = defaultdict(list)
+        move_methods = defaultdict(LearnsetTable)
         # Grab the rows with a manual query so we can sort them in about the
         # order they go in the table.  This should keep it as compact as
         # possible.  Levels go in level order, and machines go in TM number
@@ -845,9 +883,6 @@ class PokedexController(BaseController):
                       tables.PokemonMove.version_group_id.asc()) \
             .all()
         for pokemon_move in q:
-            method_list = move_methods[pokemon_move.method]
-            this_vg = pokemon_move.version_group
-
             # Create a container for data for this method and version(s)
             vg_data = dict()
 
@@ -855,90 +890,23 @@ class PokedexController(BaseController):
             if pokemon_move.method.name == 'Machine':
                 vg_data['machine'] = pokemon_move.machine.machine_number
 
-            # Find the best place to insert a row.
             # In general, we just want the move names in order, so we can just
             # tack rows on and sort them at the end.  However!  Level-up moves
             # must stay in the same order within a version group, and TMs are
-            # similarly ordered by number.  So we have to do some special
-            # ordering here.
-            # These two vars are the boundaries of where we can find or insert
-            # a new row.  Only level-up moves have these restrictions
-            lower_bound = None
-            upper_bound = None
+            # similarly ordered by number.  LearnsetTable keeps rows in 'sort'
+            # order when it's given one
             if pokemon_move.method.name in ('Level up', 'Machine'):
                 vg_data['sort'] = (pokemon_move.level,
                                    vg_data.get('machine', None),
                                    pokemon_move.order)
                 vg_data['level'] = pokemon_move.level
 
-                # Find the next-lowest and next-highest rows.  Our row must fit
-                # between those
-                for i, (move, version_group_data) in enumerate(method_list):
-                    if this_vg not in version_group_data:
-                        # Can't be a bound; not related to this version!
-                        continue
-
-                    if version_group_data[this_vg]['sort'] > vg_data['sort']:
-                        if not upper_bound or i < upper_bound:
-                            upper_bound = i
-                    if version_group_data[this_vg]['sort'] < vg_data['sort']:
-                        if not lower_bound or i > lower_bound:
-                            lower_bound = i
-
-            # We're using Python's slice syntax, which includes the lower bound
-            # and excludes the upper.  But we want to exclude both, so bump the
-            # lower bound
-            if lower_bound != None:
-                lower_bound += 1
-
-            # Check for a free existing row for this move; if one exists, we
-            # can just add our data to that same row.
-            # It's also possible that an existing row for this move can be
-            # shifted forwards into our valid range, if there are no
-            # intervening rows with levels in the same version groups that that
-            # row has.  This is unusual, but happens when a lot of moves have
-            # been shuffled around multiple times, like with Pikachu
-            valid_row = None
-            for i, table_row in enumerate(method_list[0:upper_bound]):
-                move, version_group_data = table_row
-
-                # If we've already found a row for version X outside our valid
-                # range but run across another row with a level for X, that row
-                # cannot be moved up, so it's not usable
-                if valid_row and set(valid_row[1].keys()).intersection(
-                                     set(version_group_data.keys())):
-                    valid_row = None
-
-                if move == pokemon_move.move \
-                    and this_vg not in version_group_data:
-
-                    valid_row = table_row
-                    # If we're inside the valid range, just take the first row
-                    # we find.  If we're outside it, we want the last possible
-                    # row to avoid shuffling the table too much.  So only break
-                    # if this row is inside lb/ub
-                    if i >= lower_bound:
-                        break
-
-            if valid_row:
-                if method_list.index(valid_row) < lower_bound:
-                    # Move the row up if necessary
-                    method_list.remove(valid_row)
-                    method_list.insert(lower_bound, valid_row)
-                valid_row[1][this_vg] = vg_data
-                continue
-
-            # Otherwise, just make a new row and stuff it in.
-            # Rows are sorted by level before version group.  If we see move X
-            # for a level, then move Y for another game, then move X for that
-            # other game, the two X's should be able to collapse.  Thus we put
-            # the Y before the first X to leave space for the second X -- that
-            # is, add new rows as early in the list as possible
-            new_row = pokemon_move.move, { this_vg: vg_data }
-            method_list.insert(lower_bound or 0, new_row)
+            move_methods[pokemon_move.method].add(
+                pokemon_move.move, pokemon_move.version_group, vg_data)
 
         # Convert dictionary to our desired list of tuples
-        c.moves = move_methods.items()
+        c.moves = [(method, table.rows())
+                   for method, table in move_methods.items()]
         c.moves.sort(key=_pokemon_move_method_sort_key)
 
         # Sort non-level moves by name
@@ -1078,14 +1046,6 @@ class PokedexController(BaseController):
         # Then by area -- table rows.
         # Then by version -- table columns.
         # Finally, condition values associated with levels/rarity.
-        q = db.pokedex_session.query(tables.Encounter) \
-            .options(
-                eagerload_all('condition_value_map.condition_value'),
-                eagerload_all('version'),
-                eagerload_all('slot.terrain'),
-                eagerload_all('location_area.location'),
-            )\
-            .filter(tables.Encounter.pokemon == c.pokemon)
 
         # region => terrain => area => version => condition =>
         #     condition_values => encounter_bits
@@ -1118,36 +1078,26 @@ class PokedexController(BaseController):
         # Got all that?
         region_generations = defaultdict(set)
 
-        for encounter in q.all():
-            # Fetches the list of encounters that match this region, version,
-            # terrain, etc.
-            region = encounter.location_area.location.region
+        # Encounters come already folded together, with the rarities of
+        # identical level ranges added up; see `EncounterIndex`
+        for summary, pokemon, version, location_area, terrain, \
+            condition_values in db.encounters(pokemon_id=c.pokemon.id):
+
+            region = location_area.location.region
 
             # n.b.: conditions and values must be tuples because lists aren't
             # hashable.
-            encounter_bits = grouped_encounters \
+            grouped_encounters \
                 [region] \
-                [encounter.slot.terrain] \
-                [encounter.location_area] \
-                [encounter.version] \
-                [ tuple(cv.condition for cv in encounter.condition_values) ] \
-                [ tuple(encounter.condition_values) ]
-
-            # Combine "level 3-4, 50%" and "level 3-4, 20%" into "level 3-4, 70%".
-            existing_encounter = filter(lambda enc: enc['min_level'] == encounter.min_level
-                                                and enc['max_level'] == encounter.max_level,
-                                        encounter_bits)
-            if existing_encounter:
-                existing_encounter[0]['rarity'] += encounter.slot.rarity
-            else:
-                encounter_bits.append({
-                    'min_level': encounter.min_level,
-                    'max_level': encounter.max_level,
-                    'rarity': encounter.slot.rarity,
-                })
+                [terrain] \
+                [location_area] \
+                [version] \
+                [ tuple(cv.condition for cv in condition_values) ] \
+                [ condition_values ] \
+                .extend(_encounter_bits(summary))
 
             # Remember that this generation appears in this region
-            region_generations[region].add(encounter.version.version_group.generation)
+            region_generations[region].add(version.version_group.generation)
 
         c.grouped_encounters = grouped_encounters
 
@@ -1171,6 +1121,10 @@ class PokedexController(BaseController):
     def moves_list(self):
         return render('/pokedex/move_list.mako')
 
+    # Rows of Pokémon shown at a time on a move page.  Moves like Toxic are
+    # learned by nearly everything, so the table is split into pages
+    move_learners_per_page = 100
+
     def moves(self, name):
         try:
             c.move = db.get_by_name_query(tables.Move, name).one()
@@ -1178,14 +1132,25 @@ class PokedexController(BaseController):
             return self._not_found()
 
         ### Prev/next for header
-        max_id = db.pokedex_session.query(tables.Move).count()
-        c.prev_move = db.pokedex_session.query(tables.Move).get(
-            (c.move.id - 1 - 1) % max_id + 1)
-        c.next_move = db.pokedex_session.query(tables.Move).get(
-            (c.move.id - 1 + 1) % max_id + 1)
+        c.prev_move, c.next_move = db.neighbors(tables.Move, c.move.id)
+
+        ### Page of the Pokémon table
+        # The table has a row per Pokémon per method.  Count them from the
+        # search's learner index, so cache hits never build the table
+        learner_count = sum(
+            db.move_learner_index().count_by_method(c.move.id).values())
+        c.learner_page_count = max(1,
+            (learner_count + self.move_learners_per_page - 1)
+            // self.move_learners_per_page)
+        try:
+            c.learner_page = int(request.params.get('page', 1))
+        except ValueError:
+            c.learner_page = 1
+        if not 1 <= c.learner_page <= c.learner_page_count:
+            c.learner_page = 1
 
         return self.cache_content(
-            key=c.move.name,
+            key=u';'.join([c.move.name, unicode(c.learner_page)]),
             template='/pokedex/move.mako',
             do_work=self._do_moves,
         )
@@ -1204,7 +1169,6 @@ class PokedexController(BaseController):
                 eagerload('contest_type'),
                 eagerload('super_contest_effect'),
                 subqueryload_all('move_flags.flag'),
-                subqueryload_all('type.damage_efficacies.target_type'),
                 subqueryload_all('foreign_names.language'),
                 subqueryload_all('flavor_text.version_group.generation'),
                 subqueryload_all('flavor_text.version_group.versions'),
@@ -1216,47 +1180,38 @@ class PokedexController(BaseController):
             .one()
 
         # Used for item linkage
-        c.pp_up = db.pokedex_session.query(tables.Item) \
-            .filter_by(name=u'PP Up').one()
+        c.pp_up = db.reference_row('pp_up')
 
         ### Type efficacy
-        c.type_efficacies = {}
-        for type_efficacy in c.move.type.damage_efficacies:
-            c.type_efficacies[type_efficacy.target_type] = \
-                type_efficacy.damage_factor
+        types_by_id = dict((type.id, type) for type in db.types())
+        attacking_row = db.reference_data.type_efficacy.attacking_row(
+            c.move.type_id)
+        c.type_efficacies = dict(
+            (types_by_id[target_type_id], damage_factor)
+            for target_type_id, damage_factor in attacking_row.items()
+        )
 
         ### Power percentile
         if c.move.power in (0, 1):
             c.power_percentile = None
         else:
-            q = db.pokedex_session.query(tables.Move) \
-                .filter(tables.Move.power > 1)
-            less = q.filter(tables.Move.power < c.move.power).count()
-            equal = q.filter(tables.Move.power == c.move.power).count()
-            c.power_percentile = (less + equal * 0.5) / q.count()
+            c.power_percentile = db.reference_data.move_power_percentiles \
+                .percentile(c.move.power)
 
         ### Flags
         c.flags = []
-        move_flags = db.pokedex_session.query(tables.MoveFlagType) \
-                                    .order_by(tables.MoveFlagType.id.asc())
-        for flag in move_flags:
+        for flag in db.move_flag_types():
             has_flag = flag in c.move.flags
             c.flags.append((flag, has_flag))
 
         ### Machines
-        q = db.pokedex_session.query(tables.Generation) \
-            .filter(tables.Generation.id >= c.move.generation.id) \
-            .options(
-                eagerload('version_groups'),
-            ) \
-            .order_by(tables.Generation.id.asc())
         raw_machines = {}
         # raw_machines = { generation: { version_group: machine_number } }
         c.machines = {}
         # c.machines: generation => [ (versions, machine_number), ... ]
         # Populate an empty dict first so we know which versions don't have a
         # TM for this move
-        for generation in q:
+        for generation in db.generations(min_id=c.move.generation.id):
             c.machines[generation] = []
             raw_machines[generation] = {}
             for version_group in generation.version_groups:
@@ -1299,126 +1254,95 @@ class PokedexController(BaseController):
         # This is kinda like the moves for Pokémon, but backwards.  Imagine
         # that!  We have the same basic structure, a list of:
         #     (method, [ (pokemon, { version_group => data, ... }), ... ])
-        pokemon_methods = defaultdict(dict)
-        # Sort by descending level because the LAST level seen is the one that
-        # ends up in the table, and the lowest level is the most useful
-        q = db.pokedex_session.query(tables.PokemonMove) \
-            .options(
-                eagerload('method'),
-                eagerload('pokemon'),
-                eagerload('version_group'),
-                eagerload('pokemon.form_group'),
-                eagerload('pokemon.stats.stat'),
-                eagerload('pokemon.stats.stat.damage_class'),
-
-                # Pokémon table stuff
-                subqueryload('pokemon.abilities'),
-                subqueryload('pokemon.egg_groups'),
-                subqueryload('pokemon.formes'),
-                subqueryload('pokemon.stats'),
-                subqueryload('pokemon.types'),
-            ) \
-            .filter(tables.PokemonMove.move_id == c.move.id) \
-            .order_by(tables.PokemonMove.level.desc())
-        for pokemon_move in q:
-            method_list = pokemon_methods[pokemon_move.method]
-            this_vg = pokemon_move.version_group
-
-            # Create a container for data for this method and version(s)
-            vg_data = dict()
-
-            if pokemon_move.method.name == 'Level up':
-                # Level-ups need to know what level
-                vg_data['level'] = pokemon_move.level
-            elif pokemon_move.method.name == 'Machine':
-                # TMs need to know their own TM number
-                machine = first(lambda _: _.version_group == this_vg,
-                                c.move.machines)
-                if machine:
-                    vg_data['machine'] = machine.machine_number
-
-            # The Pokémon version does sorting here, but we're just going to
-            # sort by name regardless of method, so leave that until last
-
-            # Add in the move method for this Pokémon
-            if pokemon_move.pokemon not in method_list:
-                method_list[pokemon_move.pokemon] = dict()
+        # Who learns what is worked out once per move, as ids; see
+        # `LearnerTable`.  Only the Pokémon on this page get loaded
+        learners = db.move_learners(c.move.id)
+        methods = dict(
+            (method.id, method) for method in db.pokemon_move_methods())
+        version_groups = dict(
+            (version_group.id, version_group)
+            for version_group in db.version_groups()
+        )
 
-            method_list[pokemon_move.pokemon][this_vg] = vg_data
+        def with_rows(table, pokemon):
+            return [
+                (methods[method_id], [
+                    (pokemon.get(pokemon_id, pokemon_id), dict(
+                        (version_groups[version_group_id], data)
+                        for version_group_id, data in vg_data.iteritems()
+                    ))
+                    for pokemon_id, vg_data in method_learners
+                ])
+                for method_id, method_learners in table
+            ]
+
+        # Columns are collapsed and tutors found using the whole table, so
+        # every page has the same columns.  Rows only need to be told apart
+        # for that, so they can stay ids
+        whole_table = with_rows(learners.methods, {})
+        whole_table.sort(key=_pokemon_move_method_sort_key)
 
-        # Convert each method dictionary to a list of tuples
-        c.better_damage_classes = {}
-        for method in pokemon_methods.keys():
-            # Also grab Pokémon's better damage classes
-            for pokemon in pokemon_methods[method].keys():
-                if pokemon not in c.better_damage_classes:
-                    c.better_damage_classes[pokemon] = \
-                        pokemon.better_damage_class
+        # Finally, collapse identical columns within the same generation
+        c.pokemon_columns \
+            = _collapse_pokemon_move_columns(table=whole_table, thing=c.move)
 
-            pokemon_methods[method] = pokemon_methods[method].items()
+        # Grab list of all the version groups with tutor moves
+        c.move_tutor_version_groups = _move_tutor_version_groups(whole_table)
 
-        # Convert the entire dictionary to a list of tuples and sort it
-        c.pokemon = pokemon_methods.items()
-        c.pokemon.sort(key=_pokemon_move_method_sort_key)
+        # Now for this page's rows
+        start = (c.learner_page - 1) * self.move_learners_per_page
+        page = learners.page(
+            [method.id for method, method_list in whole_table],
+            start, start + self.move_learners_per_page,
+        )
 
-        # Sort by Pokémon number
-        for method, method_list in c.pokemon:
-            method_list.sort(key=lambda (pokemon, whatever): (pokemon.national_id, pokemon.forme_name))
+        page_pokemon_ids = set()
+        for method_id, method_learners in page:
+            page_pokemon_ids.update(
+                pokemon_id for pokemon_id, data in method_learners)
+        pokemon = {}
+        if page_pokemon_ids:
+            q = db.pokedex_session.query(tables.Pokemon) \
+                .filter(tables.Pokemon.id.in_(page_pokemon_ids)) \
+                .options(
+                    eagerload('form_group'),
+                    eagerload_all('stats.stat.damage_class'),
+
+                    # Pokémon table stuff
+                    subqueryload('abilities'),
+                    subqueryload('egg_groups'),
+                    subqueryload('formes'),
+                    subqueryload('types'),
+                )
+            pokemon = dict((row.id, row) for row in q)
 
-        # Finally, collapse identical columns within the same generation
-        c.pokemon_columns \
-            = _collapse_pokemon_move_columns(table=c.pokemon, thing=c.move)
+        c.pokemon = with_rows(page, pokemon)
 
-        # Grab list of all the version groups with tutor moves
-        c.move_tutor_version_groups = _move_tutor_version_groups(c.pokemon)
+        # Also grab Pokémon's better damage classes
+        c.better_damage_classes = dict(
+            (row, row.better_damage_class) for row in pokemon.values())
 
         return
 
 
     def types_list(self):
-        c.types = db.pokedex_session.query(tables.Type) \
-            .order_by(tables.Type.name) \
-            .options(eagerload('damage_efficacies')) \
-            .all()
-
-        try:
-            c.secondary_type = db.pokedex_session.query(tables.Type) \
-                .filter(tables.Type.name == request.params['secondary']) \
-                .one()
+        c.types = sorted(db.types(), key=lambda type: type.name)
 
-            c.secondary_efficacy = dict(
-                [(efficacy.damage_type, efficacy.damage_factor) for efficacy in c.secondary_type.target_efficacies]
-            )
-        except (KeyError, NoResultFound):
-            c.secondary_type = None
-            c.secondary_efficacy = defaultdict(lambda: 100)
-
-        # Count up a relative score for each type, both attacking and
-        # defending.  Normal damage counts for 0; super effective counts for
-        # +1; not very effective counts for -1.  Ineffective counts for -2.
-        # With dual types, x4 is +2 and x1/4 is -2; ineffective is -4.
-        # Everything is of course the other way around for defense.
-        attacking_score_conversion = {
-            400: +2,
-            200: +1,
-            100:  0,
-             50: -1,
-             25: -2,
-              0: -2,
-        }
-        if c.secondary_type:
-            attacking_score_conversion[0] = -4
-
-        c.attacking_scores = defaultdict(int)
-        c.defending_scores = defaultdict(int)
-        for attacking_type in c.types:
-            for efficacy in attacking_type.damage_efficacies:
-                defending_type = efficacy.target_type
-                factor = efficacy.damage_factor * \
-                    c.secondary_efficacy[attacking_type] // 100
+        c.secondary_type = None
+        secondary_name = request.params.get('secondary', None)
+        for type in c.types:
+            if type.name == secondary_name:
+                c.secondary_type = type
+                break
 
-                c.attacking_scores[attacking_type] += attacking_score_conversion[factor]
-                c.defending_scores[defending_type] -= attacking_score_conversion[factor]
+        # The chart and the scores for every secondary type are worked out
+        # ahead of time; see `TypeEfficacyMatrix`.  Each row of the chart is
+        # in the same order as `c.types`
+        matrix = db.reference_data.type_efficacy
+        secondary_id = c.secondary_type.id if c.secondary_type else None
+        c.type_chart = matrix.charts[secondary_id]
+        c.attacking_scores = matrix.attacking_scores[secondary_id]
+        c.defending_scores = matrix.defending_scores[secondary_id]
 
         return render('/pokedex/type_list.mako')
 
@@ -1429,11 +1353,7 @@ class PokedexController(BaseController):
             return self._not_found()
 
         ### Prev/next for header
-        max_id = db.pokedex_session.query(tables.Type).count()
-        c.prev_type = db.pokedex_session.query(tables.Type).get(
-            (c.type.id - 1 - 1) % max_id + 1)
-        c.next_type = db.pokedex_session.query(tables.Type).get(
-            (c.type.id - 1 + 1) % max_id + 1)
+        c.prev_type, c.next_type = db.neighbors(tables.Type, c.type.id)
 
         return self.cache_content(
             key=c.type.name,
@@ -1490,11 +1410,7 @@ class PokedexController(BaseController):
             return self._not_found()
 
         ### Prev/next for header
-        max_id = db.pokedex_session.query(tables.Ability).count()
-        c.prev_ability = db.pokedex_session.query(tables.Ability).get(
-            (c.ability.id - 1 - 1) % max_id + 1)
-        c.next_ability = db.pokedex_session.query(tables.Ability).get(
-            (c.ability.id - 1 + 1) % max_id + 1)
+        c.prev_ability, c.next_ability = db.neighbors(tables.Ability, c.ability.id)
 
         return self.cache_content(
             key=c.ability.name,
@@ -1573,10 +1489,8 @@ class PokedexController(BaseController):
             return self._not_found()
 
         # These are used for their item linkage
-        c.growth_mulch = db.pokedex_session.query(tables.Item) \
-            .filter_by(name=u'Growth Mulch').one()
-        c.damp_mulch = db.pokedex_session.query(tables.Item) \
-            .filter_by(name=u'Damp Mulch').one()
+        c.growth_mulch = db.reference_row('growth_mulch')
+        c.damp_mulch = db.reference_row('damp_mulch')
 
         # Pokémon that can hold this item are per version; break this up into a
         # two-dimensional structure of pokemon => version => rarity
@@ -1615,15 +1529,21 @@ class PokedexController(BaseController):
         # Note that it isn't against the rules for multiple locations to have
         # the same name.  To avoid complications, the name is stored in
         # c.location_name, and after that we only deal with areas.
-        c.locations = db.pokedex_session.query(tables.Location) \
-            .filter(func.lower(tables.Location.name) == name) \
-            .all()
+        c.locations = db.get_by_name_query(tables.Location, name).all()
 
         if not c.locations:
             return self._not_found()
 
         c.location_name = c.locations[0].name
 
+        # Every location with this name goes into the key
+        return self.cache_content(
+            key=location_cache_key(c.locations),
+            template='/pokedex/location.mako',
+            do_work=self._do_locations,
+        )
+
+    def _do_locations(self, key):
         # TODO: Sort locations/areas by generation
 
         # Get all the areas in any of these locations
@@ -1632,99 +1552,15 @@ class PokedexController(BaseController):
             c.areas.extend(location.areas)
         c.areas.sort(key=lambda area: area.name)
 
-        # For the most part, our data represents exactly what we're going to
-        # show.  For a given area in a given game, this Pokémon is guaranteed
-        # to appear some x% of the time no matter what the state of the world
-        # is, and various things like swarms or the radar may add on to this
-        # percentage.
-
-        # Encounters are grouped by area -- <h2>s.
-        # Then by terrain -- table sections.
-        # Then by pokemon -- table rows.
-        # Then by version -- table columns.
-        # Finally, condition values associated with levels/rarity.
-        q = db.pokedex_session.query(tables.Encounter) \
-            .options(
-                eagerload_all('condition_value_map.condition_value'),
-                eagerload_all('slot.terrain'),
-                eagerload('pokemon'),
-                eagerload('version'),
-            ) \
-            .filter(tables.Encounter.location_area_id.in_(_.id for _ in c.areas))
-
-        # area => terrain => pokemon => version => condition =>
-        #     condition_values => encounter_bits
-        grouped_encounters = defaultdict(
-            lambda: defaultdict(
-                lambda: defaultdict(
-                    lambda: defaultdict(
-                        lambda: defaultdict(
-                            lambda: defaultdict(
-                                list
-                            )
-                        )
-                    )
-                )
-            )
-        )
-
-        # To avoid an ultra-wide table when not necessary, only *generations*
-        # that actually contain this Pokémon should appear.
-        # So if the Pokémon appears in Kanto in Crystal, show all of G/S/C.  If
-        # it doesn't appear in any of the three, show none of them.
-        # Last but not least, show generations in reverse order, so the more
-        # important (i.e., recent) versions are on the left.
-        # Got all that?
-        area_generations = defaultdict(set)
-
-        for encounter in q.all():
-            # Fetches the list of encounters that match this region, version,
-            # terrain, etc.
-
-            # n.b.: conditions and values must be tuples because lists aren't
-            # hashable.
-            encounter_bits = grouped_encounters \
-                [encounter.location_area] \
-                [encounter.slot.terrain] \
-                [encounter.pokemon] \
-                [encounter.version] \
-                [ tuple(cv.condition for cv in encounter.condition_values) ] \
-                [ tuple(encounter.condition_values) ]
-
-            # Combine "level 3-4, 50%" and "level 3-4, 20%" into "level 3-4, 70%".
-            existing_encounter = filter(lambda enc: enc['min_level'] == encounter.min_level
-                                                and enc['max_level'] == encounter.max_level,
-                                        encounter_bits)
-            if existing_encounter:
-                existing_encounter[0]['rarity'] += encounter.slot.rarity
-            else:
-                encounter_bits.append({
-                    'min_level': encounter.min_level,
-                    'max_level': encounter.max_level,
-                    'rarity': encounter.slot.rarity,
-                })
-
-            # Remember that this generation appears in this area
-            area_generations[encounter.location_area].add(encounter.version.version_group.generation)
-
-        c.grouped_encounters = grouped_encounters
+        c.grouped_encounters, c.group_versions \
+            = group_location_encounters(c.areas)
 
         # Pass some data/functions
         c.encounter_terrain_icons = self.encounter_terrain_icons
         c.encounter_condition_value_icons = self.encounter_condition_value_icons
         c.level_range = level_range
 
-        # See above.  Versions for each major group are those that are part of
-        # a generation where this Pokémon appears -- in reverse generation
-        # order.
-        c.group_versions = defaultdict(list)
-        for area, generations in area_generations.items():
-            for version_group in area.location.region.version_groups:
-                if version_group.generation not in generations:
-                    continue
-                c.group_versions[area][0:0] = version_group.versions
-
-        return render('/pokedex/location.mako')
+        return
 
 
     def natures_list(self):
@@ -1776,81 +1612,16 @@ class PokedexController(BaseController):
         # - their worst stat is hindered by this nature
         # Of course, if this is a neutral nature, then find only Pokémon for
         # which the best and worst stats are close together.
-        # The useful thing here is that this cannot be done in the Pokémon
-        # search, as it requires comparing a Pokémon's stats to themselves.
-        # Also, HP doesn't count.  Durp.
-        hp = db.pokedex_session.query(tables.Stat).filter_by(name=u'HP').one()
-        if c.nature.increased_stat == c.nature.decreased_stat:
-            # Neutral.  Boring!
-            # Create a subquery of neutral-ish Pokémon
-            stat_subquery = db.pokedex_session.query(
-                    tables.PokemonStat.pokemon_id
-                ) \
-                .filter(tables.PokemonStat.stat_id != hp.id) \
-                .group_by(tables.PokemonStat.pokemon_id) \
-                .having(
-                    func.max(tables.PokemonStat.base_stat)
-                    - func.min(tables.PokemonStat.base_stat)
-                    <= 10
-                ) \
-                .subquery()
-
+        # This requires comparing a Pokémon's stats to themselves, so every
+        # Pokémon's best and worst stats are worked out ahead of time; see
+        # `StatSpreadIndex`.  Also, HP doesn't count.  Durp.
+        pokemon_ids = db.nature_example_ids(c.nature)
+        if pokemon_ids:
+            # Order by id as per usual
             c.pokemon = db.pokedex_session.query(tables.Pokemon) \
-                .join((stat_subquery,
-                    stat_subquery.c.pokemon_id == tables.Pokemon.id))
-
+                .filter(tables.Pokemon.id.in_(pokemon_ids)) \
+                .order_by(tables.Pokemon.id.asc())
         else:
-            # More interesting.
-            # Create the subquery again, but..  the other way around.
-            grouped_stats = aliased(tables.PokemonStat)
-            stat_range_subquery = db.pokedex_session.query(
-                    grouped_stats.pokemon_id,
-                    func.max(grouped_stats.base_stat).label('max_stat'),
-                    func.min(grouped_stats.base_stat).label('min_stat'),
-                ) \
-                .filter(grouped_stats.stat_id != hp.id) \
-                .group_by(grouped_stats.pokemon_id) \
-                .having(
-                    func.max(grouped_stats.base_stat)
-                    - func.min(grouped_stats.base_stat)
-                    > 10
-                ) \
-                .subquery()
-
-            # Also need to join twice more to PokemonStat to figure out WHICH
-            # of those stats is the max or min.  So, yes, joining to the same
-            # table three times and two deep.  One to make sure the Pokémon has
-            # the right lowest stat; one to make sure it has the right highest
-            # stat.
-            # Note that I really want to do: range --> min; --> max
-            # But SQLAlchemy won't let me start from a subquery like that, so
-            # instead I do min --> range --> max.  :(  Whatever.
-            min_stats = aliased(tables.PokemonStat)
-            max_stats = aliased(tables.PokemonStat)
-            minmax_stat_subquery = db.pokedex_session.query(
-                    min_stats
-                ) \
-                .join((stat_range_subquery, and_(
-                        min_stats.base_stat == stat_range_subquery.c.min_stat,
-                        min_stats.pokemon_id == stat_range_subquery.c.pokemon_id,
-                    )
-                )) \
-                .join((max_stats, and_(
-                        max_stats.base_stat == stat_range_subquery.c.max_stat,
-                        max_stats.pokemon_id == stat_range_subquery.c.pokemon_id,
-                    )
-                )) \
-                .filter(min_stats.stat_id == c.nature.decreased_stat_id) \
-                .filter(max_stats.stat_id == c.nature.increased_stat_id) \
-                .subquery()
-
-            # Finally, just join that mess to pokemon; INNER-ness will do all
-            # the filtering
-            c.pokemon = db.pokedex_session.query(tables.Pokemon) \
-                .join((minmax_stat_subquery,
-                    minmax_stat_subquery.c.pokemon_id == tables.Pokemon.id))
-
-        # Order by id as per usual
-        c.pokemon = c.pokemon.order_by(tables.Pokemon.id.asc())
+            c.pokemon = []
 
         return render('/pokedex/nature.mako')
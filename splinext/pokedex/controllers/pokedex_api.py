@@ -13,6 +13,7 @@ from pylons.controllers.util import abort, redirect
 from spline.lib import helpers as h
 from spline.lib.base import BaseController, render
 
+from splinext.pokedex import caching
 from splinext.pokedex import helpers as pokedex_helpers
 import splinext.pokedex.db as db
 
@@ -37,3 +38,33 @@ class PokedexAPIController(BaseController):
 
         response.headers['Content-Type'] = 'application/json; charset=UTF-8'
         return json.dumps(pokemon)
+
+    def lookup(self):
+        u"""Looks up every `name` parameter at once, optionally restricted to
+        the given `type`s.  Returns an array with an array of matches for each
+        name, in order.
+        """
+        names = request.params.getall('name')
+        valid_types = request.params.getall('type')
+
+        results = []
+        for lookup_results in db.lookup_many(names, valid_types=valid_types):
+            matches = []
+            for result in lookup_results:
+                matches.append(dict(
+                    name=result.name,
+                    type=result.object.__singlename__,
+                    id=result.object.id,
+                    url=pokedex_helpers.make_thingy_url(result.object),
+                    language=result.iso3166,
+                    exact=result.exact,
+                ))
+            results.append(matches)
+
+        response.headers['Content-Type'] = 'application/json; charset=UTF-8'
+        return json.dumps(results)
+
+    def caches(self):
+        u"""Returns the size and hit/miss counts of every in-process cache."""
+        response.headers['Content-Type'] = 'application/json; charset=UTF-8'
+        return json.dumps(caching.all_stats())
@@ -439,15 +439,14 @@ class PokedexGadgetsController(BaseController):
         c.did_anything = False
 
         # Form controls use version group
-        c.version_groups = db.pokedex_session.query(tables.VersionGroup) \
-            .order_by(tables.VersionGroup.id.asc()) \
-            .options(eagerload('versions')) \
-            .all()
+        c.version_groups = db.version_groups()
         # Grab the version to use for moves, defaulting to the most current
-        try:
-            c.version_group = db.pokedex_session.query(tables.VersionGroup) \
-                .get(request.params['version_group'])
-        except (KeyError, NoResultFound):
+        c.version_group = None
+        version_group_id = request.params.get('version_group', None)
+        for version_group in c.version_groups:
+            if unicode(version_group.id) == version_group_id:
+                c.version_group = version_group
+        if not c.version_group:
             c.version_group = c.version_groups[-1]
 
         # Some manual URL shortening, if necessary...
@@ -466,16 +465,24 @@ class PokedexGadgetsController(BaseController):
         # Run through the list, ensuring at least 8 Pokémon are entered
         pokemon_input = request.params.getall('pokemon') \
             + [u''] * self.NUM_COMPARED_POKEMON
-        for i in range(self.NUM_COMPARED_POKEMON):
-            raw_pokemon = pokemon_input[i].strip()
+        pokemon_input = [raw_pokemon.strip() for raw_pokemon
+                         in pokemon_input[:self.NUM_COMPARED_POKEMON]]
+
+        # Look them all up in one go
+        entered_pokemon = [_ for _ in pokemon_input if _]
+        all_results = dict(zip(
+            entered_pokemon,
+            db.lookup_many(entered_pokemon, valid_types=['pokemon']),
+        ))
+
+        for i, raw_pokemon in enumerate(pokemon_input):
             if not raw_pokemon:
                 # Use a junk placeholder tuple
                 c.found_pokemon[i] = FoundPokemon(
                     pokemon=None, suggestions=None, input=u'')
                 continue
 
-            results = db.pokedex_lookup.lookup(
-                raw_pokemon, valid_types=['pokemon'])
+            results = all_results[raw_pokemon]
 
             # Two separate things to do here.
             # 1: Use the first result as the actual Pokémon
@@ -539,7 +546,7 @@ class PokedexGadgetsController(BaseController):
 
         # Setup only done if the page is actually showing
         if c.did_anything:
-            c.stats = db.pokedex_session.query(tables.Stat).all()
+            c.stats = db.stats()
 
             # Relative numbers -- breeding and stats
             # Construct a nested dictionary of label => pokemon => (value, pct)
@@ -651,8 +658,7 @@ class PokedexGadgetsController(BaseController):
         # Add stat-based fields dynamically
         c.stat_fields = []  # just field names
         c.effort_fields = []
-        c.stats = db.pokedex_session.query(tables.Stat) \
-            .order_by(tables.Stat.id).all()
+        c.stats = db.stats()
         for stat in c.stats:
             field_name = stat.name.lower().replace(u' ', u'_')
 
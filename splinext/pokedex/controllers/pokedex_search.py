@@ -20,10 +20,12 @@ from spline.lib import helpers as h
 from spline.lib.base import BaseController, render
 from spline.lib.forms import DuplicateField, MultiCheckboxField, QueryCheckboxSelectMultipleField, QueryTextField
 
-from splinext.pokedex import helpers as pokedex_helpers
+from splinext.pokedex import caching, helpers as pokedex_helpers
+from splinext.pokedex.columns import like_matcher
 import splinext.pokedex.db as db
 from splinext.pokedex.forms import PokedexLookupField, RangeTextField
 from splinext.pokedex.magnitude import parse_size
+from splinext.pokedex.pagination import ResultPage
 
 log = logging.getLogger(__name__)
 
@@ -75,6 +77,41 @@ def ilike(column, string):
     return func.lower(column).like(string, escape='^')
 
 
+def load_in_order(table, ids, *options):
+    """Loads the rows of `table` with the given ids, in one query, and
+    returns them in the same order as the ids.  `options` are passed along to
+    the query, e.g. for eagerloading.
+    """
+    if not ids:
+        return []
+
+    query = db.pokedex_session.query(table).filter(table.id.in_(ids))
+    if options:
+        query = query.options(*options)
+    rows_by_id = dict((row.id, row) for row in query)
+    return [rows_by_id[id] for id in ids]
+
+def unique_ids(ids):
+    """Returns a list of the given ids, in order, with repeats removed.
+    Joining to has-manies in the search queries can produce the same row more
+    than once.
+    """
+    seen = set()
+    unique = []
+    for id in ids:
+        if id not in seen:
+            seen.add(id)
+            unique.append(id)
+    return unique
+
+# Ordered ids of the results of recent searches, by the form's `cache_key()`
+# and the data version.  Popular searches get linked and hit over and over
+pokemon_search_cache = caching.register('pokemon_search_results',
+                                        caching.LRUCache(1000))
+move_search_cache = caching.register('move_search_results',
+                                     caching.LRUCache(1000))
+
+
 def in_pokedex_label(pokedex):
     """[ IV ] Sinnoh"""
 
@@ -101,6 +138,7 @@ class BaseSearchForm(Form):
         self.was_submitted = None
         self.needs_shortening = bool(formdata.get('shorten', False))
         self.cleansed_data = dict()
+        self.raw_formdata = formdata
 
         # Need to make a copy and delete items, rather than creating a new
         # dict, because formdata is some variant of a multi-dict
@@ -118,7 +156,7 @@ class BaseSearchForm(Form):
             # Only count the form as submitted if there are any actual
             # searching fields
             self.was_submitted = not all(
-                key in (u'sort', u'display', u'column', u'format')
+                key in (u'sort', u'display', u'column', u'format', u'after')
                 for key in formdata.keys()
             )
 
@@ -143,6 +181,26 @@ class BaseSearchForm(Form):
 
         return self.is_valid
 
+    def cache_key(self):
+        """Returns a hashable key for the search this form describes: every
+        submitted value that isn't blank or a field's default, in a canonical
+        order.  The same search gets the same key however its URL is written,
+        shortened or not, and whichever page of results it's on.
+        """
+        at_default = set(
+            name for name, field in self._fields.iteritems()
+            if field.data == field.default
+        )
+
+        items = set()
+        for name, value in self.raw_formdata.items():
+            if name in ('shorten', 'after') or name in at_default \
+                or value == u'':
+                continue
+            items.add((name, value))
+
+        return tuple(sorted(items))
+
 
 class PokemonSearchForm(BaseSearchForm):
     id = RangeTextField('National ID', inflator=int)
@@ -215,6 +273,8 @@ class PokemonSearchForm(BaseSearchForm):
         min_entries=2,
         max_entries=2,
     )
+    breeds_with = PokedexLookupField(u'Can breed with', valid_type='pokemon',
+                                     allow_blank=True)
 
     # Evolution
     evolution_stage = MultiCheckboxField('Stage',
@@ -524,19 +584,40 @@ class MoveSearchForm(BaseSearchForm):
 
 
 class PokedexSearchController(BaseController):
+    # Pokémon searches run against an in-memory copy of the searchable
+    # columns; set this to False to have the database do them instead
+    in_memory_search = True
+
+    # Results shown per page, unless the config says otherwise
+    results_per_page = 100
+
     def __before__(self, action, **params):
         super(PokedexSearchController, self).__before__(action, **params)
 
         c.javascripts.append(('pokedex', 'pokedex'))
 
+    def _results_per_page(self):
+        return int(config.get('spline-pokedex.search_results_per_page',
+                              self.results_per_page))
+
+    def _after(self):
+        """Returns the id in the `after` parameter, marking where the current
+        page of results starts, or None for the first page.
+        """
+        try:
+            return int(request.params['after'])
+        except (KeyError, ValueError):
+            return None
+
     def pokemon_search(self):
         class F(PokemonSearchForm):
             pass
 
         # Add stat-based fields dynamically
         c.stat_fields = []
-        for stat in db.pokedex_session.query(tables.Stat) \
-                                   .order_by(tables.Stat.id):
+        # Best and worst stats; HP doesn't count, as on the nature pages
+        stat_choices = [(u'', u'')]
+        for stat in db.stats():
             field_name = stat.name.lower().replace(u' ', u'_')
 
             stat_field = RangeTextField(stat.name, inflator=int)
@@ -547,6 +628,13 @@ class PokedexSearchController(BaseController):
             setattr(F, 'stat_' + field_name, stat_field)
             setattr(F, 'effort_' + field_name, effort_field)
 
+            if stat.name != u'HP':
+                stat_choices.append((field_name, stat.name))
+
+        F.best_stat = fields.SelectField(u'Best stat',
+            choices=stat_choices, default=u'')
+        F.worst_stat = fields.SelectField(u'Worst stat',
+            choices=stat_choices, default=u'')
 
         ### Parse form, etc etc
         c.form = F(request.params)
@@ -554,12 +642,11 @@ class PokedexSearchController(BaseController):
 
         # Rendering needs to know which version groups go with which
         # generations for the move-version-group list
-        c.generations = db.pokedex_session.query(tables.Generation) \
-            .order_by(tables.Generation.id.asc())
+        c.generations = db.generations()
 
         # Rendering also needs an example Pokémon, to make the custom list docs
         # reliable
-        c.eevee = db.pokedex_session.query(tables.Pokemon).get(133)
+        c.eevee = db.reference_row('eevee')
 
         # If this is the first time the form was submitted, redirect to a URL
         # with only non-default values
@@ -572,7 +659,132 @@ class PokedexSearchController(BaseController):
             return render('/pokedex/search/pokemon.mako')
 
 
+        ### Display
+        c.display_mode = c.form.display.data
+        c.display_columns = []
+        c.original_results = None  # evolution chain thing
+
+        if c.display_mode == 'smart-table':
+            # Based on the standard table, but a little more clever.  For
+            # example: searching by moves will show how the move is learned by
+            # each resulting Pokémon.
+            # TODO actually do that.
+            c.display_mode = 'custom-table'
+            c.display_columns = default_pokemon_table_columns
+
+        elif c.display_mode == 'custom-table':
+            # User can pick whatever columns, in any order.  Woo!
+            c.display_columns = c.form.column.data
+            if not c.display_columns:
+                # Hmm.  Show name, at least.
+                c.display_columns = ['name']
+
+        elif c.display_mode == 'custom-list':
+            # Use whatever they asked for; it'll get pumped through
+            # safe_substitute anyway.  This uses apply_pokemon_template from
+            # the pokedex helpers
+            list_format = c.form.format.data.strip()
+
+            # Asterisk at the beginning is secret code to make this a
+            # traditional list
+            if list_format[0] == u'*':
+                c.display_mode = 'custom-list-bullets'
+                list_format = list_format[1:]
+
+            c.display_template = Template( h.escape(list_format) )
+
+        else:
+            # icons and sprites don't need any special behavior
+            pass
+
+        # "Name" is the field that actually links to the page.  If it's
+        # missing, add a little link column
+        if c.display_mode == 'custom-table' and 'name' not in c.display_columns:
+            c.display_columns.append('link')
+
+        # Sorting by evolution chain: DO NOT allow sorting backwards!  It
+        # breaks the template's indenting magic.  XXX fix me!
+        if c.form.sort.data == 'evolution-chain':
+            c.form.sort_backwards.data = False
+
         ### Do the searching!
+        # Either engine gives the same results, but they're kept apart so
+        # flipping `in_memory_search` takes effect right away
+        cache_key = (c.form.cache_key(), self.in_memory_search,
+                     db.data_version)
+        cached = pokemon_search_cache.get(cache_key)
+        if cached is None:
+            if self.in_memory_search:
+                ids = self._search_pokemon_in_memory()
+            else:
+                ids = self._search_pokemon_with_sql()
+
+            cached = ids, c.original_results
+            pokemon_search_cache.set(cache_key, cached)
+        ids, c.original_results = cached
+
+        ### Paging
+        # Only the current page gets loaded.  Evolution chain sorting needs
+        # whole families on one page, or the indenting falls apart
+        groups = None
+        if c.form.sort.data == 'evolution-chain':
+            columns = db.pokemon_columns()
+            chain_ids = columns.columns['evolution_chain_id']
+            groups = [chain_ids[columns.positions[id]] for id in ids]
+
+        c.result_page = ResultPage(ids, self._results_per_page(),
+                                   after=self._after(), groups=groups)
+        c.results = load_in_order(tables.Pokemon, c.result_page.ids)
+
+
+        ### Eagerloading
+        # SQLAlchemy is guaranteed to only have one copy of a particular object
+        # around at a time.  So if I run queries with the same results several
+        # times, but eagerload something different each time, I'll only have
+        # one set of obects with all of the eagerloads present on each.
+        # For simplicity, and because all of the conditional eagerloads are
+        # has-manies, this code abuses the above property to eagerload
+        # everything after-the-fact, based on which table columns are visible.
+        # TODO doesn't apply so much to lists at the moment...
+        if c.results and c.display_mode == 'custom-table':
+            eagerloads = []
+
+            if 'type' in c.display_columns:
+                eagerloads.append('types')
+
+            if 'ability' in c.display_columns:
+                eagerloads.append('abilities')
+
+            if 'egg_group' in c.display_columns:
+                eagerloads.append('egg_groups')
+
+            if any(column[0:5] == 'stat_' for column in c.display_columns) \
+                or 'effort' in c.display_columns:
+
+                eagerloads.append('stats.stat')
+
+            if c.form.sort.data == 'evolution-chain':
+                # Gotta know the chain itself and the parent Pokémon to make
+                # the cool indented tree work
+                eagerloads.append('parent_pokemon')
+
+
+            ids = [_.id for _ in c.results]
+            for relation in eagerloads:
+                # Run the query again, selecting only by id this time, but
+                # eagerloading some relation
+                db.pokedex_session.query(tables.Pokemon) \
+                    .filter(tables.Pokemon.id.in_(ids)) \
+                    .options(eagerload_all(relation)) \
+                    .all()
+
+        ### Done.
+        return render('/pokedex/search/pokemon.mako')
+
+    def _search_pokemon_with_sql(self):
+        """Runs the Pokémon search in `c.form` as one big query, and returns
+        the ids of the matching Pokémon in order.
+        """
         me = tables.Pokemon
         query = db.pokedex_session.query(me)
 
@@ -583,10 +795,9 @@ class PokedexSearchController(BaseController):
         def join_to_stat(stat):
             # stat can be an id, object, or name
             if isinstance(stat, basestring):
-                stat = db.pokedex_session.query(tables.Stat).filter_by(name=stat) \
-                                      .one()
+                stat = db.stat(stat)
             elif isinstance(stat, int):
-                stat = db.pokedex_session.query(tables.Stat).get(stat)
+                stat = db.stat_by_id(stat)
 
             if stat not in stat_aliases:
                 stat_alias = aliased(tables.PokemonStat)
@@ -734,6 +945,15 @@ class PokedexSearchController(BaseController):
 
             query = query.filter(clause)
 
+        # Breeding partners, worked out ahead of time
+        if c.form.breeds_with.data:
+            partner_ids = db.breeding_partner_ids(c.form.breeds_with.data.id)
+            if partner_ids:
+                query = query.filter(me.id.in_(partner_ids))
+            else:
+                # Nothing can breed with this
+                query = query.filter(me.id == None)
+
         # Evolution stuff
         # Try to limit our joins without duplicating too much code
         # Stage and position generally need to know parents:
@@ -936,6 +1156,20 @@ class PokedexSearchController(BaseController):
                 if effort_field.data:
                     query = query.filter(effort_field.data(stat_alias.effort))
 
+        # Best and worst stats are worked out ahead of time, as they need
+        # every stat compared to every other
+        if c.form.best_stat.data or c.form.worst_stat.data:
+            stat_ids = dict(
+                (field_name, stat_id) for stat_id, field_name in c.stat_fields)
+            pokemon_ids = db.stat_spread_ids(
+                best_stat_id=stat_ids.get(c.form.best_stat.data),
+                worst_stat_id=stat_ids.get(c.form.worst_stat.data),
+            )
+            if pokemon_ids:
+                query = query.filter(me.id.in_(pokemon_ids))
+            else:
+                query = query.filter(me.id == None)
+
         if c.form.hatch_counter.data:
             query = query.filter(c.form.hatch_counter.data(me.hatch_counter))
 
@@ -971,49 +1205,6 @@ class PokedexSearchController(BaseController):
             query = query.filter( me.pokemon_shape_id == c.form.shape.data.id )
 
 
-        ### Display
-        c.display_mode = c.form.display.data
-        c.display_columns = []
-        c.original_results = None  # evolution chain thing
-
-        if c.display_mode == 'smart-table':
-            # Based on the standard table, but a little more clever.  For
-            # example: searching by moves will show how the move is learned by
-            # each resulting Pokémon.
-            # TODO actually do that.
-            c.display_mode = 'custom-table'
-            c.display_columns = default_pokemon_table_columns
-
-        elif c.display_mode == 'custom-table':
-            # User can pick whatever columns, in any order.  Woo!
-            c.display_columns = c.form.column.data
-            if not c.display_columns:
-                # Hmm.  Show name, at least.
-                c.display_columns = ['name']
-
-        elif c.display_mode == 'custom-list':
-            # Use whatever they asked for; it'll get pumped through
-            # safe_substitute anyway.  This uses apply_pokemon_template from
-            # the pokedex helpers
-            list_format = c.form.format.data.strip()
-
-            # Asterisk at the beginning is secret code to make this a
-            # traditional list
-            if list_format[0] == u'*':
-                c.display_mode = 'custom-list-bullets'
-                list_format = list_format[1:]
-
-            c.display_template = Template( h.escape(list_format) )
-
-        else:
-            # icons and sprites don't need any special behavior
-            pass
-
-        # "Name" is the field that actually links to the page.  If it's
-        # missing, add a little link column
-        if c.display_mode == 'custom-table' and 'name' not in c.display_columns:
-            c.display_columns.append('link')
-
         ### Sorting
         # nb: the below sort ascending for words (a->z) and descending for
         # numbers (9->1), because that's how it should be, okay
@@ -1033,10 +1224,6 @@ class PokedexSearchController(BaseController):
             # XXX doing this for lists would be nice, too, but would sort of
             # break copy/paste, which is what lists are designed for
 
-            # DO NOT allow sorting backwards!  It breaks the template's
-            # indenting magic.  XXX fix me!
-            c.form.sort_backwards.data = False
-
             # Grab the results first; needed for sorting even if the query is
             # otherwise left alone, boo
             pokemon_ids = {}
@@ -1184,54 +1371,244 @@ class PokedexSearchController(BaseController):
 
         query = query.order_by(*sort_clauses)
 
+        return unique_ids(id for (id,) in query.values(me.id))
 
-        ### Run the query!
-        c.results = query.all()
+    def _search_pokemon_in_memory(self):
+        """Runs the Pokémon search in `c.form` against `db.pokemon_columns()`,
+        and returns the ids of the matching Pokémon in order.  Gives the same
+        results as `_search_pokemon_with_sql`, without touching the database.
+        """
+        columns = db.pokemon_columns()
+        column = columns.columns
+        mask = columns.all
 
+        # ID
+        if c.form.id.data:
+            mask &= columns.in_range('national_id', c.form.id.data)
 
-        ### Eagerloading
-        # SQLAlchemy is guaranteed to only have one copy of a particular object
-        # around at a time.  So if I run queries with the same results several
-        # times, but eagerload something different each time, I'll only have
-        # one set of obects with all of the eagerloads present on each.
-        # For simplicity, and because all of the conditional eagerloads are
-        # has-manies, this code abuses the above property to eagerload
-        # everything after-the-fact, based on which table columns are visible.
-        # TODO doesn't apply so much to lists at the moment...
-        if c.results and c.display_mode == 'custom-table':
-            eagerloads = []
+        # Name
+        if c.form.name.data:
+            name = c.form.name.data.strip().lower()
+            name_mask = columns.where(column['name'], like_matcher(name))
 
-            if 'type' in c.display_columns:
-                eagerloads.append('types')
+            if ' ' in name:
+                # Might be a form name, as above
+                form_name, name_sans_form = name.split(' ', 1)
+                name_mask |= \
+                    columns.where(column['forme_name'], like_matcher(form_name)) \
+                    & columns.where(column['name'], like_matcher(name_sans_form))
 
-            if 'ability' in c.display_columns:
-                eagerloads.append('abilities')
+            mask &= name_mask
 
-            if 'egg_group' in c.display_columns:
-                eagerloads.append('egg_groups')
+        # Ability
+        if c.form.ability.data:
+            mask &= columns.any_of('ability', [c.form.ability.data.id])
 
-            if any(column[0:5] == 'stat_' for column in c.display_columns) \
-                or 'effort' in c.display_columns:
+        # Held item
+        if c.form.held_item.data:
+            mask &= columns.any_of('held_item', [c.form.held_item.data.id])
 
-                eagerloads.append('stats.stat')
+        # Growth rate
+        if c.form.growth_rate.data:
+            growth_rate_id = c.form.growth_rate.data.id
+            mask &= columns.where(column['growth_rate_id'],
+                                  lambda id: id == growth_rate_id)
 
-            if c.form.sort.data == 'evolution-chain':
-                # Gotta know the chain itself and the parent Pokémon to make
-                # the cool indented tree work
-                eagerloads.append('parent_pokemon')
+        # Type
+        if c.form.type.data:
+            type_ids = [_.id for _ in c.form.type.data]
 
+            if c.form.type_operator.data == u'any':
+                mask &= columns.any_of('type', type_ids)
+            elif c.form.type_operator.data == u'only':
+                mask &= columns.only('type', type_ids)
+            elif c.form.type_operator.data == u'exact':
+                mask &= columns.only('type', type_ids) \
+                      & columns.all_of('type', type_ids)
 
-            ids = [_.id for _ in c.results]
-            for relation in eagerloads:
-                # Run the query again, selecting only by id this time, but
-                # eagerloading some relation
-                db.pokedex_session.query(tables.Pokemon) \
-                    .filter(tables.Pokemon.id.in_(ids)) \
-                    .options(eagerload_all(relation)) \
-                    .all()
+        # Gender distribution
+        if c.form.gender_rate.data:
+            gender_rate = int(c.form.gender_rate.data)
+            gender_rate_op = c.form.gender_rate_operator.data
 
-        ### Done.
-        return render('/pokedex/search/pokemon.mako')
+            # Genderless ignores the operator, and is never "at most" anything
+            if gender_rate == -1 or gender_rate_op == 'equal':
+                matches = lambda rate: rate == gender_rate
+            elif gender_rate_op == 'less_equal':
+                matches = lambda rate: rate != -1 and rate <= gender_rate
+            elif gender_rate_op == 'more_equal':
+                matches = lambda rate: rate != -1 and rate >= gender_rate
+
+            mask &= columns.where(column['gender_rate'], matches)
+
+        # Egg groups
+        if any(c.form.egg_group.data):
+            egg_group_ids = [egg_group.id for egg_group in c.form.egg_group.data
+                             if egg_group]
+
+            if c.form.egg_group_operator.data == 'any':
+                mask &= columns.any_of('egg_group', egg_group_ids)
+            elif c.form.egg_group_operator.data == 'all':
+                mask &= columns.all_of('egg_group', egg_group_ids)
+
+        # Breeding partners
+        if c.form.breeds_with.data:
+            mask &= columns.mask_of(
+                db.breeding_partner_ids(c.form.breeds_with.data.id))
+
+        # Evolution stuff; each set of checkboxes matches any of its values
+        for field in (c.form.evolution_stage, c.form.evolution_position,
+                      c.form.evolution_special):
+            if field.data:
+                field_mask = 0
+                for value in field.data:
+                    field_mask |= columns.evolution_masks[value]
+                mask &= field_mask
+
+        # Generation
+        if c.form.introduced_in.data:
+            generation_ids = set(_.id for _ in c.form.introduced_in.data)
+            mask &= columns.where(column['generation_id'],
+                                  lambda id: id in generation_ids)
+
+        if c.form.in_pokedex.data:
+            mask &= columns.any_of('pokedex',
+                                   [_.id for _ in c.form.in_pokedex.data])
+
+        # Moves, from the learner bitmaps.  Each move has to be learned, but
+        # not necessarily in the same version group as the others
+        if c.form.move.data:
+            learner_index = db.move_learner_index()
+
+            version_group_ids = None
+            if c.form.move_version_group.data:
+                version_group_ids = set(
+                    _.id for _ in c.form.move_version_group.data)
+            method_ids = None
+            if c.form.move_method.data:
+                method_ids = set(_.id for _ in c.form.move_method.data)
+
+            if c.form.move_fuzz.data == 'same-effect':
+                move_groups = [learner_index.same_effect(move.id)
+                               for move in c.form.move.data]
+            else:
+                move_groups = [[move.id] for move in c.form.move.data]
+
+            mask &= learner_index.learners_of_all(
+                move_groups, version_group_ids, method_ids)
+
+        # Numbers
+        for stat_id, field_name in c.stat_fields:
+            stat_field = c.form['stat_' + field_name]
+            effort_field = c.form['effort_' + field_name]
+
+            if stat_field.data:
+                mask &= columns.in_range(('base_stat', stat_id),
+                                         stat_field.data)
+
+            if effort_field.data:
+                mask &= columns.in_range(('effort', stat_id),
+                                         effort_field.data)
+
+        if c.form.best_stat.data or c.form.worst_stat.data:
+            stat_ids = dict(
+                (field_name, stat_id) for stat_id, field_name in c.stat_fields)
+            mask &= columns.mask_of(db.stat_spread_ids(
+                best_stat_id=stat_ids.get(c.form.best_stat.data),
+                worst_stat_id=stat_ids.get(c.form.worst_stat.data),
+            ))
+
+        for field_name in ('hatch_counter', 'base_experience', 'capture_rate',
+                           'base_happiness', 'height', 'weight'):
+            if c.form[field_name].data:
+                mask &= columns.in_range(field_name, c.form[field_name].data)
+
+        # Species string
+        if c.form.species.data:
+            mask &= columns.where(column['species'],
+                                  like_matcher(c.form.species.data))
+
+        # Color, habitat, shape
+        for field_name, column_name in (('color', 'color_id'),
+                                        ('habitat', 'habitat_id'),
+                                        ('shape', 'shape_id')):
+            if c.form[field_name].data:
+                row_id = c.form[field_name].data.id
+                mask &= columns.where(column[column_name],
+                                      lambda id: id == row_id)
+
+
+        ### Sorting
+        # Same as the SQL version: words ascending, numbers descending, and
+        # name then id to fall back on.  Words go by the database's collation
+        positions = columns.positions_in(mask)
+        sort_keys = [(columns.sort_column('name'), False), (columns.ids, False)]
+        sort = c.form.sort.data
+
+        if sort == 'evolution-chain':
+            # See the SQL version for what's going on here.  The whole of each
+            # family is shown in tables
+            c.original_results = dict((columns.ids[i], None) for i in positions)
+            chain_ids = column['evolution_chain_id']
+            chain_positions = {}
+            for i in positions:
+                chain_positions.setdefault(chain_ids[i], columns.ids[i])
+
+            if c.display_mode in ('custom-table',):
+                positions = columns.positions_in(columns.where(
+                    chain_ids, lambda chain_id: chain_id in chain_positions))
+
+            sort_keys = [
+                ([chain_positions.get(chain_id) for chain_id in chain_ids],
+                 False),
+                (column['is_baby'], True),
+                (columns.ids, False),
+            ] + sort_keys
+
+        elif sort == 'name':
+            pass
+
+        elif sort == 'type':
+            # Single-typed Pokémon first, whatever the database does with NULL
+            type2_names = columns.sort_column('type2_name')
+            sort_keys = [
+                (columns.sort_column('type1_name'), False),
+                ([name is None for name in type2_names], True),
+                (type2_names, False),
+            ] + sort_keys
+
+        elif sort == 'stat-total':
+            sort_keys.insert(0, (columns.stat_totals, True))
+
+        elif sort[0:5] == 'stat-':
+            field_name = sort[5:].replace('-', '_')
+            stat_id = dict(
+                (field_name, stat_id) for stat_id, field_name in c.stat_fields
+            )[field_name]
+            sort_keys.insert(0, (columns.base_stats[stat_id], True))
+
+        else:
+            column_name, descending = dict([
+                ('id',              ('national_id', False)),
+                ('height',          ('height', True)),
+                ('weight',          ('weight', True)),
+                ('gender',          ('gender_rate', False)),
+                ('species',         ('species', False)),
+                ('color',           ('color_name', False)),
+                ('habitat',         ('habitat_name', False)),
+                ('hatch-counter',   ('hatch_counter', False)),
+                ('base-experience', ('base_experience', True)),
+                ('capture-rate',    ('capture_rate', True)),
+                ('base-happiness',  ('base_happiness', True)),
+            ])[sort]
+            sort_keys.insert(0, (columns.sort_column(column_name), descending))
+
+        # Reverse sort
+        if c.form.sort_backwards.data:
+            sort_keys = [(values, not descending)
+                         for values, descending in sort_keys]
+
+        return columns.order(positions, sort_keys)
 
     def move_search(self):
         ### First tack some database-driven fields onto the form
@@ -1258,8 +1635,7 @@ class PokedexSearchController(BaseController):
 
         # Add flag fields dynamically
         c.flag_fields = []
-        c.flags = db.pokedex_session.query(tables.MoveFlagType) \
-            .order_by(tables.MoveFlagType.id)
+        c.flags = db.move_flag_types()
         for flag in c.flags:
             field_name = 'flag_' + flag.identifier
             field = fields.SelectField(flag.name,
@@ -1281,12 +1657,11 @@ class PokedexSearchController(BaseController):
 
         # Rendering needs to know which version groups go with which
         # generations for the move-version-group list
-        c.generations = db.pokedex_session.query(tables.Generation) \
-            .order_by(tables.Generation.id.asc())
+        c.generations = db.generations()
 
         # Rendering also needs an example move, to make the custom list docs
         # reliable
-        c.surf = db.pokedex_session.query(tables.Move).get(57)
+        c.surf = db.reference_row('surf')
 
         # If this is the first time the form was submitted, redirect to a URL
         # with only non-default values
@@ -1299,8 +1674,72 @@ class PokedexSearchController(BaseController):
             return render('/pokedex/search/moves.mako')
 
 
+        ### Display
+        c.display_mode = c.form.display.data
+        c.display_columns = []
+
+        if c.display_mode == 'smart-table':
+            # Based on the standard table, but a little more clever.  For
+            # example: searching by moves will show how the move is learned by
+            # each resulting Pokémon.
+            # TODO actually do that.
+            c.display_mode = 'custom-table'
+            c.display_columns = default_move_table_columns
+
+        elif c.display_mode == 'custom-table':
+            # User can pick whatever columns, in any order.  Woo!
+            c.display_columns = c.form.column.data
+            if not c.display_columns:
+                # Hmm.  Show name, at least.
+                c.display_columns = ['name']
+
+        elif c.display_mode == 'custom-list':
+            # Use whatever they asked for; it'll get pumped through
+            # safe_substitute anyway.  This uses apply_pokemon_template from
+            # the pokedex helpers
+            list_format = c.form.format.data.strip()
+
+            # Asterisk at the beginning is secret code to make this a
+            # traditional list
+            if list_format[0] == u'*':
+                c.display_mode = 'custom-list-bullets'
+                list_format = list_format[1:]
+
+            c.display_template = Template( h.escape(list_format) )
+
+        # "Name" is the field that actually links to the page.  If it's
+        # missing, add a little link column
+        if c.display_mode == 'custom-table' and 'name' not in c.display_columns:
+            c.display_columns.append('link')
+
         ### Do the searching!
         me = tables.Move
+
+        # Same search as one done recently?
+        cache_key = c.form.cache_key(), db.data_version
+        ids = move_search_cache.get(cache_key)
+        if ids is None:
+            ids = self._search_moves()
+            move_search_cache.set(cache_key, ids)
+
+        ### Paging
+        c.result_page = ResultPage(ids, self._results_per_page(),
+                                   after=self._after())
+        # Eagerload the obvious stuff: type and damage class
+        c.results = load_in_order(me, c.result_page.ids,
+            eagerload('type'),
+            eagerload('damage_class'),
+            eagerload('move_effect'),
+        )
+
+        ### Done.
+        return render('/pokedex/search/moves.mako')
+
+    def _search_moves(self):
+        """Runs the move search in `c.form` as one query, and returns the ids
+        of the matching moves in order.
+        """
+        me = tables.Move
         query = db.pokedex_session.query(me).join(tables.MoveEffect)
 
         # Name
@@ -1420,44 +1859,6 @@ class PokedexSearchController(BaseController):
             query = query.filter(me.id.in_(pokemoves_subq))
 
 
-        ### Display
-        c.display_mode = c.form.display.data
-        c.display_columns = []
-
-        if c.display_mode == 'smart-table':
-            # Based on the standard table, but a little more clever.  For
-            # example: searching by moves will show how the move is learned by
-            # each resulting Pokémon.
-            # TODO actually do that.
-            c.display_mode = 'custom-table'
-            c.display_columns = default_move_table_columns
-
-        elif c.display_mode == 'custom-table':
-            # User can pick whatever columns, in any order.  Woo!
-            c.display_columns = c.form.column.data
-            if not c.display_columns:
-                # Hmm.  Show name, at least.
-                c.display_columns = ['name']
-
-        elif c.display_mode == 'custom-list':
-            # Use whatever they asked for; it'll get pumped through
-            # safe_substitute anyway.  This uses apply_pokemon_template from
-            # the pokedex helpers
-            list_format = c.form.format.data.strip()
-
-            # Asterisk at the beginning is secret code to make this a
-            # traditional list
-            if list_format[0] == u'*':
-                c.display_mode = 'custom-list-bullets'
-                list_format = list_format[1:]
-
-            c.display_template = Template( h.escape(list_format) )
-
-        # "Name" is the field that actually links to the page.  If it's
-        # missing, add a little link column
-        if c.display_mode == 'custom-table' and 'name' not in c.display_columns:
-            c.display_columns.append('link')
-
         ### Sorting
         # nb: the below sort ascending for words (a->z) and descending for
         # numbers (9->1), because that's how it should be, okay
@@ -1506,14 +1907,4 @@ class PokedexSearchController(BaseController):
 
         query = query.order_by(*sort_clauses)
 
-        # Eagerload the obvious stuff: type and damage class
-        query = query.options(
-            eagerload('type'),
-            eagerload('damage_class'),
-            eagerload('move_effect'),
-        )
-
-        c.results = query.all()
-
-        ### Done.
-        return render('/pokedex/search/moves.mako')
+        return unique_ids(id for (id,) in query.values(me.id))
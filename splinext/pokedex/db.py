@@ -2,20 +2,44 @@
 """Small wrapper for access to the pokedex library's database."""
 from __future__ import absolute_import
 
+from collections import defaultdict
+import hashlib
+from operator import attrgetter
 import os.path
+import threading
 
 import pokedex.db
 from pokedex.db import tables
+import pokedex.lookup
+from sqlalchemy.orm import eagerload, eagerload_all
 from sqlalchemy.sql import func
 
 from spline.lib.base import SQLATimerProxy
 
+from splinext.pokedex import helpers as pokedex_helpers
+from splinext.pokedex import caching
+from splinext.pokedex.columns import MoveLearnerIndex, PokemonColumns
+from splinext.pokedex.efficacy import TypeEfficacyMatrix
+from splinext.pokedex.encounters import EncounterIndex, summarize_encounters
+from splinext.pokedex.evolution import evolution_table as build_evolution_table
+from splinext.pokedex.indexes import BreedingIndex, NeighborRing, \
+    PercentileIndex, StatSpreadIndex
+from splinext.pokedex.learners import LearnerTable
+from splinext.pokedex.suggestions import build_suggestion_index
+
 
 pokedex_session = None
 pokedex_lookup = None
+pokedex_suggestions = None
+reference_data = None
+# Hash of the database's contents, set whenever the reference data is
+# reloaded; caches of anything from the database can use it in their keys
+data_version = None
 
 def connect(config):
-    """Instantiates the `pokedex_session` and `pokedex_lookup` objects."""
+    """Instantiates the `pokedex_session`, `pokedex_lookup` and
+    `pokedex_suggestions` objects, and loads the reference data snapshot.
+    """
     # DB session for everyone to use.
     # This uses the same timer proxy as the main engine, so Pokédex queries are
     # counted towards the db time in the footer
@@ -36,6 +60,625 @@ def connect(config):
     if not pokedex_lookup.index:
         pokedex_lookup.rebuild_index()
 
+    reload_reference_data()
+
+
+### Reference data
+# A handful of tiny tables never change while the site is running, but get
+# queried on nearly every page.  Load them once per process and hand out
+# copies merged into the current session instead.
+
+# Individual rows that pages use as examples or link targets, by key
+reference_rows = dict(
+    pp_up=(tables.Item, u'PP Up'),
+    growth_mulch=(tables.Item, u'Growth Mulch'),
+    damp_mulch=(tables.Item, u'Damp Mulch'),
+    ditto=(tables.Pokemon, u'Ditto'),
+    eevee=(tables.Pokemon, u'Eevee'),
+    surf=(tables.Move, u'Surf'),
+)
+
+# Tables that pages look up by name
+named_tables = [
+    tables.Ability,
+    tables.Item,
+    tables.Location,
+    tables.Move,
+    tables.Nature,
+    tables.Pokemon,
+    tables.Type,
+]
+
+# Tables that markdown can link to, as [Eevee]{pokemon}
+linkable_tables = [
+    tables.Ability,
+    tables.Item,
+    tables.Move,
+    tables.Pokemon,
+    tables.Type,
+]
+
+class derived_index(object):
+    """Decorator for a `ReferenceData` method that builds some index from the
+    database.  The method is called with a private session the first time the
+    attribute is accessed, and the result sticks around until the reference
+    data is reloaded.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+
+        with obj._build_lock:
+            if self.__name__ not in obj.__dict__:
+                session = obj.session_factory()
+                try:
+                    obj.__dict__[self.__name__] = self.func(obj, session)
+                finally:
+                    session.close()
+
+        return obj.__dict__[self.__name__]
+
+class ReferenceData(object):
+    """Process-wide, read-only snapshot of the reference tables.
+
+    Everything in here is detached from any session, so don't hand it out
+    directly; use the accessor functions below, which merge rows into the
+    current request's session without touching the database.
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._build_lock = threading.RLock()
+
+        session = session_factory()
+        try:
+            self.generations = session.query(tables.Generation) \
+                .options(
+                    eagerload_all('version_groups.versions'),
+                    eagerload('versions'),
+                ) \
+                .order_by(tables.Generation.id.asc()) \
+                .all()
+
+            self.version_groups = session.query(tables.VersionGroup) \
+                .options(
+                    eagerload('generation'),
+                    eagerload('versions'),
+                ) \
+                .order_by(tables.VersionGroup.id.asc()) \
+                .all()
+
+            self.stats = session.query(tables.Stat) \
+                .options(eagerload('damage_class')) \
+                .order_by(tables.Stat.id.asc()) \
+                .all()
+            self.stats_by_id = dict((stat.id, stat) for stat in self.stats)
+
+            self.types = session.query(tables.Type) \
+                .order_by(tables.Type.id.asc()) \
+                .all()
+
+            self.move_flag_types = session.query(tables.MoveFlagType) \
+                .order_by(tables.MoveFlagType.id.asc()) \
+                .all()
+
+            self.pokemon_move_methods \
+                = session.query(tables.PokemonMoveMethod) \
+                .order_by(tables.PokemonMoveMethod.id.asc()) \
+                .all()
+
+            self.rows = {}
+            for key, (table, name) in reference_rows.items():
+                q = session.query(table).filter_by(name=name)
+                if table is tables.Pokemon:
+                    q = q.filter_by(forme_base_pokemon_id=None)
+                self.rows[key] = q.one()
+        finally:
+            # Closing expunges everything, leaving the loaded rows detached
+            session.close()
+
+    @derived_index
+    def stat_percentiles(self, session):
+        """Maps stat ids to a `PercentileIndex` of every Pokémon's base stat.
+        The key 'total' has the same for base stat totals.
+        """
+        base_stats = defaultdict(list)
+        totals = defaultdict(int)
+        q = session.query(
+            tables.PokemonStat.pokemon_id,
+            tables.PokemonStat.stat_id,
+            tables.PokemonStat.base_stat,
+        )
+        for pokemon_id, stat_id, base_stat in q:
+            base_stats[stat_id].append(base_stat)
+            totals[pokemon_id] += base_stat
+
+        percentiles = dict(
+            (stat_id, PercentileIndex(values))
+            for stat_id, values in base_stats.items()
+        )
+        percentiles['total'] = PercentileIndex(totals.values())
+        return percentiles
+
+    @derived_index
+    def stat_spreads(self, session):
+        """`StatSpreadIndex` of every Pokémon's stats, except HP."""
+        hp_id = [stat.id for stat in self.stats if stat.name == u'HP'][0]
+        q = session.query(
+            tables.PokemonStat.pokemon_id,
+            tables.PokemonStat.stat_id,
+            tables.PokemonStat.base_stat,
+        ) \
+            .filter(tables.PokemonStat.stat_id != hp_id)
+        return StatSpreadIndex(q)
+
+    @derived_index
+    def pokemon_columns(self, session):
+        """`PokemonColumns` of everything the Pokémon search filters and
+        sorts on.
+        """
+        growth_rate_ids = dict(session.query(
+            tables.EvolutionChain.id,
+            tables.EvolutionChain.growth_rate_id,
+        ))
+        color_names = dict(session.query(
+            tables.PokemonColor.id,
+            tables.PokemonColor.name,
+        ))
+        habitat_names = dict(session.query(
+            tables.PokemonHabitat.id,
+            tables.PokemonHabitat.name,
+        ))
+        type_names = dict((type.id, type.name) for type in self.types)
+
+        pokemon_types = session.query(
+            tables.PokemonType.pokemon_id,
+            tables.PokemonType.type_id,
+            tables.PokemonType.slot,
+        ).all()
+        type_slots = defaultdict(dict)
+        for pokemon_id, type_id, slot in pokemon_types:
+            type_slots[pokemon_id][slot] = type_names[type_id]
+
+        pokemon = []
+        for row in session.query(tables.Pokemon):
+            pokemon.append(dict(
+                id=row.id,
+                national_id=row.forme_base_pokemon_id or row.id,
+                name=row.name,
+                forme_name=row.forme_name,
+                species=row.species,
+                generation_id=row.generation_id,
+                evolution_chain_id=row.evolution_chain_id,
+                growth_rate_id=growth_rate_ids[row.evolution_chain_id],
+                gender_rate=row.gender_rate,
+                is_baby=row.is_baby,
+                hatch_counter=row.hatch_counter,
+                base_experience=row.base_experience,
+                capture_rate=row.capture_rate,
+                base_happiness=row.base_happiness,
+                height=row.height,
+                weight=row.weight,
+                color_id=row.color_id,
+                color_name=color_names.get(row.color_id),
+                habitat_id=row.habitat_id,
+                habitat_name=habitat_names.get(row.habitat_id),
+                shape_id=row.pokemon_shape_id,
+                type1_name=type_slots[row.id].get(1),
+                type2_name=type_slots[row.id].get(2),
+            ))
+
+        relations = dict(
+            type=[(pokemon_id, type_id)
+                  for pokemon_id, type_id, slot in pokemon_types],
+            ability=session.query(
+                tables.PokemonAbility.pokemon_id,
+                tables.PokemonAbility.ability_id,
+            ).all(),
+            egg_group=session.query(
+                tables.PokemonEggGroup.pokemon_id,
+                tables.PokemonEggGroup.egg_group_id,
+            ).all(),
+            held_item=session.query(
+                tables.PokemonItem.pokemon_id,
+                tables.PokemonItem.item_id,
+            ).all(),
+            pokedex=session.query(
+                tables.PokemonDexNumber.pokemon_id,
+                tables.PokemonDexNumber.pokedex_id,
+            ).all(),
+        )
+
+        stats = session.query(
+            tables.PokemonStat.pokemon_id,
+            tables.PokemonStat.stat_id,
+            tables.PokemonStat.base_stat,
+            tables.PokemonStat.effort,
+        )
+        evolutions = session.query(
+            tables.PokemonEvolution.from_pokemon_id,
+            tables.PokemonEvolution.to_pokemon_id,
+        )
+
+        # Text gets sorted by the database's collation, not by codepoint:
+        # fetch every value in the database's own order
+        def collation(column):
+            return [
+                value for (value,)
+                in session.query(column).distinct().order_by(column.asc())
+                if value is not None
+            ]
+        collations = dict(
+            name=collation(tables.Pokemon.name),
+            species=collation(tables.Pokemon.species),
+            color_name=collation(tables.PokemonColor.name),
+            habitat_name=collation(tables.PokemonHabitat.name),
+            type1_name=collation(tables.Type.name),
+            type2_name=collation(tables.Type.name),
+        )
+
+        # PostgreSQL puts NULL last when sorting ascending; these put it first
+        nulls_first = session.bind.dialect.name in ('sqlite', 'mysql')
+
+        return PokemonColumns(pokemon, relations, stats, evolutions,
+                              collations, nulls_first)
+
+    @derived_index
+    def move_learner_index(self, session):
+        """`MoveLearnerIndex` of every move every Pokémon learns, by the
+        positions in `pokemon_columns`.
+        """
+        pokemon_moves = session.query(
+            tables.PokemonMove.pokemon_id,
+            tables.PokemonMove.move_id,
+            tables.PokemonMove.version_group_id,
+            tables.PokemonMove.pokemon_move_method_id,
+        )
+        move_effects = session.query(tables.Move.id, tables.Move.effect_id)
+        return MoveLearnerIndex(self.pokemon_columns.positions,
+                                pokemon_moves, move_effects)
+
+    @derived_index
+    def move_power_percentiles(self, session):
+        """`PercentileIndex` of the power of every move that has a real
+        power; 0 and 1 are placeholders for "none" and "varies".
+        """
+        q = session.query(tables.Move.power) \
+            .filter(tables.Move.power > 1)
+        return PercentileIndex(power for (power,) in q)
+
+    @derived_index
+    def type_efficacy(self, session):
+        """`TypeEfficacyMatrix` of every type against every other."""
+        q = session.query(
+            tables.TypeEfficacy.damage_type_id,
+            tables.TypeEfficacy.target_type_id,
+            tables.TypeEfficacy.damage_factor,
+        )
+        return TypeEfficacyMatrix(
+            [(type.id, type.name) for type in self.types],
+            q.all(),
+        )
+
+    @derived_index
+    def base_forms(self, session):
+        """Maps ids to the base form of every Pokémon."""
+        q = session.query(tables.Pokemon) \
+            .filter_by(forme_base_pokemon_id=None)
+        return dict((pokemon.id, pokemon) for pokemon in q)
+
+    @derived_index
+    def neighbor_rings(self, session):
+        """Maps tables to a `NeighborRing` of their rows, for the previous and
+        next links in page headers.  Only base forms of Pokémon are included.
+        """
+        rings = {}
+        rings[tables.Pokemon] = NeighborRing(
+            self.base_forms.values(),
+            key=attrgetter('id'),
+        )
+        for table in (tables.Ability, tables.Move, tables.Type):
+            rings[table] = NeighborRing(
+                session.query(table).all(),
+                key=attrgetter('id'),
+            )
+        return rings
+
+    @derived_index
+    def breeding(self, session):
+        """`BreedingIndex` of every Pokémon and form."""
+        egg_group_ids = defaultdict(list)
+        q = session.query(
+            tables.PokemonEggGroup.pokemon_id,
+            tables.PokemonEggGroup.egg_group_id,
+        )
+        for pokemon_id, egg_group_id in q:
+            egg_group_ids[pokemon_id].append(egg_group_id)
+
+        parent_ids = dict(
+            (to_pokemon_id, from_pokemon_id)
+            for from_pokemon_id, to_pokemon_id in session.query(
+                tables.PokemonEvolution.from_pokemon_id,
+                tables.PokemonEvolution.to_pokemon_id,
+            )
+        )
+
+        q = session.query(
+            tables.Pokemon.id,
+            tables.Pokemon.evolution_chain_id,
+            tables.Pokemon.gender_rate,
+            tables.Pokemon.forme_base_pokemon_id,
+        )
+        return BreedingIndex([
+            (id, evolution_chain_id, gender_rate,
+             tuple(egg_group_ids[id]), parent_ids.get(id), forme_base_pokemon_id)
+            for id, evolution_chain_id, gender_rate, forme_base_pokemon_id in q
+        ])
+
+    @derived_index
+    def encounters(self, session):
+        """`EncounterIndex` of every wild encounter, folded together."""
+        q = session.query(tables.Encounter) \
+            .options(
+                eagerload_all('condition_value_map.condition_value.condition'),
+                eagerload_all('version.version_group.generation'),
+                eagerload_all('slot.terrain'),
+                eagerload_all('location_area.location.region'),
+                eagerload('pokemon'),
+            ) \
+            .order_by(tables.Encounter.id.asc())
+
+        rows = dict(
+            pokemon={},
+            version={},
+            location_area={},
+            terrain={},
+            condition_value={},
+        )
+        raw_encounters = []
+        for encounter in q:
+            rows['pokemon'][encounter.pokemon.id] = encounter.pokemon
+            rows['version'][encounter.version.id] = encounter.version
+            rows['location_area'][encounter.location_area.id] \
+                = encounter.location_area
+            rows['terrain'][encounter.slot.terrain.id] = encounter.slot.terrain
+            for condition_value in encounter.condition_values:
+                rows['condition_value'][condition_value.id] = condition_value
+
+            raw_encounters.append((
+                encounter.pokemon.id,
+                encounter.version.id,
+                encounter.location_area.id,
+                encounter.slot.terrain.id,
+                [condition_value.id
+                    for condition_value in encounter.condition_values],
+                encounter.min_level,
+                encounter.max_level,
+                encounter.slot.rarity,
+            ))
+
+        return EncounterIndex(summarize_encounters(raw_encounters), rows)
+
+    @derived_index
+    def name_index(self, session):
+        """Maps each table in `named_tables` to a dict of lowercased names to
+        lists of ids.  Names aren't unique; several locations share one.
+
+        Pokémon are keyed by (name, form) instead.  Named forms are filed
+        under their form name, and base forms are also filed under None, as
+        `pokemon_query()` expects.
+        """
+        index = {}
+        for table in named_tables:
+            ids_by_name = defaultdict(list)
+            if table is tables.Pokemon:
+                q = session.query(
+                    table.id, table.name,
+                    table.forme_name, table.forme_base_pokemon_id,
+                )
+                for id, name, forme_name, forme_base_pokemon_id in q:
+                    if forme_name:
+                        ids_by_name[name.lower(), forme_name].append(id)
+                    if forme_base_pokemon_id is None:
+                        ids_by_name[name.lower(), None].append(id)
+            else:
+                for id, name in session.query(table.id, table.name):
+                    ids_by_name[name.lower()].append(id)
+
+            index[table] = dict(ids_by_name)
+        return index
+
+    @derived_index
+    def link_targets(self, session):
+        """Maps (table, lowercased name) to (display name, URL) for every row
+        markdown can link to.  Names that aren't unique are left out, so they
+        fail the same way they always have.
+
+        This makes URLs, so it can only be built during a request.
+        """
+        targets = {}
+        ambiguous = set()
+        for table in linkable_tables:
+            q = session.query(table)
+            if table is tables.Pokemon:
+                q = q.filter_by(forme_base_pokemon_id=None)
+                display_name = attrgetter('full_name')
+            else:
+                display_name = attrgetter('name')
+            if table is tables.Item:
+                q = q.options(eagerload('pocket'))
+
+            for row in q:
+                key = table, row.name.lower()
+                if key in targets:
+                    ambiguous.add(key)
+                targets[key] = (display_name(row),
+                                pokedex_helpers.make_thingy_url(row))
+
+        for key in ambiguous:
+            del targets[key]
+        return targets
+
+def data_fingerprint(session):
+    u"""Returns a hash of every row in the Pokédex database.  Unlike a reload
+    counter, it's the same in every process and across restarts for as long
+    as the data is, so it's safe in keys for caches shared between them.
+    """
+    digest = hashlib.sha1()
+    for table in tables.metadata.sorted_tables:
+        order = list(table.primary_key.columns) or list(table.columns)
+        digest.update(table.name)
+        for row in session.execute(table.select().order_by(*order)):
+            digest.update(repr(tuple(row)))
+    return digest.hexdigest()[:12]
+
+def reload_reference_data():
+    """Rebuilds the reference data snapshot, and throws away every index
+    derived from it.  Call this after the Pokédex database is updated.
+    """
+    global reference_data, data_version, pokedex_suggestions
+    reference_data = ReferenceData(pokedex_session.session_factory)
+
+    session = pokedex_session.session_factory()
+    try:
+        data_version = data_fingerprint(session)
+
+        # In-memory copy of the lookup index's names, for the suggestion box
+        pokedex_suggestions = build_suggestion_index(
+            pokedex_lookup, session, named_tables)
+    finally:
+        session.close()
+
+    link_target_cache.clear()
+    evolution_table_cache.clear()
+    move_learners_cache.clear()
+
+def merged(rows):
+    """Returns copies of the given detached rows that belong to the current
+    session.  Nothing is loaded from the database.
+    """
+    return [pokedex_session.merge(row, load=False) for row in rows]
+
+def generations(min_id=None):
+    """Returns every generation, in order, optionally starting from
+    `min_id`.
+    """
+    return merged(
+        generation for generation in reference_data.generations
+        if min_id is None or generation.id >= min_id
+    )
+
+def version_groups():
+    return merged(reference_data.version_groups)
+
+def stats():
+    return merged(reference_data.stats)
+
+def stat(name):
+    for row in reference_data.stats:
+        if row.name == name:
+            return pokedex_session.merge(row, load=False)
+    raise KeyError(name)
+
+def stat_by_id(id):
+    return pokedex_session.merge(reference_data.stats_by_id[id], load=False)
+
+def types():
+    """Returns every type, by id."""
+    return merged(reference_data.types)
+
+def move_flag_types():
+    return merged(reference_data.move_flag_types)
+
+def pokemon_move_methods():
+    return merged(reference_data.pokemon_move_methods)
+
+def neighbors(table, id):
+    """Returns the rows before and after the given id in `table`, wrapping
+    around at the ends.
+    """
+    return merged(reference_data.neighbor_rings[table].neighbors(id))
+
+def compatible_families(egg_groups):
+    """Returns the base form of every family that can breed with a Pokémon in
+    the given egg groups, by id.  See `BreedingIndex`.
+    """
+    return merged(
+        reference_data.base_forms[id]
+        for id in reference_data.breeding.compatible_families(
+            [egg_group.id for egg_group in egg_groups])
+    )
+
+def breeding_partner_ids(pokemon_id):
+    """Returns the ids of every Pokémon and form that can breed with the given
+    one.  See `BreedingIndex`.
+    """
+    return reference_data.breeding.partners(pokemon_id)
+
+def encounters(pokemon_id=None, location_area_ids=None):
+    """Returns the `EncounterSummary`s for either a Pokémon or some location
+    areas, each as a tuple of (summary, pokemon, version, location_area,
+    terrain, condition_values), with the rows merged into the current session.
+    """
+    index = reference_data.encounters
+    if pokemon_id is not None:
+        summaries = index.for_pokemon(pokemon_id)
+    else:
+        summaries = index.for_location_areas(location_area_ids)
+
+    # Merging isn't free; only do it once per row
+    merged_rows = {}
+    def row(kind, id):
+        key = kind, id
+        if key not in merged_rows:
+            merged_rows[key] = pokedex_session.merge(index.rows[kind][id],
+                                                     load=False)
+        return merged_rows[key]
+
+    return [
+        (
+            summary,
+            row('pokemon', summary.pokemon_id),
+            row('version', summary.version_id),
+            row('location_area', summary.location_area_id),
+            row('terrain', summary.terrain_id),
+            tuple(row('condition_value', id)
+                  for id in summary.condition_value_ids),
+        )
+        for summary in summaries
+    ]
+
+def nature_example_ids(nature):
+    """Returns the ids of the Pokémon that make good examples for the given
+    nature.  See `StatSpreadIndex`.
+    """
+    return reference_data.stat_spreads.nature_examples(
+        nature.increased_stat_id, nature.decreased_stat_id)
+
+def stat_spread_ids(best_stat_id=None, worst_stat_id=None):
+    """Returns the ids of the Pokémon whose best and worst stats, other than
+    HP, are the given ones.  See `StatSpreadIndex`.
+    """
+    return reference_data.stat_spreads.matching(best_stat_id, worst_stat_id)
+
+def pokemon_columns():
+    """Returns the `PokemonColumns` the Pokémon search runs against."""
+    return reference_data.pokemon_columns
+
+def move_learner_index():
+    """Returns the `MoveLearnerIndex` for the Pokémon search's move filter."""
+    return reference_data.move_learner_index
+
+def reference_row(key):
+    """Returns one of the rows listed in `reference_rows`."""
+    return pokedex_session.merge(reference_data.rows[key], load=False)
+
 
 # Quick access to a few database objects
 def get_by_name_query(table, name):
@@ -43,6 +686,10 @@ def get_by_name_query(table, name):
 
     Don't use this for Pokémon!  Use `pokemon()`, as it knows about forms.
     """
+    ids = reference_data.name_index.get(table, {}).get(name.lower())
+    if ids:
+        return pokedex_session.query(table).filter(table.id.in_(ids))
+
     q = pokedex_session.query(table).filter(func.lower(table.name)
                                             == name.lower())
 
@@ -58,6 +705,12 @@ def get_by_name(table, name):
 def pokemon_query(name, form=None):
     """Returns a query that will look for the named Pokémon."""
 
+    ids = reference_data.name_index[tables.Pokemon].get(
+        (name.lower(), form or None))
+    if ids:
+        return pokedex_session.query(tables.Pokemon) \
+                              .filter(tables.Pokemon.id.in_(ids))
+
     # Force case-insensitive matching the heavy-handed way
     q = pokedex_session.query(tables.Pokemon) \
                        .filter(func.lower(tables.Pokemon.name) == name.lower())
@@ -81,7 +734,166 @@ def pokemon(name, form=None):
     # If this raises because the data is bogus, it's the caller's fault
     return pokemon_query(name, form).one()
 
+# Link targets that aren't in `ReferenceData.link_targets`, but were found
+# by querying anyway
+link_target_cache = caching.register('link_targets', caching.LRUCache(1000))
+
+def link_target(table, name):
+    """Returns the display name and URL for a markdown link to the named row
+    in `table`.  Raises `NoResultFound` if there's no such thing.
+    """
+    key = table, name.lower()
+    target = reference_data.link_targets.get(key)
+    if target:
+        return target
+
+    target = link_target_cache.get(key)
+    if target:
+        return target
+
+    if table is tables.Pokemon:
+        obj = pokemon_query(name).one()
+        target = obj.full_name, pokedex_helpers.make_thingy_url(obj)
+    else:
+        obj = get_by_name_query(table, name).one()
+        target = obj.name, pokedex_helpers.make_thingy_url(obj)
+
+    link_target_cache.set(key, target)
+    return target
+
+def lookup_many(names, valid_types=[]):
+    """Like `pokedex_lookup.lookup()`, but for a lot of names at once.
+    Returns a list of lists of `LookupResult`s, one list per name.
+
+    Plain names are found in `pokedex_suggestions`, and the rows for all of
+    them are fetched with one query per table.  Anything fancier, like a
+    typo or a wildcard, goes through the real lookup.
+    """
+    matches = [pokedex_suggestions.exact_lookup(name, valid_types)
+               for name in names]
+
+    ids_by_table = defaultdict(set)
+    for suggestions in matches:
+        for suggestion in suggestions:
+            ids_by_table[suggestion.table].add(suggestion.row_id)
+
+    rows = {}
+    for table in named_tables:
+        ids = ids_by_table.get(table.__tablename__)
+        if not ids:
+            continue
+        for row in pokedex_session.query(table).filter(table.id.in_(ids)):
+            rows[table.__tablename__, row.id] = row
+
+    results = []
+    for name, suggestions in zip(names, matches):
+        if not suggestions:
+            results.append(pokedex_lookup.lookup(name, valid_types=valid_types))
+            continue
+
+        results.append([
+            pokedex.lookup.LookupResult(
+                object=rows[suggestion.table, suggestion.row_id],
+                indexed_name=suggestion.key,
+                name=suggestion.name,
+                language=suggestion.language,
+                iso639=suggestion.iso639,
+                iso3166=suggestion.iso3166,
+                exact=True,
+            )
+            for suggestion in suggestions
+        ])
+
+    return results
+
+# Evolution tables, built once per chain and shared by every member
+evolution_table_cache = caching.register(
+    'evolution_tables', caching.LRUCache(1000))
+
+def evolution_table(evolution_chain_id):
+    """Returns the table from `splinext.pokedex.evolution.evolution_table()`
+    for the given chain, with the Pokémon merged into the current session.
+    """
+    table = evolution_table_cache.get(evolution_chain_id)
+    if table is None:
+        session = pokedex_session.session_factory()
+        try:
+            family = session.query(tables.Pokemon) \
+                .filter_by(evolution_chain_id=evolution_chain_id) \
+                .options(
+                    eagerload_all('parent_evolution.trigger'),
+                    eagerload_all('parent_evolution.trigger_item'),
+                    eagerload_all('parent_evolution.held_item'),
+                    eagerload_all('parent_evolution.location'),
+                    eagerload_all('parent_evolution.known_move'),
+                    eagerload_all('parent_evolution.party_pokemon'),
+                ) \
+                .all()
+            table = build_evolution_table(family)
+        finally:
+            # Closing expunges everything, leaving the loaded rows detached
+            session.close()
+
+        evolution_table_cache.set(evolution_chain_id, table)
+
+    # Copy the nodes, so nobody gets their hands on the cached ones
+    return [
+        [
+            dict(node, pokemon=pokedex_session.merge(node['pokemon'],
+                                                     load=False))
+            if node else node
+            for node in row
+        ]
+        for row in table
+    ]
+
 def generation(id):
-    return pokedex_session.query(tables.Generation).get(id)
+    for row in reference_data.generations:
+        if row.id == id:
+            return pokedex_session.merge(row, load=False)
+    return None
 def version(name):
     return pokedex_session.query(tables.Version).filter_by(name=name).one()
+
+# Learner tables for move pages, built once per move
+move_learners_cache = caching.register(
+    'move_learners', caching.LRUCache(200))
+
+def move_learners(move_id):
+    """Returns the `LearnerTable` of every Pokémon that learns the given
+    move.  Machine numbers come joined in, so nothing else needs loading.
+    """
+    table = move_learners_cache.get(move_id)
+    if table is None:
+        session = pokedex_session.session_factory()
+        try:
+            q = session.query(
+                    tables.PokemonMove.pokemon_id,
+                    tables.Pokemon.forme_base_pokemon_id,
+                    tables.Pokemon.forme_name,
+                    tables.PokemonMove.version_group_id,
+                    tables.PokemonMoveMethod.id,
+                    tables.PokemonMoveMethod.name,
+                    tables.PokemonMove.level,
+                    tables.Machine.machine_number,
+                ) \
+                .join(tables.PokemonMove.pokemon) \
+                .join(tables.PokemonMove.method) \
+                .outerjoin((tables.Machine, tables.PokemonMove.machine)) \
+                .filter(tables.PokemonMove.move_id == move_id)
+
+            # A form's national id is its base form's id
+            table = LearnerTable(
+                (pokemon_id, forme_base_pokemon_id or pokemon_id, forme_name,
+                 version_group_id, method_id, method_name, level,
+                 machine_number)
+                for pokemon_id, forme_base_pokemon_id, forme_name,
+                    version_group_id, method_id, method_name, level,
+                    machine_number in q
+            )
+        finally:
+            session.close()
+
+        move_learners_cache.set(move_id, table)
+
+    return table
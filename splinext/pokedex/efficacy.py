@@ -0,0 +1,134 @@
+# encoding: utf8
+u"""Type efficacy, worked out once for every type and pair of types."""
+from __future__ import absolute_import, division
+
+from operator import itemgetter
+
+# Relative score for a damage factor, as shown on the type chart.  Normal
+# damage counts for 0; super effective counts for +1; not very effective
+# counts for -1.  Ineffective counts for -2.  With dual types, x4 is +2 and
+# x1/4 is -2; ineffective is -4.  Everything is of course the other way
+# around for defense.
+attacking_score_conversion = {
+    400: +2,
+    200: +1,
+    100:  0,
+     50: -1,
+     25: -2,
+      0: -2,
+}
+dual_type_attacking_score_conversion = dict(attacking_score_conversion)
+dual_type_attacking_score_conversion[0] = -4
+
+class TypeEfficacyMatrix(object):
+    u"""Damage factors, as percentages, for every attacking type against every
+    defending type, in a dense table.
+
+    `types` is a list of (id, name) for every type.  `efficacies` is a list
+    of (damage type id, target type id, damage factor); pairs with no
+    efficacy are simply missing from everything below.
+
+    On top of the table, this has the defensive row for every single type
+    and pair of types, and the type chart and its scores with every choice
+    of secondary type.
+    """
+
+    def __init__(self, types, efficacies):
+        self.type_ids = [id for id, name in sorted(types)]
+        self.positions = dict((id, i) for i, id in enumerate(self.type_ids))
+        # Type chart order
+        self.type_ids_by_name = [id for id, name
+                                 in sorted(types, key=itemgetter(1))]
+
+        # factors[attacking][defending], by position; None for no efficacy
+        size = len(self.type_ids)
+        self.factors = [[None] * size for _ in range(size)]
+        for damage_type_id, target_type_id, damage_factor in efficacies:
+            self.factors[self.positions[damage_type_id]] \
+                        [self.positions[target_type_id]] = damage_factor
+
+        self.defending_rows = {}
+        for i, first_id in enumerate(self.type_ids):
+            self.defending_rows[first_id,] \
+                = self._defending_row([first_id])
+            for second_id in self.type_ids[i + 1:]:
+                self.defending_rows[first_id, second_id] \
+                    = self._defending_row([first_id, second_id])
+
+        # Keyed by secondary type id, or None for no secondary type
+        self.charts = {}
+        self.attacking_scores = {}
+        self.defending_scores = {}
+        for secondary_id in [None] + self.type_ids:
+            self._score(secondary_id)
+
+    def attacking_row(self, type_id):
+        u"""Returns a dict of target type id => damage factor for moves of the
+        given type.
+        """
+        row = self.factors[self.positions[type_id]]
+        return dict(
+            (target_type_id, row[i])
+            for i, target_type_id in enumerate(self.type_ids)
+            if row[i] is not None
+        )
+
+    def defending_row(self, type_ids):
+        u"""Returns a dict of damage type id => damage factor against a
+        Pokémon with the given types.
+        """
+        key = tuple(sorted(type_ids))
+        if key not in self.defending_rows:
+            return self._defending_row(key)
+        return self.defending_rows[key]
+
+    def _defending_row(self, type_ids):
+        row = {}
+        for target_type_id in type_ids:
+            target = self.positions[target_type_id]
+            for damage_type_id in self.type_ids:
+                factor = self.factors[self.positions[damage_type_id]][target]
+                if factor is None:
+                    continue
+
+                # Every damage factor is a percentage.  Dividing by 100 each
+                # time turns the damage factor into a percentage taken of
+                # the starting 100, without using floats and regardless of
+                # number of types
+                row[damage_type_id] = \
+                    row.get(damage_type_id, 100) * factor // 100
+        return row
+
+    def _score(self, secondary_id):
+        u"""Fills in the type chart and the scores, given a secondary type."""
+        if secondary_id is None:
+            conversion = attacking_score_conversion
+            secondary_row = None
+        else:
+            conversion = dual_type_attacking_score_conversion
+            secondary_row = self.defending_row([secondary_id])
+
+        chart = {}
+        attacking_scores = dict((id, 0) for id in self.type_ids)
+        defending_scores = dict((id, 0) for id in self.type_ids)
+        for attacking_id in self.type_ids:
+            if secondary_row is None:
+                secondary_factor = 100
+            else:
+                secondary_factor = secondary_row.get(attacking_id, 100)
+
+            row = self.factors[self.positions[attacking_id]]
+            chart[attacking_id] = chart_row = []
+            for defending_id in self.type_ids_by_name:
+                factor = row[self.positions[defending_id]]
+                if factor is None:
+                    continue
+                factor = factor * secondary_factor // 100
+
+                chart_row.append(factor)
+                attacking_scores[attacking_id] += conversion[factor]
+                defending_scores[defending_id] -= conversion[factor]
+
+        self.charts[secondary_id] = chart
+        self.attacking_scores[secondary_id] = attacking_scores
+        self.defending_scores[secondary_id] = defending_scores
@@ -0,0 +1,88 @@
+# encoding: utf8
+u"""Wild encounters, folded down ahead of time.
+
+The encounter table has a row per slot per condition per area per game, and
+the pages that show encounters only ever care about the totals: how likely a
+Pokémon is to appear, and at what levels, in one area of one game with one
+set of conditions.  `EncounterIndex` has those totals for every Pokémon and
+every area.
+"""
+from __future__ import absolute_import, division
+
+from collections import namedtuple
+
+# Totals for one (pokemon, version, area, terrain, condition values).  `levels`
+# is a list of (min level, max level, rarity), one per distinct level range,
+# in the order they were first seen.  `rarity`, `min_level` and `max_level`
+# are for all of them together
+EncounterSummary = namedtuple('EncounterSummary', [
+    'pokemon_id', 'version_id', 'location_area_id', 'terrain_id',
+    'condition_value_ids', 'levels', 'rarity', 'min_level', 'max_level',
+])
+
+def summarize_encounters(encounters):
+    u"""Folds raw encounters into a list of `EncounterSummary`s, in the order
+    each group was first seen.
+
+    `encounters` is an iterable of (pokemon id, version id, location area id,
+    terrain id, condition value ids, min level, max level, rarity).  The
+    order of the condition value ids doesn't matter.
+    """
+    keys = []
+    levels_by_key = {}
+    for pokemon_id, version_id, location_area_id, terrain_id, \
+        condition_value_ids, min_level, max_level, rarity in encounters:
+
+        key = (pokemon_id, version_id, location_area_id, terrain_id,
+               tuple(sorted(condition_value_ids)))
+        if key not in levels_by_key:
+            keys.append(key)
+            levels_by_key[key] = {}, []
+        positions, levels = levels_by_key[key]
+
+        # Combine "level 3-4, 50%" and "level 3-4, 20%" into "level 3-4, 70%"
+        level_range = min_level, max_level
+        if level_range in positions:
+            i = positions[level_range]
+            levels[i] = min_level, max_level, levels[i][2] + rarity
+        else:
+            positions[level_range] = len(levels)
+            levels.append((min_level, max_level, rarity))
+
+    summaries = []
+    for key in keys:
+        levels = levels_by_key[key][1]
+        summaries.append(EncounterSummary(*key + (
+            levels,
+            sum(rarity for min_level, max_level, rarity in levels),
+            min(min_level for min_level, max_level, rarity in levels),
+            max(max_level for min_level, max_level, rarity in levels),
+        )))
+    return summaries
+
+class EncounterIndex(object):
+    u"""Every `EncounterSummary`, filed by Pokémon and by location area.
+
+    `rows` maps the names 'pokemon', 'version', 'location_area', 'terrain'
+    and 'condition_value' to dicts of id => row, for everything the summaries
+    refer to; they're kept here so the pages needn't fetch them again.
+    """
+
+    def __init__(self, summaries, rows):
+        self.rows = rows
+        self.by_pokemon = {}
+        self.by_location_area = {}
+        for summary in summaries:
+            self.by_pokemon.setdefault(summary.pokemon_id, []) \
+                .append(summary)
+            self.by_location_area.setdefault(summary.location_area_id, []) \
+                .append(summary)
+
+    def for_pokemon(self, pokemon_id):
+        return self.by_pokemon.get(pokemon_id, [])
+
+    def for_location_areas(self, location_area_ids):
+        summaries = []
+        for location_area_id in location_area_ids:
+            summaries.extend(self.by_location_area.get(location_area_id, []))
+        return summaries
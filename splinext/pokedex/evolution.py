@@ -0,0 +1,76 @@
+# encoding: utf8
+u"""Lays out evolution chains as tables."""
+from __future__ import absolute_import, division
+
+def evolution_table(family):
+    u"""Returns the evolution table for a family of Pokémon, as a list of
+    rows.
+
+    Each row is a physical row in the resulting table, and contains four
+    elements, one per column: Baby, Base, Stage 1, Stage 2.  The Pokémon are
+    actually dictionaries with 'pokemon' and 'span' keys, where the span is
+    used as the HTML cell's rowspan -- e.g., Eevee has a total of seven
+    descendents, so it would need to span 7 rows.  An empty string is an empty
+    cell, and None means the cell is covered by a tall cell from an earlier
+    row.
+    """
+    # Every leaf gets a row.  Sort by id, then by forme if any.  This keeps
+    # evolutions in about the order people expect, while clustering formes
+    # together.
+    parents = set()
+    for pokemon in family:
+        if pokemon.parent_pokemon:
+            parents.add(pokemon.parent_pokemon)
+    leaves = [pokemon for pokemon in family if pokemon not in parents]
+    leaves.sort(key=lambda x: (x.national_id, x.forme_name))
+
+    # Build each leaf's path going back up to its root, sticking it to a node
+    # seen on an earlier path if there is one
+    table = []
+    seen_nodes = {}
+    for leaf in leaves:
+        # root, parent_n, ... parent2, parent1, leaf
+        current_path = []
+
+        current_pokemon = leaf
+        while current_pokemon:
+            # The loop bails just after current_pokemon is no longer the root,
+            # so this will give us the root after the loop ends; we need to
+            # know if it's a baby to see whether to indent the entire table
+            root_pokemon = current_pokemon
+
+            if current_pokemon in seen_nodes:
+                current_node = seen_nodes[current_pokemon]
+                # Don't need to repeat this node; the first instance will
+                # have a rowspan
+                current_path.append(None)
+            else:
+                current_node = {
+                    'pokemon': current_pokemon,
+                    'span':    0,
+                }
+                current_path.append(current_node)
+                seen_nodes[current_pokemon] = current_node
+
+            # This node has one more row to span: our current leaf
+            current_node['span'] += 1
+
+            current_pokemon = current_pokemon.parent_pokemon
+
+        current_path.reverse()
+
+        # We want every path to have four nodes: baby, basic, stage 1 and 2.
+        # Every root node is basic, unless it's defined as being a baby.  So
+        # first, add an empty baby node at the beginning if this is not a
+        # baby.
+        # We use an empty string to indicate an empty cell, as opposed to a
+        # complete lack of cell due to a tall cell from an earlier row.
+        if not root_pokemon.is_baby:
+            current_path.insert(0, '')
+        # Now pad to four if necessary.
+        while len(current_path) < 4:
+            current_path.append('')
+
+        table.append(current_path)
+
+    return table
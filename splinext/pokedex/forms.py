@@ -1,6 +1,8 @@
 # encoding: utf8
 """Useful form fields of my own devising."""
 
+from bisect import bisect_left, bisect_right
+from numbers import Integral
 import re
 
 from sqlalchemy.sql import and_, or_
@@ -68,33 +70,111 @@ class PokedexLookupField(fields.TextField):
             return self.data.name
 
 
+def _adjacent(a, b):
+    """Returns whether a and b are whole numbers with none between them."""
+    return isinstance(a, Integral) and isinstance(b, Integral) and b == a + 1
+
 class RangeQueryEvaluator(object):
     """Turns a list of values and (min, max) tuples into a query filter
-    statement.
+    statement, or checks Python values against them directly.
+
+    The partitions are merged into `intervals`, a sorted list of disjoint
+    (min, max) tuples, either of which may be None for no bound.  So "1-10,
+    5-20, 30+" becomes [(1, 20), (30, None)].  Whole numbers with nothing
+    between them merge too, so "1-10, 11-20" becomes [(1, 20)].
     """
     def __init__(self, partitions):
         self.partitions = partitions
 
-    def __call__(self, column):
-        clauses = []
-        for thing in self.partitions:
+        bounds = []
+        for thing in partitions:
             if isinstance(thing, tuple):
-                a, b = thing
-                if a is None:
-                    # -b
-                    clauses.append(column <= b)
-                elif b is None:
-                    # a+
-                    clauses.append(column >= a)
-                else:
-                    # a-b
-                    clauses.append(column.between(a, b))
+                bounds.append(thing)
             else:
+                bounds.append((thing, thing))
+
+        # Sort by lower bound, with no bound first, then merge anything that
+        # overlaps or touches
+        bounds.sort(key=lambda bound: (bound[0] is not None, bound[0]))
+        self.intervals = []
+        for a, b in bounds:
+            if self.intervals:
+                last_a, last_b = self.intervals[-1]
+                if last_b is None:
+                    # Already open-ended; swallows everything after
+                    continue
+                if a is None or a <= last_b or _adjacent(last_b, a):
+                    if b is None or b > last_b:
+                        self.intervals[-1] = last_a, b
+                    continue
+            self.intervals.append((a, b))
+
+        # Lower bounds, for bisecting
+        self._starts = [a for a, b in self.intervals]
+
+    def __call__(self, column):
+        clauses = []
+        for a, b in self.intervals:
+            if a is None and b is None:
+                # Anything at all, as long as it's not NULL
+                clauses.append(column != None)
+            elif a is None:
+                # -b
+                clauses.append(column <= b)
+            elif b is None:
+                # a+
+                clauses.append(column >= a)
+            elif a == b:
                 # a
-                clauses.append(column == thing)
+                clauses.append(column == a)
+            else:
+                # a-b
+                clauses.append(column.between(a, b))
 
+        if len(clauses) == 1:
+            return clauses[0]
         return or_(*clauses)
 
+    def contains(self, value):
+        """Same as the query filter, but checks a single Python value.  None
+        is never in range, just as NULL isn't in SQL.
+        """
+        if value is None or not self.intervals:
+            return False
+
+        # Find the last interval that starts at or before the value
+        i = len(self.intervals)
+        if self._starts[0] is not None:
+            i = bisect_right(self._starts, value)
+        elif len(self.intervals) > 1:
+            i = bisect_right(self._starts, value, 1)
+        if i == 0:
+            return False
+
+        b = self.intervals[i - 1][1]
+        return b is None or value <= b
+
+    def slices(self, values):
+        """Given a sorted list of values, returns a list of (start, stop)
+        index pairs, such that `values[start:stop]` are all in range and
+        together are everything in range.  No values can be None.
+        """
+        slices = []
+        for a, b in self.intervals:
+            if a is None:
+                start = 0
+            else:
+                start = bisect_left(values, a)
+
+            if b is None:
+                stop = len(values)
+            else:
+                stop = bisect_right(values, b)
+
+            if start < stop:
+                slices.append((start, stop))
+        return slices
+
 class RangeTextField(fields.TextField):
     """Parses a string of the form 'a, b, c-e'.
 
@@ -49,6 +49,16 @@ def make_thingy_url(thingy, subpage=None):
                name=thingy.name.lower(),
                **args)
 
+def suggestion_corpus(suggestions):
+    u"""Returns the downloadable `SuggestionCorpus` for the given
+    `SuggestionIndex` (normally `db.pokedex_suggestions`), with image and flag
+    URLs filled in.
+    """
+    return suggestions.corpus(
+        image_url=lambda path: url(controller='dex', action='media', path=path),
+        flag_url=lambda path: h.static_uri('spline', path),
+    )
+
 def render_flavor_text(flavor_text, literal=False):
     """Makes flavor text suitable for HTML presentation.
 
@@ -1,5 +1,6 @@
 # encoding: utf8
 
+from pylons.i18n import get_lang
 from spline.lib.i18n import BaseTranslator
 from pokedex.db import markdown
 
@@ -16,3 +17,10 @@ class DexTranslator(BaseTranslator):
             return markdown.MarkdownString(self(unicode(message)))
         else:
             return super(DexTranslator, self).__call__(message, *args, **kwargs)
+
+def current_language():
+    u"""Returns the languages the current request is being translated into,
+    as a tuple, for keying caches of anything rendered with translations.
+    Only works during a request.
+    """
+    return tuple(get_lang() or ())
@@ -0,0 +1,233 @@
+# encoding: utf8
+u"""Small in-memory indexes over Pokédex data that never changes while the
+site is running.  These are built once from the database by
+`splinext.pokedex.db.ReferenceData` and answer questions that would otherwise
+take a handful of queries per page.
+"""
+from __future__ import absolute_import, division
+
+from bisect import bisect_left, bisect_right
+
+class PercentileIndex(object):
+    u"""Sorted list of numbers that can tell where a value falls among them.
+
+    Ties count for half, so the median value of an odd-length list is exactly
+    at the 50th percentile.
+    """
+
+    def __init__(self, values):
+        self.values = sorted(values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def percentile(self, value):
+        """Returns the fraction of values below `value`, from 0 to 1."""
+        less = bisect_left(self.values, value)
+        equal = bisect_right(self.values, value) - less
+        return (less + equal * 0.5) / len(self.values)
+
+class NeighborRing(object):
+    u"""Arranges things in a circle by id, so every one of them has a previous
+    and a next, even at the ends.  The ids needn't be contiguous.
+    """
+
+    def __init__(self, items, key):
+        self.items = sorted(items, key=key)
+        self.keys = [key(item) for item in self.items]
+
+    def neighbors(self, id):
+        """Returns the items just before and after the given id.  The id
+        doesn't have to belong to anything in the ring.
+        """
+        left = bisect_left(self.keys, id)
+        right = bisect_right(self.keys, id)
+        return self.items[left - 1], self.items[right % len(self.items)]
+
+class BreedingIndex(object):
+    u"""Works out who can breed with whom, from every Pokémon's egg groups
+    and evolution parent.
+
+    `pokemon` is an iterable of (id, evolution chain id, gender rate, egg group
+    ids, parent id, base form id) tuples, one per Pokémon and form.  Parent id
+    is None for a Pokémon that doesn't evolve from anything; base form id is
+    None for anything that isn't an alternate form.
+
+    Like the Pokémon page always has, this assumes that every base form in a
+    breedable family can breed, and that every family has the same egg groups
+    throughout.
+    """
+
+    ditto_group_id = 13
+    no_eggs_group_id = 15
+
+    def __init__(self, pokemon):
+        self.rows = sorted(pokemon)
+        self.pokemon = dict((row[0], row) for row in self.rows)
+
+        # The base form of a family is either a breedable Pokémon with no
+        # parent, or a breedable Pokémon whose parent is an unbreedable baby
+        # with no parent of its own
+        self.families_by_egg_group = {}
+        for id, chain_id, gender_rate, egg_group_ids, parent_id, base_id \
+            in self.rows:
+
+            if gender_rate == -1 or base_id is not None \
+                or self.no_eggs_group_id in egg_group_ids:
+                continue
+
+            if parent_id is not None:
+                parent = self.pokemon[parent_id]
+                if self.no_eggs_group_id not in parent[3] \
+                    or parent[4] is not None:
+                    continue
+
+            for egg_group_id in egg_group_ids:
+                self.families_by_egg_group.setdefault(egg_group_id, set()) \
+                    .add(id)
+
+        # Every set of egg groups that actually occurs, answered in advance
+        self.families_by_egg_groups = {}
+        for row in self.rows:
+            key = frozenset(row[3])
+            if key not in self.families_by_egg_groups:
+                self.families_by_egg_groups[key] = self._families(key)
+
+    def _families(self, egg_group_ids):
+        family_ids = set()
+        for egg_group_id in egg_group_ids:
+            family_ids.update(self.families_by_egg_group.get(egg_group_id, ()))
+        return sorted(family_ids)
+
+    def compatible_families(self, egg_group_ids):
+        u"""Returns the ids of the base forms of every family with at least
+        one of the given egg groups, in order.
+        """
+        key = frozenset(egg_group_ids)
+        if key in self.families_by_egg_groups:
+            return self.families_by_egg_groups[key]
+        return self._families(key)
+
+    def partners(self, pokemon_id):
+        u"""Returns the ids of every Pokémon and form that can breed with the
+        given one, in order.
+
+        Ditto can breed with anything breedable but another Ditto; genderless
+        Pokémon can only breed with Ditto; everything else can breed with
+        Ditto or with any breedable member of a compatible family, as long as
+        one of them can be male and the other female.
+        """
+        _, _, gender_rate, egg_group_ids, _, _ = self.pokemon[pokemon_id]
+
+        if self.no_eggs_group_id in egg_group_ids:
+            return []
+
+        partner_ids = []
+        if self.ditto_group_id in egg_group_ids:
+            for id, _, _, other_egg_group_ids, _, _ \
+                in self.rows:
+
+                if self.ditto_group_id not in other_egg_group_ids \
+                    and self.no_eggs_group_id not in other_egg_group_ids:
+                    partner_ids.append(id)
+            return partner_ids
+
+        if gender_rate == -1:
+            chain_ids = set()
+        else:
+            chain_ids = set(
+                self.pokemon[family_id][1]
+                for family_id in self.compatible_families(egg_group_ids)
+            )
+
+        for id, chain_id, other_gender_rate, other_egg_group_ids, _, _ \
+            in self.rows:
+
+            if self.ditto_group_id in other_egg_group_ids:
+                partner_ids.append(id)
+            elif chain_id in chain_ids and other_gender_rate != -1 \
+                and self.no_eggs_group_id not in other_egg_group_ids \
+                and not gender_rate == other_gender_rate == 0 \
+                and not gender_rate == other_gender_rate == 8:
+                # Rates are eighths female, so 0 is all male and 8 all female
+                partner_ids.append(id)
+        return partner_ids
+
+class StatSpreadIndex(object):
+    u"""Every Pokémon's best and worst stats, and how far apart they are.
+
+    `pokemon_stats` is an iterable of (pokemon id, stat id, base stat).  Leave
+    HP out; it doesn't count.  Ties count too, so a Pokémon whose two best
+    stats are equal has two best stats.
+    """
+
+    # Best and worst stats this close together make a Pokémon balanced
+    neutral_spread = 10
+
+    def __init__(self, pokemon_stats):
+        stats_by_pokemon = {}
+        for pokemon_id, stat_id, base_stat in pokemon_stats:
+            stats_by_pokemon.setdefault(pokemon_id, []) \
+                .append((base_stat, stat_id))
+
+        # pokemon id => (best stat ids, worst stat ids, spread)
+        self.spreads = {}
+        self.by_best_stat = {}
+        self.by_worst_stat = {}
+        # (best stat id, worst stat id) => ids of Pokémon with a wide spread
+        self.by_best_and_worst_stat = {}
+        self.neutral = []
+
+        for pokemon_id in sorted(stats_by_pokemon):
+            stats = stats_by_pokemon[pokemon_id]
+            best = max(stats)[0]
+            worst = min(stats)[0]
+            best_stat_ids = frozenset(
+                stat_id for base_stat, stat_id in stats if base_stat == best)
+            worst_stat_ids = frozenset(
+                stat_id for base_stat, stat_id in stats if base_stat == worst)
+            spread = best - worst
+
+            self.spreads[pokemon_id] = best_stat_ids, worst_stat_ids, spread
+            for stat_id in best_stat_ids:
+                self.by_best_stat.setdefault(stat_id, []).append(pokemon_id)
+            for stat_id in worst_stat_ids:
+                self.by_worst_stat.setdefault(stat_id, []).append(pokemon_id)
+
+            if spread <= self.neutral_spread:
+                self.neutral.append(pokemon_id)
+                continue
+            for best_stat_id in best_stat_ids:
+                for worst_stat_id in worst_stat_ids:
+                    self.by_best_and_worst_stat.setdefault(
+                        (best_stat_id, worst_stat_id), []).append(pokemon_id)
+
+    def nature_examples(self, increased_stat_id, decreased_stat_id):
+        u"""Returns the ids of the Pokémon that make good examples for a
+        nature, in order.
+
+        These are the Pokémon whose best stat is increased and whose worst
+        stat is decreased, with a real difference between the two.  For a
+        neutral nature, it's the Pokémon whose stats are all about the same.
+        """
+        if increased_stat_id == decreased_stat_id:
+            return self.neutral
+        return self.by_best_and_worst_stat.get(
+            (increased_stat_id, decreased_stat_id), [])
+
+    def matching(self, best_stat_id=None, worst_stat_id=None):
+        u"""Returns the ids of the Pokémon with the given best and worst
+        stats, either of which may be None to not care, in order.
+        """
+        id_lists = []
+        if best_stat_id is not None:
+            id_lists.append(self.by_best_stat.get(best_stat_id, []))
+        if worst_stat_id is not None:
+            id_lists.append(self.by_worst_stat.get(worst_stat_id, []))
+
+        if not id_lists:
+            return sorted(self.spreads)
+        ids = set(id_lists[0])
+        for other_ids in id_lists[1:]:
+            ids.intersection_update(other_ids)
+        return sorted(ids)
@@ -0,0 +1,78 @@
+# encoding: utf8
+u"""The Pokémon that learn a move, as the table on the move's page: one row per
+Pokémon per method, with a level or TM number per version group.
+
+Everything here is ids, so a whole table is small enough to keep around, and
+only the Pokémon actually shown need to be loaded.
+"""
+from __future__ import absolute_import, division
+
+class LearnerTable(object):
+    u"""Every Pokémon that learns a move, grouped by method.
+
+    `rows` is an iterable of (pokemon id, national id, form name, version
+    group id, method id, method name, level, machine number); machine number
+    may be None.  Level-up rows get their level, keeping the lowest if
+    there's more than one; machine rows get their TM number.
+
+    `methods` is a list of (method id, [(pokemon id, {version group id:
+    data}), ...]), with the Pokémon in national dex order.  Methods are in
+    id order; rearranging them is up to the page.
+    """
+
+    def __init__(self, rows):
+        learners = {}
+        sort_keys = {}
+        for pokemon_id, national_id, forme_name, version_group_id, \
+            method_id, method_name, level, machine_number in rows:
+
+            sort_keys[pokemon_id] = national_id, forme_name
+            version_group_data = learners.setdefault(method_id, {}) \
+                                         .setdefault(pokemon_id, {})
+            data = version_group_data.setdefault(version_group_id, {})
+
+            if method_name == u'Level up':
+                # Level-ups need to know what level; the lowest is the most
+                # useful
+                if 'level' not in data or level < data['level']:
+                    data['level'] = level
+            elif method_name == u'Machine':
+                # TMs need to know their own TM number
+                if machine_number is not None:
+                    data['machine'] = machine_number
+
+        self.methods = []
+        for method_id in sorted(learners):
+            method_learners = sorted(learners[method_id].items(),
+                                     key=lambda item: sort_keys[item[0]])
+            self.methods.append((method_id, method_learners))
+
+    def __len__(self):
+        return sum(len(method_learners)
+                   for method_id, method_learners in self.methods)
+
+    def pokemon_ids(self):
+        u"""Returns the id of every Pokémon in the table."""
+        ids = set()
+        for method_id, method_learners in self.methods:
+            ids.update(pokemon_id for pokemon_id, data in method_learners)
+        return ids
+
+    def page(self, methods, start, stop):
+        u"""Returns rows `start` through `stop` of the table, counting down
+        through every method in the order of `methods`, a list of method ids.
+        The result is in the same form as `self.methods`, minus any methods
+        with no rows on the page.
+        """
+        learners_by_method = dict(self.methods)
+
+        page = []
+        offset = 0
+        for method_id in methods:
+            method_learners = learners_by_method.get(method_id, [])
+            rows = method_learners[max(start - offset, 0):
+                                   max(stop - offset, 0)]
+            if rows:
+                page.append((method_id, rows))
+            offset += len(method_learners)
+        return page
@@ -0,0 +1,315 @@
+# encoding: utf8
+u"""Lays out a Pokémon's moves as the table on its page: one row per move per
+run of version groups, with level-up moves and TMs kept in order within every
+version group.
+"""
+from __future__ import absolute_import, division
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+def _descends(sort, next_sort):
+    u"""Returns 1 if `next_sort` belongs before `sort`, otherwise 0."""
+    if sort is None or next_sort is None:
+        return 0
+    return int(sort > next_sort)
+
+class _Row(object):
+    u"""One row of a `LearnsetTable`, as a node in a linked list.  `label`
+    increases along the list, so two rows can be put in order without
+    counting their way there.
+    """
+    __slots__ = ('move', 'data', 'label', 'prev', 'next')
+
+    def __init__(self, move, data):
+        self.move = move
+        self.data = data
+        self.label = None
+        self.prev = None
+        self.next = None
+
+class LearnsetTable(object):
+    u"""Table of the moves a Pokémon learns by a single method, built one
+    PokemonMove at a time.
+
+    Each row is a move and a dict of version group => data, such as a level
+    or TM number.  A move gets a new row only when it can't share an existing
+    one.  If the data has a 'sort' key, the rows for each version group are
+    kept in that order, as for level-up moves and TMs.
+
+    Every row is also filed by move and by version group, in table order, so
+    finding where a new entry goes doesn't mean scanning the whole table.
+    Each version group's sort keys are kept alongside, and while they're in
+    order -- as they are unless entries arrive badly out of order -- rows are
+    placed by bisecting them.  The layout is exactly what scanning would give.
+    """
+
+    # Space between row labels; rows are relabeled if it runs out
+    label_gap = 1 << 16
+
+    def __init__(self):
+        self.head = None
+        self.tail = None
+        self.rows_by_version_group = defaultdict(list)
+        self.rows_by_move = defaultdict(list)
+        # version group => sorts of its rows, parallel to rows_by_version_group
+        self.sorts_by_version_group = defaultdict(list)
+        # version group => how many neighboring sorts are out of order
+        self.sort_descents = defaultdict(int)
+        # version group => highest sort so far
+        self.max_sort = {}
+
+    def rows(self):
+        u"""Returns the table as a list of (move, {version_group: data})."""
+        rows = []
+        row = self.head
+        while row:
+            rows.append((row.move, row.data))
+            row = row.next
+        return rows
+
+    def add(self, move, version_group, data):
+        u"""Adds a move learned in a version group to the table."""
+        # These are the rows our row must fit between, if any.  If the range
+        # is empty, there's no room for an existing row and we go first
+        lower_row = None
+        upper_row = None
+        empty_range = False
+        if 'sort' in data:
+            lower_row, upper_row, empty_range \
+                = self._bounds(version_group, data['sort'])
+
+        # Use an existing row for this move if there's a free one, moving it
+        # down into range if need be
+        row = None
+        if not empty_range:
+            row = self._reusable_row(move, version_group, lower_row, upper_row)
+        if row:
+            if lower_row and row.label < lower_row.label:
+                self._move_down(row, lower_row)
+            self._add_data(row, version_group, data)
+            return
+
+        # Otherwise, make a new row as early as possible, which leaves room
+        # for later entries of other moves to share rows
+        row = _Row(move, {})
+        self._link_after(row, lower_row)
+        self._file(self.rows_by_move[move], row)
+        self._add_data(row, version_group, data)
+
+    def _bounds(self, version_group, sort):
+        u"""Returns (lower row, upper row, empty range) for an entry with the
+        given sort in the given version group.
+
+        The lower row is the last row in the version group that sorts before
+        the entry.  The upper row is usually the first that sorts after it,
+        but if that's the very first row of the table, it's the second one
+        instead, or the range is empty if there's no second one.
+        """
+        rows = self.rows_by_version_group.get(version_group, [])
+
+        if self.sort_descents.get(version_group):
+            lower_row, higher_rows = self._scan_bounds(version_group, sort)
+        else:
+            sorts = self.sorts_by_version_group.get(version_group, [])
+            lower = bisect_left(sorts, sort)
+            higher = bisect_right(sorts, sort)
+            lower_row = rows[lower - 1] if lower else None
+            higher_rows = rows[higher:higher + 2]
+
+        upper_row = None
+        empty_range = False
+        if higher_rows:
+            if higher_rows[0] is not self.head:
+                upper_row = higher_rows[0]
+            elif len(higher_rows) > 1:
+                upper_row = higher_rows[1]
+            else:
+                empty_range = True
+
+        return lower_row, upper_row, empty_range
+
+    def _scan_bounds(self, version_group, sort):
+        u"""Returns (last row sorting before `sort`, [first two rows sorting
+        after it]) by walking the version group's rows, for when they're out
+        of order and can't be bisected.
+        """
+        rows = self.rows_by_version_group[version_group]
+
+        higher_rows = []
+        if self.max_sort[version_group] > sort:
+            for row in rows:
+                if row.data[version_group]['sort'] > sort:
+                    higher_rows.append(row)
+                    if len(higher_rows) == 2:
+                        break
+
+        lower_row = None
+        for row in reversed(rows):
+            if row.data[version_group]['sort'] < sort:
+                lower_row = row
+                break
+
+        return lower_row, higher_rows
+
+    def _reusable_row(self, move, version_group, lower_row, upper_row):
+        u"""Returns a row for `move` that doesn't have `version_group` yet and
+        can take it, or None.
+
+        The first such row after `lower_row` wins.  Failing that, the last one
+        before it will do, as long as no row between it and `upper_row` has a
+        version group in common with it; otherwise it couldn't be moved down.
+        """
+        candidates = [
+            row for row in self.rows_by_move.get(move, [])
+            if version_group not in row.data
+            and (upper_row is None or row.label < upper_row.label)
+        ]
+        if not candidates:
+            return None
+
+        for row in candidates:
+            if lower_row is None or row.label > lower_row.label:
+                return row
+
+        row = candidates[-1]
+        for other_version_group in row.data:
+            others = self.rows_by_version_group[other_version_group]
+            i = self._bisect_right(others, row.label)
+            if i < len(others) and \
+                (upper_row is None or others[i].label < upper_row.label):
+                return None
+        return row
+
+    def _move_down(self, row, lower_row):
+        u"""Moves `row` to just after the row following `lower_row`, or after
+        `lower_row` itself if that's the last row.
+        """
+        self._unfile(self.rows_by_move[row.move], row)
+        for version_group in row.data:
+            self._unfile_in_version_group(version_group, row)
+
+        self._unlink(row)
+        self._link_after(row, lower_row.next or lower_row)
+
+        self._file(self.rows_by_move[row.move], row)
+        for version_group in row.data:
+            self._file_in_version_group(version_group, row)
+
+    def _add_data(self, row, version_group, data):
+        row.data[version_group] = data
+        self._file_in_version_group(version_group, row)
+
+        if 'sort' in data:
+            if version_group not in self.max_sort \
+                or data['sort'] > self.max_sort[version_group]:
+                self.max_sort[version_group] = data['sort']
+
+    ### Ordered lists of rows
+
+    def _bisect_right(self, rows, label):
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if label < rows[mid].label:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def _file(self, rows, row):
+        rows.insert(self._bisect_right(rows, row.label), row)
+
+    def _unfile(self, rows, row):
+        del rows[self._bisect_right(rows, row.label) - 1]
+
+    def _file_in_version_group(self, version_group, row):
+        u"""Files `row` under `version_group`, keeping its sort alongside."""
+        rows = self.rows_by_version_group[version_group]
+        sorts = self.sorts_by_version_group[version_group]
+        i = self._bisect_right(rows, row.label)
+        sort = row.data[version_group].get('sort')
+
+        descents = 0
+        if 0 < i < len(sorts):
+            descents -= _descends(sorts[i - 1], sorts[i])
+        if i > 0:
+            descents += _descends(sorts[i - 1], sort)
+        if i < len(sorts):
+            descents += _descends(sort, sorts[i])
+        self.sort_descents[version_group] += descents
+
+        rows.insert(i, row)
+        sorts.insert(i, sort)
+
+    def _unfile_in_version_group(self, version_group, row):
+        rows = self.rows_by_version_group[version_group]
+        sorts = self.sorts_by_version_group[version_group]
+        i = self._bisect_right(rows, row.label) - 1
+
+        descents = 0
+        if i > 0:
+            descents -= _descends(sorts[i - 1], sorts[i])
+        if i + 1 < len(sorts):
+            descents -= _descends(sorts[i], sorts[i + 1])
+        if 0 < i < len(sorts) - 1:
+            descents += _descends(sorts[i - 1], sorts[i + 1])
+        self.sort_descents[version_group] += descents
+
+        del rows[i]
+        del sorts[i]
+
+    ### Linked list
+
+    def _link_after(self, row, prev_row):
+        u"""Links `row` into the table after `prev_row`, or first if that's
+        None, and gives it a label.
+        """
+        if prev_row is None:
+            next_row = self.head
+        else:
+            next_row = prev_row.next
+
+        if prev_row is None and next_row is None:
+            row.label = 0
+        elif prev_row is None:
+            row.label = next_row.label - self.label_gap
+        elif next_row is None:
+            row.label = prev_row.label + self.label_gap
+        else:
+            if next_row.label - prev_row.label < 2:
+                self._relabel()
+            row.label = (prev_row.label + next_row.label) // 2
+
+        row.prev = prev_row
+        row.next = next_row
+        if prev_row is None:
+            self.head = row
+        else:
+            prev_row.next = row
+        if next_row is None:
+            self.tail = row
+        else:
+            next_row.prev = row
+
+    def _unlink(self, row):
+        if row.prev is None:
+            self.head = row.next
+        else:
+            row.prev.next = row.next
+        if row.next is None:
+            self.tail = row.prev
+        else:
+            row.next.prev = row.prev
+        row.prev = row.next = None
+
+    def _relabel(self):
+        u"""Spreads the labels back out.  The order doesn't change, so the
+        filed lists stay sorted.
+        """
+        label = 0
+        row = self.head
+        while row:
+            row.label = label
+            label += self.label_gap
+            row = row.next
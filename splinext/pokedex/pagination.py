@@ -0,0 +1,75 @@
+# encoding: utf8
+u"""Splitting long lists of search results into pages.
+
+Pages are found by a cursor -- the id of the last result on the previous page
+-- rather than by number, so a link to the next page still picks up where the
+reader left off.  The results themselves are an ordered list of ids, which the
+search controller already has cached; only the ids on the current page ever
+get loaded from the database.
+"""
+from __future__ import absolute_import, division
+
+class ResultPage(object):
+    u"""One page of `ids`, an ordered list of result ids.
+
+    `after` is the id of the last result on the previous page, or None for the
+    first page; an id that isn't in the results also gets the first page.
+    Pages hold `page_size` results, except that if `groups` is given -- a list
+    of group keys parallel to `ids`, such as evolution chain ids -- a page
+    only ever ends between groups, and so may run a little long.
+
+    `ids` is then the ids on this page, `total` the number of results in all,
+    `number` the page's number counting from 1, and `page_count` the number
+    of pages.  `previous_after` and `next_after` are the cursors for the pages
+    on either side; `has_previous` and `has_next` say whether there are any.
+    """
+
+    def __init__(self, ids, page_size, after=None, groups=None):
+        self.total = len(ids)
+        self.page_size = page_size
+        self._groups = groups
+
+        start = 0
+        if after is not None:
+            try:
+                start = ids.index(after) + 1
+            except ValueError:
+                pass
+        if start >= self.total:
+            start = 0
+        end = self._page_end(start)
+        self.ids = ids[start:end]
+
+        # Walk the page boundaries from the top, to find out where this page
+        # falls and where the one before it starts
+        previous_start = None
+        self.number = 1
+        self.page_count = 0
+        boundary = 0
+        while boundary < self.total:
+            self.page_count += 1
+            if boundary < start:
+                previous_start = boundary
+                self.number += 1
+            boundary = self._page_end(boundary)
+
+        self.has_previous = start > 0
+        self.previous_after = None
+        if previous_start:
+            self.previous_after = ids[previous_start - 1]
+
+        self.has_next = end < self.total
+        self.next_after = None
+        if self.has_next:
+            self.next_after = ids[end - 1]
+
+    def _page_end(self, start):
+        u"""Returns the index just past the end of the page that starts at
+        `start`.
+        """
+        end = min(start + self.page_size, self.total)
+        groups = self._groups
+        if groups is not None:
+            while end < self.total and groups[end] == groups[end - 1]:
+                end += 1
+        return end
@@ -5,6 +5,8 @@ var pokedex_suggestions = {
     'request':          null,  // ajax request, for canceling
     'page_height':      8,     // number of elements pgup/pgdn should scroll
     'initialized':      false, // has initialize run?
+    'corpus':           null,  // every suggestion, once downloaded
+    'corpus_request':   null,  // ajax request for the above
 
     // Use a wrapper to set a small delay on the ajax request; otherwise we'll
     // ping the server after every keypress, even if the user wasn't finished
@@ -52,7 +54,7 @@ var pokedex_suggestions = {
 
         // Construct request URL
         var url = "/dex/suggest?prefix=" + encodeURIComponent(input);
-        var type;
+        var types = [];
 
         // Figure out and add type prefixes
         var classes = pokedex_suggestions.$lookup_element.attr('class')
@@ -61,9 +63,17 @@ var pokedex_suggestions = {
             var matches = value.match(/^js-dex-suggest-(\w+)$/);
             if (matches) {
                 url += ";type=" + matches[1];
+                types.push(matches[1]);
             }
         });
 
+        // Answer from the downloaded corpus if possible
+        var local_res = pokedex_suggestions.local_suggest(input, types);
+        if (local_res) {
+            pokedex_suggestions.show_results(el, local_res);
+            return;
+        }
+
         // Might be embedded from elsewhere...
         if (window.__veekun_url_prefix)
             url = window.__veekun_url_prefix + url;
@@ -79,63 +89,163 @@ var pokedex_suggestions = {
             },
             success: function(res) {
                 pokedex_suggestions.request = null;
-                if (res[0] != el.value) return;
-
-                // Clear the suggestion box
-                $suggest_box.children().remove();
-                $suggest_box.scrollTop(0);
-
-                var suggestions = res[1];
-                var normalized_input = res[5];
-                var len = normalized_input.length;
-                for (var i in suggestions) {
-                    var suggestion = suggestions[i];
-                    var metadata = res[4][i];
-
-                    var $suggestion_el = $('<li></li>');
-                    $suggestion_el.addClass('dex-suggestion-' + metadata.type);
-
-                    // Wrap whatever the user typed in bold/underlines
-                    var typed_index = metadata.indexed_name.toLowerCase()
-                                              .indexOf(normalized_input.toLowerCase());
-                    if (typed_index != -1) {
-                        var $typed_part = $('<span class="typed"></span>')
-                        $typed_part.text(suggestion.substr(typed_index, len));
-
-                        $suggestion_el.text(suggestion.substr(0, typed_index));
-                        $suggestion_el.append($typed_part);
-                        $suggestion_el.append(suggestion.substr(typed_index + len));
-                    }
-
-                    if (metadata.image) {
-                        $suggestion_el.css('background-image', "url(" + metadata.image + ")");
-                    }
-
-                    // Add country flag if not English
-                    if (metadata.language && metadata.language != 'us') {
-                        $suggestion_el.prepend('<img src="' + metadata.language_icon + '"'
-                                             + ' alt="[' + metadata.language + ']"> ');
-                    }
-
-                    // Give it a totally unambiguous lookup query, so if the
-                    // user presses Enter or clicks it, they'll never get a
-                    // disambig page
-                    $suggestion_el.data('dex-suggestion-unique',
-                        '@' + metadata.language + ',' + metadata.type + ':' + suggestion);
-
-                    $suggest_box.append($suggestion_el);
-                }
+                pokedex_suggestions.show_results(el, res);
+            }
+        });
+    },
 
-                if (suggestions.length) {
-                    $suggest_box.css('visibility', 'visible');
-                }
-                else {
-                    $suggest_box.css('visibility', 'hidden');
-                }
+    // Fill the suggestion box with a response from /dex/suggest, or
+    // something that looks just like one
+    'show_results': function(el, res) {
+        var $suggest_box = $('#dex-suggestions');
+        if (res[0] != el.value) return;
+
+        // Clear the suggestion box
+        $suggest_box.children().remove();
+        $suggest_box.scrollTop(0);
+
+        var suggestions = res[1];
+        var normalized_input = res[5];
+        var len = normalized_input.length;
+        for (var i in suggestions) {
+            var suggestion = suggestions[i];
+            var metadata = res[4][i];
+
+            var $suggestion_el = $('<li></li>');
+            $suggestion_el.addClass('dex-suggestion-' + metadata.type);
+
+            // Wrap whatever the user typed in bold/underlines
+            var typed_index = metadata.indexed_name.toLowerCase()
+                                      .indexOf(normalized_input.toLowerCase());
+            if (typed_index != -1) {
+                var $typed_part = $('<span class="typed"></span>')
+                $typed_part.text(suggestion.substr(typed_index, len));
+
+                $suggestion_el.text(suggestion.substr(0, typed_index));
+                $suggestion_el.append($typed_part);
+                $suggestion_el.append(suggestion.substr(typed_index + len));
+            }
+
+            if (metadata.image) {
+                $suggestion_el.css('background-image', "url(" + metadata.image + ")");
+            }
 
-                pokedex_suggestions.move_results();
+            // Add country flag if not English
+            if (metadata.language && metadata.language != 'us') {
+                $suggestion_el.prepend('<img src="' + metadata.language_icon + '"'
+                                     + ' alt="[' + metadata.language + ']"> ');
+            }
+
+            // Give it a totally unambiguous lookup query, so if the
+            // user presses Enter or clicks it, they'll never get a
+            // disambig page
+            $suggestion_el.data('dex-suggestion-unique',
+                '@' + metadata.language + ',' + metadata.type + ':' + suggestion);
+
+            $suggest_box.append($suggestion_el);
+        }
+
+        if (suggestions.length) {
+            $suggest_box.css('visibility', 'visible');
+        }
+        else {
+            $suggest_box.css('visibility', 'hidden');
+        }
+
+        pokedex_suggestions.move_results();
+    },
+
+    // Fetch the whole suggestion corpus, so later keystrokes don't need the
+    // server.  Only works on our own pages; embedded boxes keep using JSONP
+    'load_corpus': function() {
+        if (pokedex_suggestions.corpus || pokedex_suggestions.corpus_request)
+            return;
+        if (! window.pokedex_suggestion_corpus_url || window.__veekun_url_prefix)
+            return;
+
+        pokedex_suggestions.corpus_request = $.ajax({
+            type: "GET",
+            url: window.pokedex_suggestion_corpus_url,
+            dataType: "json",
+            cache: true,
+            success: function(corpus) {
+                pokedex_suggestions.corpus = corpus;
+            }
+        });
+    },
+
+    // Search the downloaded corpus the same way /dex/suggest would, and
+    // return a response in the same format.  Returns null if the corpus
+    // isn't here yet, or the input needs the server's name munging
+    'local_suggest': function(input, types) {
+        var corpus = pokedex_suggestions.corpus;
+        if (! corpus) return null;
+
+        var key = $.trim(input).toLowerCase();
+        var colon = key.indexOf(':');
+        if (colon != -1) {
+            types = types.concat([key.substr(0, colon)]);
+            key = key.substr(colon + 1);
+        }
+        // Plain letters and numbers normalize to themselves; anything else
+        // is best left to the server
+        if (! key.match(/^[a-z0-9]+$/)) return null;
+
+        var valid_types = {}, languages = {};
+        var any_types = false, any_languages = false;
+        $.each(types, function(index, type) {
+            if (type.charAt(0) == '@') {
+                languages[type.substr(1)] = true;
+                any_languages = true;
+            }
+            else {
+                valid_types[type] = true;
+                any_types = true;
             }
         });
+
+        // Binary search for the first key at or after the prefix
+        var entries = corpus.entries;
+        var lo = 0, hi = entries.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (entries[mid][0] < key) lo = mid + 1;
+            else hi = mid;
+        }
+
+        var english = [], foreign = [];
+        for (var i = lo; i < entries.length; i++) {
+            var entry = entries[i];
+            if (entry[0].substr(0, key.length) != key) break;
+
+            if (any_types && ! valid_types[entry[2]] && ! valid_types[entry[3]])
+                continue;
+            if (any_languages && ! languages[entry[7]])
+                continue;
+
+            if (entry[8]) {
+                foreign.push(entry);
+            }
+            else {
+                english.push(entry);
+                if (english.length >= corpus.max_results) break;
+            }
+        }
+
+        var names = [], metadata = [];
+        $.each(english.concat(foreign).slice(0, corpus.max_results), function(index, entry) {
+            names.push(entry[1]);
+            var meta = {
+                'type': entry[2],
+                'indexed_name': entry[0],
+                'language': entry[5],
+                'language_icon': entry[6]
+            };
+            if (entry[4]) meta.image = entry[4];
+            metadata.push(meta);
+        });
+
+        return [input, names, null, null, metadata, key];
     },
 
     // Handle keypresses in a suggest box.  Used to detect navigation keys and
@@ -320,6 +430,7 @@ var pokedex_suggestions = {
         // Attach events to all lookup boxes
         $(".js-dex-suggest")
             .attr("autocomplete", "off")
+            .focus(pokedex_suggestions.load_corpus)
             .keyup(pokedex_suggestions.change_wrapper)
             .keydown(pokedex_suggestions.keydown)
             .blur(function(){ window.setTimeout(pokedex_suggestions.hide, 10) });
@@ -0,0 +1,256 @@
+# encoding: utf8
+u"""In-memory index of every name the lookup knows about, for answering the
+suggestion box's prefix searches without a whoosh searcher or the database.
+"""
+from __future__ import absolute_import, division
+
+from bisect import bisect_left
+from collections import namedtuple
+import gzip
+import hashlib
+import json
+from StringIO import StringIO
+import threading
+
+import pokedex.db.tables as tables
+from sqlalchemy.orm import eagerload
+
+from splinext.pokedex import helpers as pokedex_helpers
+
+# One indexed name.  `key` is the normalized name, as whoosh stores it; `name`
+# is the display name.  `image` is a path under /dex/media, or None.  `flag` is
+# a path to the language's flag under spline's static files
+Suggestion = namedtuple('Suggestion', [
+    'key', 'name', 'type', 'table', 'row_id',
+    'language', 'iso639', 'iso3166', 'image', 'flag',
+])
+
+def suggestion_image(row):
+    u"""Returns the path under /dex/media of an image to accompany a row in
+    the suggestion box, or None.  Moves get their type; abilities get
+    nothing; everything else gets the obvious corresponding icon.
+    """
+    if isinstance(row, tables.Pokemon):
+        if row.forme_name:
+            return u"icons/{0}-{1}.png".format(row.national_id, row.forme_name)
+        else:
+            return u"icons/{0}.png".format(row.national_id)
+    elif isinstance(row, tables.Move):
+        return u"chrome/types/{0}.png".format(row.type.name)
+    elif isinstance(row, tables.Type):
+        return u"chrome/types/{0}.png".format(row.name)
+    elif isinstance(row, tables.Item):
+        return u"items/{0}.png".format(
+            pokedex_helpers.filename_from_name(row.name))
+    return None
+
+def build_suggestion_index(lookup, session, indexed_tables):
+    u"""Builds a `SuggestionIndex` from the stored fields of `lookup`'s whoosh
+    index.  Rows are fetched a whole table at a time, only to work out their
+    images.
+    """
+    tables_by_name = dict(
+        (table.__tablename__, table) for table in indexed_tables)
+
+    images = {}
+    for table in indexed_tables:
+        q = session.query(table)
+        if table is tables.Move:
+            q = q.options(eagerload('type'))
+        for row in q:
+            images[table.__tablename__, row.id] = suggestion_image(row)
+
+    suggestions = []
+    reader = lookup.index.reader()
+    try:
+        for record in reader.all_stored_fields():
+            table = tables_by_name.get(record['table'])
+            if not table:
+                continue
+            row_id = int(record['row_id'])
+
+            suggestions.append(Suggestion(
+                key=record['name'],
+                name=record['display_name'],
+                type=table.__singlename__,
+                table=table.__tablename__,
+                row_id=row_id,
+                language=record['language'],
+                iso639=record['iso639'],
+                iso3166=record['iso3166'],
+                image=images.get((table.__tablename__, row_id)),
+                flag=u'flags/{0}.png'.format(record['iso3166']),
+            ))
+    finally:
+        reader.close()
+
+    return SuggestionIndex(suggestions, lookup.normalize_name)
+
+class SuggestionIndex(object):
+    u"""Sorted array of `Suggestion`s, searched by prefix with bisect.
+
+    `normalize_name` should be the lookup's own, so typed prefixes are
+    munged the same way the indexed names were.
+    """
+
+    # Same as the number of results whoosh gives back
+    max_results = 10
+
+    def __init__(self, suggestions, normalize_name):
+        self.suggestions = sorted(suggestions, key=lambda s: s.key)
+        self.keys = [s.key for s in self.suggestions]
+        self.normalize_name = normalize_name
+
+        # Changes whenever the indexed names do; good for ETags
+        digest = hashlib.sha1()
+        for s in self.suggestions:
+            digest.update(repr(s[:-2]))
+        self.version = digest.hexdigest()[:12]
+
+        self._corpus = None
+        self._corpus_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.suggestions)
+
+    def normalize_prefix(self, prefix):
+        u"""Returns the normalized prefix, with any "type:" prefix split off
+        into a 2-tuple of (prefix, type or None).
+        """
+        normalized = self.normalize_name(prefix)
+        if u':' in normalized:
+            type_prefix, normalized = normalized.split(u':', 1)
+            return normalized, type_prefix
+        return normalized, None
+
+    def prefix_lookup(self, prefix, valid_types=[]):
+        u"""Returns the `Suggestion`s whose names start with `prefix`.
+
+        `valid_types` works like the lookup's: table names, singular or
+        plural, and "@xx" for languages.  A "type:" prefix on the prefix
+        itself also counts.  English names come first.
+        """
+        normalized, type_prefix = self.normalize_prefix(prefix)
+        is_valid = self._type_filter(valid_types, type_prefix)
+
+        english = []
+        foreign = []
+        i = bisect_left(self.keys, normalized)
+        while i < len(self.keys) and self.keys[i].startswith(normalized):
+            suggestion = self.suggestions[i]
+            i += 1
+
+            if not is_valid(suggestion):
+                continue
+
+            if suggestion.language:
+                foreign.append(suggestion)
+            else:
+                english.append(suggestion)
+                if len(english) >= self.max_results:
+                    break
+
+        return (english + foreign)[:self.max_results]
+
+    # Lookup syntax that only the real lookup understands: wildcards,
+    # languages, and lists of types
+    special_characters = frozenset(u'*?@,')
+
+    def exact_lookup(self, name, valid_types=[]):
+        u"""Returns the `Suggestion`s named exactly `name`, English first.
+
+        Returns an empty list if there aren't any, or if `name` uses lookup
+        syntax that this index can't handle, like wildcards, ids or
+        "random".  Either way, ask the real lookup instead.
+        """
+        normalized, type_prefix = self.normalize_prefix(name)
+        if not normalized or normalized == u'random' or normalized.isdigit() \
+            or self.special_characters.intersection(normalized):
+            return []
+
+        is_valid = self._type_filter(valid_types, type_prefix)
+
+        english = []
+        foreign = []
+        i = bisect_left(self.keys, normalized)
+        while i < len(self.keys) and self.keys[i] == normalized:
+            suggestion = self.suggestions[i]
+            i += 1
+
+            if not is_valid(suggestion):
+                continue
+            elif suggestion.language:
+                foreign.append(suggestion)
+            else:
+                english.append(suggestion)
+
+        return english + foreign
+
+    def _type_filter(self, valid_types, type_prefix=None):
+        u"""Returns a function that says whether a `Suggestion` is allowed by
+        `valid_types` and a "type:" prefix.
+        """
+        if type_prefix:
+            valid_types = list(valid_types) + [type_prefix]
+
+        types = set()
+        languages = set()
+        for valid_type in valid_types:
+            if valid_type.startswith(u'@'):
+                languages.add(valid_type[1:])
+            else:
+                types.add(valid_type)
+
+        def is_valid(suggestion):
+            if types and suggestion.type not in types \
+                and suggestion.table not in types:
+                return False
+            if languages and suggestion.iso639 not in languages:
+                return False
+            return True
+
+        return is_valid
+
+    def corpus(self, image_url, flag_url):
+        u"""Returns the `SuggestionCorpus` for this index, building it the
+        first time.  `image_url` and `flag_url` turn a suggestion's `image`
+        and `flag` paths into URLs; they're only called once per entry, ever.
+        """
+        with self._corpus_lock:
+            if self._corpus is None:
+                self._corpus = SuggestionCorpus(self, image_url, flag_url)
+        return self._corpus
+
+class SuggestionCorpus(object):
+    u"""The whole `SuggestionIndex` as JSON, for the suggestion box to
+    download once and search by itself.
+
+    The JSON is an object: `version` is a hash of the contents, `max_results`
+    is how many suggestions to show, and `entries` is a list of [key, name,
+    type, table, image URL, iso3166, flag URL, iso639, is_foreign], sorted
+    by key.  `gzipped` is the same JSON, already compressed.
+    """
+
+    def __init__(self, index, image_url, flag_url):
+        entries = []
+        for s in index.suggestions:
+            entries.append([
+                s.key, s.name, s.type, s.table,
+                image_url(s.image) if s.image else None,
+                s.iso3166, flag_url(s.flag), s.iso639,
+                1 if s.language else 0,
+            ])
+
+        contents = json.dumps(entries, separators=(',', ':'))
+        self.version = hashlib.sha1(contents).hexdigest()[:12]
+        self.json = json.dumps(dict(
+            version=self.version,
+            max_results=index.max_results,
+            entries=entries,
+        ), separators=(',', ':'))
+
+        buf = StringIO()
+        gzip_file = gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9)
+        gzip_file.write(self.json)
+        gzip_file.close()
+        self.gzipped = buf.getvalue()
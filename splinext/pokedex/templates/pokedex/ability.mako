@@ -27,7 +27,7 @@
 </div>
 
 
-<%lib:cache_content>
+<%dexlib:cache_content>
 <% dex_translate = i18n.DexTranslator(c) %>
 <% _ = i18n.Translator(c) %>
 
@@ -101,4 +101,4 @@ ${h.h1(_('External Links'), id='links')}
     <li><a href="http://serebii.net/abilitydex/${c.ability.name.lower().replace(' ', '')}.shtml">${_("Serebii.net")}</a></li>
     <li><a href="http://smogon.com/dp/abilities/${c.ability.name.lower().replace(' ', '_')}">${_("Smogon")}</a></li>
 </ul>
-</%lib:cache_content>
+</%dexlib:cache_content>
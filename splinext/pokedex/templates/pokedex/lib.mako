@@ -282,3 +282,36 @@ collapse_key = h.pokedex.collapse_flavor_text_key(literal=obdurate)
     </a>
 </%def>
 
+
+<%def name="cache_content()">\
+## The controller's cache_content puts the cached body in c.pokedex_page_body,
+## or sets it to None when the body needs rendering and keeping
+% if c.pokedex_page_body is None:
+<% c.pokedex_page_body = capture(caller.body) %>\
+% endif
+${c.pokedex_page_body | n}\
+</%def>
+
+<%def name="search_result_pages(result_page, _=unicode)">
+## Previous and next links for a page of search results, keeping the rest of
+## the search in the URL
+% if result_page.page_count > 1:
+<%
+    params = request.params.mixed()
+    params.pop('after', None)
+    def page_url(after):
+        if after is None:
+            return url.current(**params)
+        return url.current(after=after, **params)
+%>\
+<p class="dex-search-pages">
+    % if result_page.has_previous:
+    <a href="${page_url(result_page.previous_after)}">${_(u"« Previous")}</a>
+    % endif
+    ${_(u"Page {number} of {count} ({total} results)").format(number=result_page.number, count=result_page.page_count, total=result_page.total)}
+    % if result_page.has_next:
+    <a href="${page_url(result_page.next_after)}">${_(u"Next »")}</a>
+    % endif
+</p>
+% endif
+</%def>
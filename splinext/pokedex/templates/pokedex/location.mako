@@ -1,5 +1,6 @@
 <%inherit file="/base.mako"/>
-<%namespace name="lib" file="lib.mako"/>
+<%namespace name="lib" file="/lib.mako"/>
+<%namespace name="dexlib" file="lib.mako"/>
 <%! from splinext.pokedex import i18n %>\
 
 <%def name="title()"><% _ = i18n.Translator(c) %>${_("%s - Locations") % c.location_name}</%def>
@@ -13,11 +14,12 @@
 </ul>
 </%def>
 
+<h1>${c.location_name}</h1>
+
+<%dexlib:cache_content>
 <% dex_translate = i18n.DexTranslator(c) %>
 <% _ = i18n.Translator(c) %>
 
-<h1>${c.location_name}</h1>
-
 % for location_area in c.areas:
 % if location_area.name:
 <h2 id="area:${location_area.name}">
@@ -133,3 +135,4 @@
     % endfor
 </table>
 % endfor
+</%dexlib:cache_content>
@@ -27,7 +27,7 @@
     ${c.move.id}: ${c.move.name}
 </div>
 
-<%lib:cache_content>
+<%dexlib:cache_content>
 <% dex_translate = i18n.DexTranslator(c) %>
 <% _ = i18n.Translator(c) %>
 
@@ -314,6 +314,7 @@ ${h.h1(_(u'Pokémon', context='plural'))}
 <p>${c.move.type.name.capitalize()} Pokémon get STAB, and have their types highlighted in green.</p>
 <p>Pokémon with higher ${u'Special Attack' if c.move.damage_class.name == u'Special' else u'Attack'} are more suited to ${c.move.name}'s ${c.move.damage_class.name} damage, and have the stat highlighted in green.</p>
 % endif
+${learner_pages()}
 <% columns = sum(c.pokemon_columns, []) %>
 <table class="dex-pokemon-moves striped-rows">
 ## COLUMNS
@@ -365,6 +366,7 @@ ${h.h1(_(u'Pokémon', context='plural'))}
 </tbody>
 % endfor
 </table>
+${learner_pages()}
 
 ${h.h1(_('External Links'), id='links')}
 <ul class="classic-list">
@@ -377,4 +379,20 @@ ${h.h1(_('External Links'), id='links')}
 <li><a href="http://www.serebii.net/attackdex-dp/${c.move.name.lower().replace(' ', '')}.shtml">${_("Serebii.net")}</a></li>
 <li><a href="http://www.smogon.com/dp/moves/${c.move.name.lower().replace(' ', '_')}">${_("Smogon")}</a></li>
 </ul>
-</%lib:cache_content>
+</%dexlib:cache_content>
+
+<%def name="learner_pages()">
+% if c.learner_page_count > 1:
+<% _ = i18n.Translator(c) %>
+<p class="dex-learner-pages">
+    ${_(u"Page:")}
+    % for page in range(1, c.learner_page_count + 1):
+    % if page == c.learner_page:
+    <strong>${page}</strong>
+    % else:
+    <a href="${url.current(page=page)}">${page}</a>
+    % endif
+    % endfor
+</p>
+% endif
+</%def>
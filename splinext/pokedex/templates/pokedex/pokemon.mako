@@ -23,7 +23,7 @@ ${_(u"{name} – Pokémon #{number}").format(name=dex_translate(c.pokemon.full_n
 ${dexlib.pokemon_page_header()}
 
 
-<%lib:cache_content>
+<%dexlib:cache_content>
 <% _ = i18n.Translator(c) %>
 <% dex_translate = i18n.DexTranslator(c) %>
 
@@ -648,4 +648,4 @@ ${h.h1(_('External Links'), id=_('links', context='header id'))}
 <li><a href="http://www.serebii.net/pokedex-bw/${"%03d" % c.pokemon.national_id}.shtml">${_("Serebii.net")}</a></li>
 <li><a href="http://www.smogon.com/dp/pokemon/${smogon_name}">${_("Smogon")}</a></li>
 </ul>
-</%lib:cache_content>
+</%dexlib:cache_content>
@@ -17,7 +17,7 @@
 
 ${dexlib.pokemon_page_header()}
 
-<%lib:cache_content>
+<%dexlib:cache_content>
 
 <% dex_translate = i18n.DexTranslator(c) %>
 <% _ = i18n.Translator(c) %>
@@ -133,4 +133,4 @@ ${h.h1(region.name)}
     % endfor
 </table>
 % endfor
-</%lib:cache_content>
+</%dexlib:cache_content>
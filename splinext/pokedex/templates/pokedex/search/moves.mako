@@ -41,6 +41,7 @@
 
 % elif c.form.is_valid:
 ## Got something
+${dexlib.search_result_pages(c.result_page, _=_)}
 
 ## Display.  Could be one of several options...
 % if c.display_mode == 'custom-table':
@@ -84,6 +85,8 @@ ${getattr(self, 'col_' + column)()}
 
 % endif  ## display_mode
 
+${dexlib.search_result_pages(c.result_page, _=_)}
+
 % endif  ## search performed
 % endif  ## form submitted
 
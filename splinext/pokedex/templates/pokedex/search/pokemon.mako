@@ -40,6 +40,7 @@
 
 % elif c.form.is_valid:
 ## Got something
+${dexlib.search_result_pages(c.result_page, _=_)}
 
 ## Display.  Could be one of several options...
 % if c.display_mode == 'custom-table':
@@ -146,6 +147,8 @@ ${h.pokedex.pokemon_link(result, h.pokedex.apply_pokemon_template(c.display_temp
 
 % endif  ## display_mode
 
+${dexlib.search_result_pages(c.result_page, _=_)}
+
 % endif  ## search performed
 % endif  ## form submitted
 
@@ -174,6 +177,7 @@ ${h.form(url.current(), method='GET')}
             ${widget() | n}
             % endfor
         </dd>
+        ${lib.field('breeds_with')}
     </dl>
 </div>
 <div class="dex-column">
@@ -249,6 +253,8 @@ ${h.form(url.current(), method='GET')}
         % for stat_id, field_name in c.stat_fields:
         ${lib.field('stat_' + field_name)}
         % endfor
+        ${lib.field('best_stat')}
+        ${lib.field('worst_stat')}
     </dl>
 </div>
 <div class="dex-column">
@@ -26,7 +26,7 @@
     ${c.type.id}: ${h.pokedex.type_icon(c.type)}
 </div>
 
-<%lib:cache_content>
+<%dexlib:cache_content>
 ${h.h1(_('Essentials'))}
 
 <div class="dex-page-portrait">
@@ -123,4 +123,4 @@ ${h.h1(_('External Links'), id='links')}
     <li><a href="http://www.smogon.com/dp/types/${c.type.name}">${_("Smogon")}</a></li>
     % endif
 </ul>
-</%lib:cache_content>
+</%dexlib:cache_content>
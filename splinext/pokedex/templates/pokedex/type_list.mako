@@ -71,14 +71,13 @@ ${h.h1('Type chart')}
     % for type in c.types:
     <tr class="subheader-row">
         <th>${h.pokedex.type_link(type)}</th>
-        % for efficacy in sorted(type.damage_efficacies, key=lambda _: _.target_type.name):
-        <% damage_factor = efficacy.damage_factor * c.secondary_efficacy[type] / 100 %>\
+        % for damage_factor in c.type_chart[type.id]:
         <td class="dex-damage-dealt-${damage_factor}">
             ${h.pokedex.type_efficacy_label[damage_factor]}
         </td>
         % endfor
-        <td ${damage_score_class(c.attacking_scores[type])}>
-            ${c.attacking_scores[type]}
+        <td ${damage_score_class(c.attacking_scores[type.id])}>
+            ${c.attacking_scores[type.id]}
         </td>
     </tr>
     % endfor
@@ -87,8 +86,8 @@ ${h.h1('Type chart')}
     <tr class="subheader-row">
         <th colspan="2">${_(u"Score")}</th>
         % for type in c.types:
-        <td ${damage_score_class(c.defending_scores[type])}>
-            ${c.defending_scores[type]}
+        <td ${damage_score_class(c.defending_scores[type.id])}>
+            ${c.defending_scores[type.id]}
         </td>
         % endfor
         </td>
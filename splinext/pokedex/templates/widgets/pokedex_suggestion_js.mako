@@ -0,0 +1,4 @@
+<%! import splinext.pokedex.db as db %>\
+<script type="text/javascript">
+    window.pokedex_suggestion_corpus_url = "${url(controller='dex', action='suggest_corpus', version=h.pokedex.suggestion_corpus(db.pokedex_suggestions).version)}";
+</script>
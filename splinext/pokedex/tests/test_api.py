@@ -0,0 +1,21 @@
+# encoding: utf8
+import json
+
+from spline.tests import *
+
+class TestPokedexAPIController(TestController):
+
+    def test_lookup(self):
+        u"""Batch lookup returns one list of matches per name, in order."""
+        res = self.app.get(url(controller='dex_api', action='lookup',
+                               name=[u'eevee', u'surf', u'ee*ee', u'xyzzy'],
+                               type=[u'pokemon']))
+        results = json.loads(res.body)
+
+        self.assertEquals(len(results), 4)
+        self.assertEquals([_['name'] for _ in results[0]], [u'Eevee'])
+        self.assert_(results[0][0]['exact'])
+        self.assertEquals(results[1], [], 'type restrictions apply')
+        self.assertEquals(results[2][0]['name'], u'Eevee',
+                          'wildcards go through the real lookup')
+        self.assert_(not results[3] or not results[3][0]['exact'])
@@ -0,0 +1,115 @@
+# encoding: utf8
+import threading
+from unittest import TestCase
+
+from splinext.pokedex.caching import LRUCache, PageCache
+
+class TestLRUCache(TestCase):
+
+    def test_eviction(self):
+        u"""The least recently used entry goes first."""
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEquals(cache.get('a'), 1)
+        self.assertEquals(cache.get('b'), None)
+        self.assertEquals(cache.get('c'), 3)
+        self.assertEquals(cache.hits, 3)
+        self.assertEquals(cache.misses, 1)
+
+    def test_sizeof(self):
+        u"""With `sizeof`, the budget counts values' sizes rather than
+        entries, and values too big to fit are never kept.
+        """
+        cache = LRUCache(10, sizeof=len)
+        cache.set('a', 'xxxx')
+        cache.set('b', 'xxxx')
+        cache.set('c', 'xxxx')
+        cache.set('huge', 'x' * 11)
+
+        self.assertEquals(len(cache), 2)
+        self.assertEquals(cache.size, 8)
+        self.assertFalse('a' in cache)
+        self.assertFalse('huge' in cache)
+
+class DictBackend(dict):
+    def set(self, key, value):
+        self[key] = value
+
+class TestPageCache(TestCase):
+
+    def test_tiers(self):
+        u"""Pages come from the local tier, then the shared one, and are only
+        computed when neither has them.
+        """
+        backend = DictBackend(shared=u'from elsewhere')
+        cache = PageCache(LRUCache(10), backend=backend)
+
+        self.assertEquals(cache.get_or_create('pokemon', 'a', lambda: u'A'),
+                          u'A')
+        self.assertEquals(cache.get_or_create('pokemon', 'a', lambda: u'B'),
+                          u'A')
+        self.assertEquals(backend['a'], u'A')
+        self.assertEquals(
+            cache.get_or_create('moves', 'shared', lambda: u'B'),
+            u'from elsewhere')
+
+        actions = cache.stats()['actions']
+        self.assertEquals(actions['pokemon']['misses'], 1)
+        self.assertEquals(actions['pokemon']['local_hits'], 1)
+        self.assertEquals(actions['moves']['shared_hits'], 1)
+        self.assertEquals(actions['moves']['misses'], 0)
+
+    def test_single_flight(self):
+        u"""Requests for a page that's being computed wait for it, rather than
+        computing it again.
+        """
+        cache = PageCache(LRUCache(10))
+        started = threading.Event()
+        finish = threading.Event()
+        calls = []
+        def create():
+            calls.append(1)
+            started.set()
+            finish.wait(5)
+            return u'page'
+
+        results = []
+        def request():
+            results.append(cache.get_or_create('pokemon', 'a', create))
+
+        leader = threading.Thread(target=request)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=request) for _ in range(4)]
+        for follower in followers:
+            follower.start()
+        finish.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEquals(len(calls), 1)
+        self.assertEquals(results, [u'page'] * 5)
+        actions = cache.stats()['actions']
+        self.assertEquals(actions['pokemon']['misses'], 1)
+        self.assertEquals(actions['pokemon']['waits']
+                          + actions['pokemon']['local_hits'], 4)
+
+    def test_stale(self):
+        u"""Once a page is too old, one request recomputes it while the rest
+        get the old copy.
+        """
+        cache = PageCache(LRUCache(10), max_age=0)
+        cache.get_or_create('pokemon', 'a', lambda: u'old')
+
+        seen = []
+        def create():
+            seen.append(cache.get_or_create('pokemon', 'a', lambda: u'no'))
+            return u'new'
+
+        self.assertEquals(cache.get_or_create('pokemon', 'a', create), u'new')
+        self.assertEquals(seen, [u'old'])
+        self.assertEquals(cache.stats()['actions']['pokemon']['stale_hits'], 1)
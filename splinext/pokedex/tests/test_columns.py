@@ -0,0 +1,200 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex.columns import MoveLearnerIndex, PokemonColumns, \
+    like_matcher, scalar_columns
+from splinext.pokedex.forms import RangeQueryEvaluator
+
+def pokemon_row(id, name, **kwargs):
+    row = dict((column, None) for column in scalar_columns)
+    row.update(id=id, national_id=id, name=name, is_baby=False)
+    row.update(kwargs)
+    return row
+
+class TestLikeMatcher(TestCase):
+
+    def test_wildcards(self):
+        u"""Works like ilike: substrings without wildcards, whole strings
+        with them, and never None.
+        """
+        self.assert_(like_matcher(u'chu')(u'Pikachu'))
+        self.assert_(like_matcher(u'PIKA*')(u'Pikachu'))
+        self.assert_(like_matcher(u'p?kachu')(u'Pikachu'))
+        self.assertFalse(like_matcher(u'pika?')(u'Pikachu'))
+        self.assertFalse(like_matcher(u'*chu')(u'Pichu.'))
+        self.assertFalse(like_matcher(u'chu')(None))
+        self.assert_(like_matcher(u'mr. m')(u'Mr. Mime'))
+
+class TestPokemonColumns(TestCase):
+
+    def setUp(self):
+        pokemon = [
+            pokemon_row(172, u'Pichu', is_baby=True),
+            pokemon_row(25, u'Pikachu'),
+            pokemon_row(26, u'Raichu'),
+            pokemon_row(236, u'Tyrogue', is_baby=True),
+            pokemon_row(106, u'Hitmonlee'),
+            pokemon_row(107, u'Hitmonchan'),
+            pokemon_row(132, u'Ditto'),
+        ]
+        relations = dict(
+            type=[(172, 13), (25, 13), (26, 13), (236, 2), (106, 2),
+                  (107, 2), (132, 1)],
+            egg_group=[(25, 5), (25, 6), (26, 5), (26, 6), (132, 13)],
+        )
+        stats = [(25, 1, 35, 0), (25, 6, 90, 2), (26, 1, 60, 0)]
+        evolutions = [(172, 25), (25, 26), (236, 106), (236, 107)]
+        self.columns = PokemonColumns(pokemon, relations, stats, evolutions)
+
+    def names(self, mask):
+        names = dict(zip(self.columns.ids, self.columns.columns['name']))
+        return sorted(names[id] for id in self.columns.ids_in(mask))
+
+    def test_relations(self):
+        u"""Any, all and only work over multi-valued relations."""
+        columns = self.columns
+        self.assertEquals(self.names(columns.any_of('type', [1, 2])),
+                          [u'Ditto', u'Hitmonchan', u'Hitmonlee', u'Tyrogue'])
+        self.assertEquals(self.names(columns.all_of('egg_group', [5, 6])),
+                          [u'Pikachu', u'Raichu'])
+        # Pokémon with no egg groups at all count, as with SQL
+        self.assertEquals(len(self.names(columns.only('egg_group', [5, 6]))),
+                          6)
+
+    def test_stats(self):
+        u"""Missing stats are None, and don't count towards the total."""
+        columns = self.columns
+        pikachu = columns.positions[25]
+        self.assertEquals(columns.base_stats[6][pikachu], 90)
+        self.assertEquals(columns.base_stats[6][columns.positions[26]], None)
+        self.assertEquals(columns.stat_totals[pikachu], 125)
+        self.assertEquals(columns.stat_totals[columns.positions[132]], None)
+
+    def test_in_range(self):
+        u"""Ranges are looked up in the sorted columns, and missing values
+        never match.
+        """
+        columns = self.columns
+        self.assertEquals(
+            self.names(columns.in_range(('base_stat', 1),
+                                        RangeQueryEvaluator([(None, 50)]))),
+            [u'Pikachu'])
+        self.assertEquals(
+            self.names(columns.in_range('national_id',
+                RangeQueryEvaluator([(100, 110), (20, 26), (200, None)]))),
+            [u'Hitmonchan', u'Hitmonlee', u'Pikachu', u'Raichu', u'Tyrogue'])
+        self.assertEquals(
+            columns.in_range('height', RangeQueryEvaluator([(None, None)])),
+            0)
+
+    def test_evolution(self):
+        u"""Stages count babies separately; branching and branched are about
+        the parent having several children.
+        """
+        masks = self.columns.evolution_masks
+        self.assertEquals(self.names(masks['baby']), [u'Pichu', u'Tyrogue'])
+        self.assertEquals(self.names(masks['basic']),
+                          [u'Ditto', u'Hitmonchan', u'Hitmonlee', u'Pikachu'])
+        self.assertEquals(self.names(masks['stage1']), [u'Raichu'])
+        self.assertEquals(self.names(masks['stage2']), [])
+        self.assertEquals(self.names(masks['middle']), [u'Pikachu'])
+        self.assertEquals(self.names(masks['only']), [u'Ditto'])
+        self.assertEquals(self.names(masks['branching']), [u'Tyrogue'])
+        self.assertEquals(self.names(masks['branched']),
+                          [u'Hitmonchan', u'Hitmonlee'])
+
+    def test_order(self):
+        u"""Sort keys apply most significant first, and None sorts high,
+        unless the database puts it first.
+        """
+        columns = self.columns
+        column = columns.columns
+        positions = columns.positions_in(columns.all)
+        hp = columns.base_stats[1]
+
+        self.assertEquals(
+            columns.order(positions, [(hp, True), (column['name'], False)]),
+            [132, 107, 106, 172, 236, 26, 25],
+        )
+        self.assertEquals(
+            columns.order(positions, [(hp, False), (column['name'], False)]),
+            [25, 26, 132, 107, 106, 172, 236],
+        )
+        columns.nulls_first = True
+        self.assertEquals(
+            columns.order(positions, [(hp, True), (column['name'], False)]),
+            [26, 25, 132, 107, 106, 172, 236],
+        )
+        self.assertEquals(
+            columns.order(positions, [(column['is_baby'], True),
+                                      (columns.ids, False)])[:2],
+            [172, 236],
+        )
+
+    def test_collation(self):
+        u"""Text with a collation sorts by the database's order."""
+        pokemon = [
+            pokemon_row(1, u'eevee'),
+            pokemon_row(2, u'Abra'),
+            pokemon_row(3, u'Zubat'),
+        ]
+        columns = PokemonColumns(pokemon, {}, [], [], collations=dict(
+            name=[u'Abra', u'eevee', u'Zubat']))
+        positions = columns.positions_in(columns.all)
+
+        self.assertEquals(
+            columns.order(positions, [(columns.sort_column('name'), False)]),
+            [2, 1, 3])
+        self.assertEquals(columns.sort_column('species'),
+                          columns.columns['species'])
+
+class TestMoveLearnerIndex(TestCase):
+
+    def setUp(self):
+        positions = dict(bulbasaur=0, charmander=1, squirtle=2)
+        # Moves: 1 Tackle, 2 Growl, 3 Water Gun, 4 Bubble; methods: 1 level,
+        # 4 machine
+        pokemon_moves = [
+            ('bulbasaur', 1, 1, 1), ('bulbasaur', 2, 2, 1),
+            ('charmander', 2, 1, 1), ('charmander', 1, 1, 4),
+            ('squirtle', 1, 1, 1), ('squirtle', 2, 1, 1),
+            ('squirtle', 3, 2, 1),
+            ('missingno', 1, 1, 1),
+        ]
+        move_effects = [(1, 1), (2, 2), (3, 3), (4, 3)]
+        self.index = MoveLearnerIndex(positions, pokemon_moves, move_effects)
+
+    def test_learners(self):
+        u"""Version groups and methods narrow down who learns a move."""
+        index = self.index
+        self.assertEquals(index.learners([1]), 0b111)
+        self.assertEquals(index.learners([1], method_ids=set([1])), 0b101)
+        self.assertEquals(index.learners([2], version_group_ids=set([2])),
+                          0b001)
+        self.assertEquals(index.learners([4]), 0)
+        self.assertEquals(index.learners(index.same_effect(4)), 0b100)
+        self.assertEquals(sorted(index.same_effect(3)), [3, 4])
+
+    def test_count_by_method(self):
+        u"""Each Pokémon counts once per method, however many version groups
+        it learns the move in.
+        """
+        self.assertEquals(self.index.count_by_method(1), {1: 2, 4: 1})
+        self.assertEquals(self.index.count_by_method(2), {1: 3})
+        self.assertEquals(self.index.count_by_method(4), {})
+
+    def test_learners_of_all(self):
+        u"""Every move has to be learned, and optionally all in one version
+        group.
+        """
+        index = self.index
+        self.assertEquals(index.learners_of_all([[1], [2]]), 0b111)
+        self.assertEquals(
+            index.learners_of_all([[1], [2]], same_version_group=True),
+            0b110)
+        self.assertEquals(
+            index.learners_of_all([[1], [2]], method_ids=set([1]),
+                                  same_version_group=True),
+            0b100)
+        self.assertEquals(index.learners_of_all([[1], [4]]), 0)
+        self.assertEquals(index.learners_of_all([]), 0)
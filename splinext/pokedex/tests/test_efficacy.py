@@ -0,0 +1,50 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex.efficacy import TypeEfficacyMatrix
+
+# A tiny corner of the real chart
+types = [(1, u'Normal'), (8, u'Ghost'), (10, u'Fire'), (11, u'Water'),
+         (12, u'Grass')]
+efficacies = [
+    (1, 1, 100), (1, 8, 0), (1, 10, 100), (1, 11, 100), (1, 12, 100),
+    (8, 1, 0), (8, 8, 200), (8, 10, 100), (8, 11, 100), (8, 12, 100),
+    (10, 1, 100), (10, 8, 100), (10, 10, 50), (10, 11, 50), (10, 12, 200),
+    (11, 1, 100), (11, 8, 100), (11, 10, 200), (11, 11, 50), (11, 12, 50),
+    (12, 1, 100), (12, 8, 100), (12, 10, 50), (12, 11, 200), (12, 12, 50),
+]
+
+class TestTypeEfficacyMatrix(TestCase):
+
+    def setUp(self):
+        self.matrix = TypeEfficacyMatrix(types, efficacies)
+
+    def test_attacking_row(self):
+        self.assertEquals(self.matrix.attacking_row(10),
+                          {1: 100, 8: 100, 10: 50, 11: 50, 12: 200})
+
+    def test_defending_row(self):
+        u"""Dual types multiply, in either order."""
+        row = self.matrix.defending_row([12, 10])
+        self.assertEquals(row, self.matrix.defending_row([10, 12]))
+        self.assertEquals(row[10], 100)
+        self.assertEquals(row[11], 100)
+        self.assertEquals(row[12], 25)
+        self.assertEquals(self.matrix.defending_row([1, 8])[1], 0)
+
+    def test_chart(self):
+        u"""Chart rows are in type name order, and a secondary type scales
+        every factor.
+        """
+        # Fire, Ghost, Grass, Normal, Water
+        self.assertEquals(self.matrix.charts[None][10],
+                          [50, 100, 200, 100, 50])
+        self.assertEquals(self.matrix.charts[12][10],
+                          [100, 200, 400, 200, 100])
+
+    def test_scores(self):
+        u"""Immunity costs twice as much with a secondary type."""
+        self.assertEquals(self.matrix.attacking_scores[None][1], -2)
+        self.assertEquals(self.matrix.attacking_scores[11][1], -4)
+        self.assertEquals(self.matrix.attacking_scores[None][10], -1)
+        self.assertEquals(self.matrix.defending_scores[None][8], +1)
@@ -0,0 +1,42 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex.encounters import EncounterIndex, summarize_encounters
+
+class TestEncounterSummaries(TestCase):
+
+    def test_summarize(self):
+        u"""Identical level ranges are added together, and condition values
+        in any order count as the same conditions.
+        """
+        summaries = summarize_encounters([
+            # pokemon, version, area, terrain, conditions, levels, rarity
+            (16, 1, 100, 1, [], 3, 4, 50),
+            (16, 1, 100, 1, [], 3, 4, 20),
+            (16, 1, 100, 1, [], 5, 5, 10),
+            (16, 1, 100, 1, [7, 3], 6, 6, 5),
+            (16, 1, 100, 1, [3, 7], 6, 6, 5),
+            (19, 1, 100, 1, [], 2, 2, 30),
+        ])
+
+        self.assertEquals(len(summaries), 3)
+        pidgey = summaries[0]
+        self.assertEquals(pidgey.levels, [(3, 4, 70), (5, 5, 10)])
+        self.assertEquals(pidgey.rarity, 80)
+        self.assertEquals((pidgey.min_level, pidgey.max_level), (3, 5))
+        self.assertEquals(summaries[1].condition_value_ids, (3, 7))
+        self.assertEquals(summaries[1].levels, [(6, 6, 10)])
+
+    def test_index(self):
+        summaries = summarize_encounters([
+            (16, 1, 100, 1, [], 3, 4, 50),
+            (16, 1, 200, 1, [], 3, 4, 50),
+            (19, 1, 200, 1, [], 2, 2, 30),
+        ])
+        index = EncounterIndex(summaries, {})
+
+        self.assertEquals(len(index.for_pokemon(16)), 2)
+        self.assertEquals(index.for_pokemon(25), [])
+        self.assertEquals(
+            [summary.pokemon_id for summary in index.for_location_areas([200])],
+            [16, 19])
@@ -0,0 +1,39 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex.evolution import evolution_table
+
+class FakePokemon(object):
+    def __init__(self, national_id, parent_pokemon=None, is_baby=False,
+                 forme_name=None):
+        self.national_id = national_id
+        self.parent_pokemon = parent_pokemon
+        self.is_baby = is_baby
+        self.forme_name = forme_name
+
+class TestEvolutionTable(TestCase):
+
+    def test_branching_family(self):
+        u"""Leaves get a row each, in id order, and shared ancestors span all
+        of their rows.
+        """
+        azurill = FakePokemon(298, is_baby=True)
+        marill = FakePokemon(183, azurill)
+        azumarill = FakePokemon(184, marill)
+        table = evolution_table([azumarill, azurill, marill])
+
+        self.assertEquals(len(table), 1)
+        self.assertEquals([col['pokemon'] for col in table[0][:3]],
+                          [azurill, marill, azumarill])
+        self.assertEquals(table[0][3], '')
+
+        eevee = FakePokemon(133)
+        vaporeon = FakePokemon(134, eevee)
+        jolteon = FakePokemon(135, eevee)
+        table = evolution_table([jolteon, eevee, vaporeon])
+
+        self.assertEquals(len(table), 2)
+        self.assertEquals(table[0][0], '')
+        self.assertEquals(table[0][1], {'pokemon': eevee, 'span': 2})
+        self.assertEquals(table[0][2]['pokemon'], vaporeon)
+        self.assertEquals(table[1], ['', None, {'pokemon': jolteon, 'span': 1}, ''])
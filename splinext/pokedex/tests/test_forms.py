@@ -0,0 +1,51 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex.forms import RangeQueryEvaluator
+
+class TestRangeQueryEvaluator(TestCase):
+
+    def test_merging(self):
+        u"""Overlapping and touching ranges are merged, and the result is
+        sorted.
+        """
+        evaluator = RangeQueryEvaluator([(30, None), (5, 20), (1, 10), 25,
+                                         (20, 22)])
+        self.assertEquals(evaluator.intervals,
+                          [(1, 22), (25, 25), (30, None)])
+
+        evaluator = RangeQueryEvaluator([(10, 20), (None, 5), (3, 12)])
+        self.assertEquals(evaluator.intervals, [(None, 20)])
+
+        evaluator = RangeQueryEvaluator([(None, 5), (50, None), (3, 60)])
+        self.assertEquals(evaluator.intervals, [(None, None)])
+
+    def test_merging_adjacent(self):
+        u"""Whole numbers next to each other merge; fractions don't."""
+        evaluator = RangeQueryEvaluator([(11, 20), (1, 10), 21, 23])
+        self.assertEquals(evaluator.intervals, [(1, 21), (23, 23)])
+
+        evaluator = RangeQueryEvaluator([(0.5, 10.5), (11.5, 20.5)])
+        self.assertEquals(evaluator.intervals, [(0.5, 10.5), (11.5, 20.5)])
+
+    def test_contains(self):
+        u"""Values are checked against every interval, and None is never in
+        range.
+        """
+        evaluator = RangeQueryEvaluator([(None, 0), (5, 10), (20.5, None)])
+        for value in [-3, 0, 5, 7, 10, 20.5, 100]:
+            self.assert_(evaluator.contains(value), value)
+        for value in [None, 1, 4.9, 10.1, 20]:
+            self.assertFalse(evaluator.contains(value), value)
+
+    def test_slices(self):
+        u"""Slices of a sorted list cover exactly the values in range."""
+        values = [1, 3, 3, 5, 8, 13, 21, 34, 55]
+        evaluator = RangeQueryEvaluator([(3, 5), (20, 40), (50, None)])
+        slices = evaluator.slices(values)
+
+        self.assertEquals(slices, [(1, 4), (6, 8), (8, 9)])
+        self.assertEquals(
+            [value for start, stop in slices for value in values[start:stop]],
+            [value for value in values if evaluator.contains(value)],
+        )
@@ -0,0 +1,136 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex.indexes import BreedingIndex, NeighborRing, PercentileIndex, StatSpreadIndex
+
+class TestPercentileIndex(TestCase):
+
+    def test_percentile(self):
+        u"""Values below count fully; ties count for half."""
+        index = PercentileIndex([50, 10, 30, 30, 90])
+
+        self.assertEquals(len(index), 5)
+        self.assertAlmostEquals(index.percentile(10), 0.1)
+        self.assertAlmostEquals(index.percentile(30), 0.4)
+        self.assertAlmostEquals(index.percentile(90), 0.9)
+
+    def test_percentile_of_missing_value(self):
+        u"""Values that aren't in the index still land between neighbors."""
+        index = PercentileIndex([10, 20, 30, 40])
+
+        self.assertEquals(index.percentile(5), 0.0)
+        self.assertEquals(index.percentile(25), 0.5)
+        self.assertEquals(index.percentile(45), 1.0)
+
+class TestNeighborRing(TestCase):
+
+    def test_wraparound(self):
+        u"""The first and last items are each other's neighbors."""
+        ring = NeighborRing([3, 1, 2], key=lambda n: n)
+
+        self.assertEquals(ring.neighbors(1), (3, 2))
+        self.assertEquals(ring.neighbors(2), (1, 3))
+        self.assertEquals(ring.neighbors(3), (2, 1))
+
+    def test_gaps(self):
+        u"""Non-contiguous ids, like the ??? and Shadow types, still link up
+        with their real neighbors.
+        """
+        ring = NeighborRing([1, 2, 17, 10001, 10002], key=lambda n: n)
+
+        self.assertEquals(ring.neighbors(17), (2, 10001))
+        self.assertEquals(ring.neighbors(10002), (10001, 1))
+        self.assertEquals(ring.neighbors(500), (17, 10001))
+
+class TestBreedingIndex(TestCase):
+
+    def setUp(self):
+        # (id, chain, gender rate, egg groups, parent, base form)
+        self.index = BreedingIndex([
+            (25, 10, 4, (6, 5), 172, None),     # Pikachu
+            (26, 10, 4, (6, 5), 25, None),      # Raichu
+            (172, 10, 4, (15,), None, None),    # Pichu
+            (35, 14, 6, (6,), 173, None),       # Clefairy
+            (173, 14, 6, (15,), None, None),    # Cleffa
+            (81, 34, -1, (10,), None, None),    # Magnemite
+            (132, 66, -1, (13,), None, None),   # Ditto
+            (150, 63, -1, (15,), None, None),   # Mewtwo
+            (351, 155, 4, (6, 11), None, None), # Castform
+            (400, 155, 4, (6, 11), None, 351),  # a Castform form
+        ])
+
+    def test_compatible_families(self):
+        u"""Only base forms are listed, and babies that can't breed are
+        skipped over.
+        """
+        self.assertEquals(self.index.compatible_families([6]), [25, 35, 351])
+        self.assertEquals(self.index.compatible_families([11]), [351])
+        self.assertEquals(self.index.compatible_families([5, 11]), [25, 351])
+
+    def test_partners(self):
+        self.assertEquals(self.index.partners(351),
+                          [25, 26, 35, 132, 351, 400])
+        self.assertEquals(self.index.partners(81), [132])
+        self.assertEquals(self.index.partners(150), [])
+        self.assertEquals(self.index.partners(132),
+                          [25, 26, 35, 81, 351, 400])
+
+    def test_generator(self):
+        u"""The Pokémon can come from a one-shot iterator, like a query."""
+        rows = [
+            (25, 10, 4, (6, 5), 172, None),
+            (172, 10, 4, (15,), None, None),
+            (132, 66, -1, (13,), None, None),
+        ]
+        index = BreedingIndex(row for row in rows)
+        self.assertEquals(index.compatible_families([6]), [25])
+        self.assertEquals(index.partners(25), [25, 132])
+
+    def test_partners_gender(self):
+        u"""Single-gender Pokémon can't breed with the same gender, even in
+        their own family.
+        """
+        index = BreedingIndex([
+            (29, 11, 8, (1, 5), None, None),    # Nidoran♀
+            (32, 12, 0, (1, 5), None, None),    # Nidoran♂
+            (33, 12, 0, (1, 5), 32, None),      # Nidorino
+            (34, 12, 0, (1, 5), 33, None),      # Nidoking
+            (128, 59, 0, (5,), None, None),     # Tauros
+            (132, 66, -1, (13,), None, None),   # Ditto
+            (241, 110, 8, (5,), None, None),    # Miltank
+        ])
+        self.assertEquals(index.partners(128), [29, 132, 241])
+        self.assertEquals(index.partners(33), [29, 132, 241])
+        self.assertEquals(index.partners(241), [32, 33, 34, 128, 132])
+        self.assertEquals(index.partners(132), [29, 32, 33, 34, 128, 241])
+
+class TestStatSpreadIndex(TestCase):
+
+    def setUp(self):
+        # Stats 2-6 are Attack, Defense, Sp. Atk, Sp. Def, Speed
+        self.index = StatSpreadIndex([
+            (1, 2, 49), (1, 3, 49), (1, 4, 65), (1, 5, 65), (1, 6, 45),
+            (101, 2, 50), (101, 3, 70), (101, 4, 80), (101, 5, 80),
+            (101, 6, 140),
+            (151, 2, 100), (151, 3, 100), (151, 4, 100), (151, 5, 100),
+            (151, 6, 100),
+        ])
+
+    def test_ties(self):
+        self.assertEquals(self.index.spreads[1],
+                          (frozenset([4, 5]), frozenset([6]), 20))
+
+    def test_nature_examples(self):
+        self.assertEquals(self.index.nature_examples(4, 6), [1])
+        self.assertEquals(self.index.nature_examples(6, 2), [101])
+        self.assertEquals(self.index.nature_examples(2, 6), [])
+        self.assertEquals(self.index.nature_examples(3, 3), [151])
+
+    def test_matching(self):
+        u"""A Pokémon with all its stats equal has every stat as both its
+        best and worst.
+        """
+        self.assertEquals(self.index.matching(best_stat_id=5), [1, 151])
+        self.assertEquals(self.index.matching(5, 6), [1, 151])
+        self.assertEquals(self.index.matching(6, 2), [101, 151])
+        self.assertEquals(self.index.matching(), [1, 101, 151])
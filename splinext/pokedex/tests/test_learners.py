@@ -0,0 +1,43 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex.learners import LearnerTable
+
+class TestLearnerTable(TestCase):
+
+    def setUp(self):
+        # pokemon, national id, form, version group, method, method name,
+        # level, machine
+        self.table = LearnerTable([
+            (25, 25, None, 11, 1, u'Level up', 30, None),
+            (25, 25, None, 11, 1, u'Level up', 18, None),
+            (1, 1, None, 11, 4, u'Machine', None, 6),
+            (25, 25, None, 11, 4, u'Machine', None, 6),
+            (10001, 386, u'attack', 11, 4, u'Machine', None, 6),
+            (386, 386, None, 11, 4, u'Machine', None, 6),
+            (151, 151, None, 11, 3, u'Tutor', None, None),
+        ])
+
+    def test_methods(self):
+        u"""The lowest level wins; forms sort after their base forms."""
+        self.assertEquals(self.table.methods, [
+            (1, [(25, {11: dict(level=18)})]),
+            (3, [(151, {11: dict()})]),
+            (4, [(1, {11: dict(machine=6)}),
+                 (25, {11: dict(machine=6)}),
+                 (386, {11: dict(machine=6)}),
+                 (10001, {11: dict(machine=6)})]),
+        ])
+        self.assertEquals(len(self.table), 6)
+
+    def test_page(self):
+        u"""Pages run through the methods in the given order."""
+        page = self.table.page([1, 4, 3], 1, 4)
+        self.assertEquals([(method_id, [pokemon_id for pokemon_id, _ in rows])
+                           for method_id, rows in page],
+                          [(4, [1, 25, 386])])
+
+        page = self.table.page([1, 4, 3], 4, 8)
+        self.assertEquals([(method_id, [pokemon_id for pokemon_id, _ in rows])
+                           for method_id, rows in page],
+                          [(4, [10001]), (3, [151])])
@@ -0,0 +1,142 @@
+# encoding: utf8
+import random
+from unittest import TestCase
+
+from splinext.pokedex.learnset import LearnsetTable
+
+def legacy_learnset_table(entries):
+    u"""The move table as the Pokémon page used to build it, by scanning.
+    `entries` is a list of (move, version_group, data).  Kept here to check
+    `LearnsetTable` against, and for bin/benchmark-learnset.py.
+    """
+    method_list = []
+    for move, this_vg, vg_data in entries:
+        lower_bound = None
+        upper_bound = None
+        if 'sort' in vg_data:
+            for i, (row_move, version_group_data) in enumerate(method_list):
+                if this_vg not in version_group_data:
+                    continue
+
+                if version_group_data[this_vg]['sort'] > vg_data['sort']:
+                    if not upper_bound or i < upper_bound:
+                        upper_bound = i
+                if version_group_data[this_vg]['sort'] < vg_data['sort']:
+                    if not lower_bound or i > lower_bound:
+                        lower_bound = i
+
+        if lower_bound != None:
+            lower_bound += 1
+
+        valid_row = None
+        for i, table_row in enumerate(method_list[0:upper_bound]):
+            row_move, version_group_data = table_row
+
+            if valid_row and set(valid_row[1].keys()).intersection(
+                                 set(version_group_data.keys())):
+                valid_row = None
+
+            if row_move == move and this_vg not in version_group_data:
+                valid_row = table_row
+                if i >= lower_bound:
+                    break
+
+        if valid_row:
+            if method_list.index(valid_row) < lower_bound:
+                method_list.remove(valid_row)
+                method_list.insert(lower_bound, valid_row)
+            valid_row[1][this_vg] = vg_data
+            continue
+
+        new_row = move, { this_vg: vg_data }
+        method_list.insert(lower_bound or 0, new_row)
+
+    return method_list
+
+def learnset_table(entries):
+    table = LearnsetTable()
+    for move, version_group, data in entries:
+        table.add(move, version_group, data)
+    return table.rows()
+
+class TestLearnsetTable(TestCase):
+
+    def test_shared_rows(self):
+        u"""A move learned at the same point in two version groups gets one
+        row, and level order holds within each version group.
+        """
+        entries = [
+            (u'Tackle', 1, dict(sort=(1, None, None), level=1)),
+            (u'Tackle', 2, dict(sort=(1, None, None), level=1)),
+            (u'Growl', 2, dict(sort=(4, None, None), level=4)),
+            (u'Growl', 1, dict(sort=(7, None, None), level=7)),
+            (u'Ember', 1, dict(sort=(5, None, None), level=5)),
+        ]
+        rows = learnset_table(entries)
+
+        self.assertEquals([move for move, data in rows],
+                          [u'Tackle', u'Ember', u'Growl'])
+        self.assertEquals(sorted(rows[2][1].keys()), [1, 2])
+        self.assertEquals(rows, legacy_learnset_table(entries))
+
+    def test_middle_of_group(self):
+        u"""Entries that sort between existing rows go between them, whether
+        they get a row of their own or share one.
+        """
+        entries = [
+            (u'Tackle', 1, dict(sort=(1, None, None), level=1)),
+            (u'Ember', 1, dict(sort=(9, None, None), level=9)),
+            (u'Flamethrower', 1, dict(sort=(30, None, None), level=30)),
+            (u'Growl', 1, dict(sort=(5, None, None), level=5)),
+            (u'Smokescreen', 1, dict(sort=(20, None, None), level=20)),
+            (u'Tackle', 2, dict(sort=(1, None, None), level=1)),
+            (u'Smokescreen', 2, dict(sort=(15, None, None), level=15)),
+            (u'Ember', 2, dict(sort=(12, None, None), level=12)),
+            (u'Scratch', 2, dict(sort=(7, None, None), level=7)),
+        ]
+        rows = learnset_table(entries)
+
+        self.assertEquals([move for move, data in rows], [
+            u'Tackle', u'Scratch', u'Growl', u'Ember', u'Smokescreen',
+            u'Flamethrower',
+        ])
+        self.assertEquals(sorted(rows[3][1].keys()), [1, 2])
+        self.assertEquals(sorted(rows[4][1].keys()), [1, 2])
+        self.assertEquals(rows, legacy_learnset_table(entries))
+
+        table = LearnsetTable()
+        for move, version_group, data in entries:
+            table.add(move, version_group, data)
+        self.assertEquals(table.sort_descents[1], 0)
+        self.assertEquals(table.sort_descents[2], 0)
+
+    def test_same_as_scanning(self):
+        u"""Random learnsets come out exactly as they did before, including
+        entries that arrive out of order.
+        """
+        rng = random.Random(493)
+        for _ in range(2000):
+            ordered = rng.random() < 0.8
+            entries = []
+            for _ in range(rng.randint(1, 60)):
+                move = rng.randint(1, 12)
+                version_group = rng.randint(1, 6)
+                if ordered:
+                    level = rng.randint(1, 15)
+                    data = dict(sort=(level, None, rng.choice([None, 1, 2])),
+                                level=level)
+                else:
+                    data = dict()
+                entries.append((move, version_group, data))
+
+            # Nothing is ever learned twice the same way in one version group
+            seen = set()
+            unique_entries = []
+            for move, version_group, data in entries:
+                key = move, version_group, data.get('sort')
+                if key not in seen:
+                    seen.add(key)
+                    unique_entries.append((move, version_group, data))
+
+            self.assertEquals(learnset_table(unique_entries),
+                              legacy_learnset_table(unique_entries))
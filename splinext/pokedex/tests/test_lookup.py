@@ -0,0 +1,36 @@
+# encoding: utf8
+from spline.tests import *
+
+from splinext.pokedex.controllers.pokedex import lookup_redirect_cache
+import splinext.pokedex.db as db
+
+class TestLookupController(TestController):
+
+    def test_redirect_caching(self):
+        u"""Exact matches redirect with an ETag the browser can send back for
+        a 304.
+        """
+        lookup_url = url(controller='dex', action='lookup', lookup=u'Eevee')
+        res = self.app.get(lookup_url, status=302)
+        etag = res.headers['ETag']
+        self.assertEquals(res.headers['Cache-Control'],
+                          'public, max-age=86400')
+        self.assert_(res.headers['Location'].endswith('/dex/pokemon/eevee'))
+
+        self.app.get(lookup_url, headers={'If-None-Match': etag}, status=304)
+
+    def test_redirect_cache_version(self):
+        u"""Remembered redirects are only used for the index they came from."""
+        lookup_url = url(controller='dex', action='lookup', lookup=u'Eevee')
+        self.app.get(lookup_url, status=302)
+        misses = lookup_redirect_cache.misses
+        self.app.get(lookup_url, status=302)
+        self.assertEquals(lookup_redirect_cache.misses, misses)
+
+        old_version = db.pokedex_suggestions.version
+        db.pokedex_suggestions.version = u'changed'
+        try:
+            self.app.get(lookup_url, status=302)
+        finally:
+            db.pokedex_suggestions.version = old_version
+        self.assertEquals(lookup_redirect_cache.misses, misses + 1)
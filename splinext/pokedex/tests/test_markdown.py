@@ -0,0 +1,66 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex import cache_markdown_rendering, i18n, markdown_cache
+import splinext.pokedex.db as db
+
+class FakeMarkdownString(object):
+    renders = 0
+
+    def __init__(self, source_text):
+        self.source_text = source_text
+
+    @property
+    def as_html(self):
+        FakeMarkdownString.renders += 1
+        return u"<p>{0}</p>".format(self.source_text)
+
+class TestMarkdownCache(TestCase):
+
+    def setUp(self):
+        markdown_cache.clear()
+        FakeMarkdownString.renders = 0
+        self.language = ('en',)
+        self.current_language = i18n.current_language
+        i18n.current_language = lambda: self.language
+        self.data_version = db.data_version
+        self.as_html = FakeMarkdownString.as_html
+        FakeMarkdownString.as_html = cache_markdown_rendering(self.as_html)
+
+    def tearDown(self):
+        FakeMarkdownString.as_html = self.as_html
+        i18n.current_language = self.current_language
+        db.data_version = self.data_version
+        markdown_cache.clear()
+
+    def test_cache(self):
+        u"""The same source in the same language is only rendered once."""
+        self.assertEquals(FakeMarkdownString(u'Eevee').as_html,
+                          u'<p>Eevee</p>')
+        self.assertEquals(FakeMarkdownString(u'Eevee').as_html,
+                          u'<p>Eevee</p>')
+        self.assertEquals(FakeMarkdownString.renders, 1)
+
+        FakeMarkdownString(u'Évoli').as_html
+        self.assertEquals(FakeMarkdownString.renders, 2)
+
+    def test_language(self):
+        u"""Each language gets its own copy."""
+        FakeMarkdownString(u'Eevee').as_html
+        self.language = ('de',)
+        FakeMarkdownString(u'Eevee').as_html
+        self.assertEquals(FakeMarkdownString.renders, 2)
+
+    def test_data_version(self):
+        u"""New data gets rendered afresh, as links may now go elsewhere."""
+        FakeMarkdownString(u'Eevee').as_html
+        db.data_version = 'changed'
+        FakeMarkdownString(u'Eevee').as_html
+        self.assertEquals(FakeMarkdownString.renders, 2)
+
+    def test_wrap_once(self):
+        u"""Wrapping an already wrapped property changes nothing, so the setup
+        hook can run more than once.
+        """
+        wrapped = FakeMarkdownString.as_html
+        self.assert_(cache_markdown_rendering(wrapped) is wrapped)
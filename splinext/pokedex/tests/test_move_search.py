@@ -11,6 +11,18 @@ class TestMoveSearchController(TestController):
                                 action='move_search',
                                 **criteria))
 
+    def search_results(self, **criteria):
+        u"""Runs a move search and returns every result, following the pages
+        to the end.
+        """
+        results = []
+        while True:
+            context = self.do_search(**criteria).tmpl_context
+            results.extend(context.results)
+            if not context.result_page.has_next:
+                return results
+            criteria['after'] = context.result_page.next_after
+
     def check_search(self, criteria, expected, message, exact=False):
         """Checks whether the given expected results (a list of names) are
         included in the response from a search.
@@ -27,7 +39,7 @@ class TestMoveSearchController(TestController):
         criteria.setdefault('display', 'custom-list')
         criteria.setdefault('sort', 'id')
 
-        results = self.do_search(**criteria).tmpl_context.results
+        results = self.search_results(**criteria)
 
         self.assert_(
             len(results) < 460,
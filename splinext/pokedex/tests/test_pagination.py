@@ -0,0 +1,49 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex.pagination import ResultPage
+
+class TestResultPage(TestCase):
+
+    def test_pages(self):
+        u"""Each page starts after the cursor, and knows its neighbors."""
+        ids = range(100, 125)
+        first = ResultPage(ids, 10)
+        self.assertEquals(first.ids, range(100, 110))
+        self.assertEquals((first.number, first.page_count, first.total),
+                          (1, 3, 25))
+        self.assertFalse(first.has_previous)
+        self.assertEquals(first.next_after, 109)
+
+        second = ResultPage(ids, 10, after=first.next_after)
+        self.assertEquals(second.ids, range(110, 120))
+        self.assertEquals(second.number, 2)
+        self.assert_(second.has_previous)
+        self.assertEquals(second.previous_after, None)
+
+        last = ResultPage(ids, 10, after=second.next_after)
+        self.assertEquals(last.ids, range(120, 125))
+        self.assertEquals(last.number, 3)
+        self.assertFalse(last.has_next)
+        self.assertEquals(last.previous_after, 109)
+
+    def test_bad_cursor(self):
+        u"""A cursor that isn't in the results, or is the very last one, gets
+        the first page.
+        """
+        ids = [0, 1, 2, 3, 4]
+        self.assertEquals(ResultPage(ids, 2, after=99).ids, [0, 1])
+        self.assertEquals(ResultPage(ids, 2, after=4).ids, [0, 1])
+        self.assertEquals(ResultPage([], 2).page_count, 0)
+
+    def test_groups(self):
+        u"""Pages only end between groups, even if that makes them long."""
+        ids = [1, 2, 3, 4, 5, 6, 7]
+        groups = ['a', 'a', 'b', 'b', 'b', 'c', 'd']
+        first = ResultPage(ids, 3, groups=groups)
+        self.assertEquals(first.ids, [1, 2, 3, 4, 5])
+        self.assertEquals(first.page_count, 2)
+
+        second = ResultPage(ids, 3, after=first.next_after, groups=groups)
+        self.assertEquals(second.ids, [6, 7])
+        self.assertFalse(second.has_next)
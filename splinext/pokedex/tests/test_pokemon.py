@@ -1,5 +1,7 @@
 from spline.tests import *
 
+import splinext.pokedex.db as db
+
 class TestPokemonController(TestController):
 
     def test_pokemon(self):
@@ -7,3 +9,27 @@ class TestPokemonController(TestController):
                                     name='eevee'))
         self.assertEquals(response.tmpl_context.pokemon.name, u'Eevee',
                           'Correct Pokemon is selected')
+
+    def test_page_cache(self):
+        u"""The second request for a page comes from the page cache, until
+        the data changes.  Reloading the same data doesn't change its version,
+        so other processes and restarts can share the cached pages.
+        """
+        page_url = url(controller='dex', action='pokemon', name='pikachu')
+        self.app.get(page_url)
+        response = self.app.get(page_url)
+        self.assert_(getattr(response.tmpl_context.timer, 'from_cache', False))
+
+        data_version = db.data_version
+        db.reload_reference_data()
+        self.assertEquals(db.data_version, data_version)
+        response = self.app.get(page_url)
+        self.assert_(getattr(response.tmpl_context.timer, 'from_cache', False))
+
+        db.data_version = u'changed'
+        try:
+            response = self.app.get(page_url)
+        finally:
+            db.data_version = data_version
+        self.assertFalse(
+            getattr(response.tmpl_context.timer, 'from_cache', False))
@@ -1,7 +1,8 @@
 # encoding: utf8
 from spline.tests import *
 
-from splinext.pokedex.controllers.pokedex_search import PokemonSearchForm
+from splinext.pokedex.controllers.pokedex_search import \
+    PokedexSearchController, PokemonSearchForm, pokemon_search_cache
 
 class TestPokemonSearchController(TestController):
 
@@ -11,6 +12,18 @@ class TestPokemonSearchController(TestController):
                                 action='pokemon_search',
                                 **criteria))
 
+    def search_results(self, **criteria):
+        u"""Runs a Pokémon search and returns every result, following the
+        pages to the end.
+        """
+        results = []
+        while True:
+            context = self.do_search(**criteria).tmpl_context
+            results.extend(context.results)
+            if not context.result_page.has_next:
+                return results
+            criteria['after'] = context.result_page.next_after
+
     def check_search(self, criteria, expected, message, exact=False):
         """Checks whether the given expected results (a list of names or (name,
         forme_name) tuples) are included in the response from a search.
@@ -25,7 +38,7 @@ class TestPokemonSearchController(TestController):
         criteria.setdefault('display', 'custom-list')
         criteria.setdefault('sort', 'id')
 
-        results = self.do_search(**criteria).tmpl_context.results
+        results = self.search_results(**criteria)
 
         self.assert_(
             len(results) < 490,
@@ -327,10 +340,9 @@ class TestPokemonSearchController(TestController):
         )
 
         # Check that "<= 0" doesn't include genderless (-1)
-        res = self.do_search(gender_rate_operator=u'less_equal',
-                             gender_rate=u'0')
-        self.assertFalse(
-            any(_.name == u'Voltorb' for _ in res.tmpl_context.results))
+        results = self.search_results(gender_rate_operator=u'less_equal',
+                                      gender_rate=u'0')
+        self.assertFalse(any(_.name == u'Voltorb' for _ in results))
 
 
     def test_egg_groups(self):
@@ -354,6 +366,43 @@ class TestPokemonSearchController(TestController):
             'water 1 OR water 3',
         )
 
+    def test_best_worst_stat(self):
+        """Checks searching by best and worst stats."""
+        self.check_search(
+            dict(best_stat=u'speed', worst_stat=u'attack'),
+            [ u'Electrode' ],
+            'fast but weak',
+        )
+
+    def test_breeds_with(self):
+        """Checks searching by breeding partner."""
+        self.check_search(
+            dict(breeds_with=u'Castform'),
+            [ u'Ditto', u'Gastly', u'Pikachu', u'Raichu', u'Castform' ],
+            'breeds with castform',
+        )
+        self.assertFalse(
+            any(_.name == u'Pichu' for _ in
+                self.search_results(breeds_with=u'Castform')),
+            'babies that cannot breed are left out',
+        )
+        self.check_search(
+            dict(breeds_with=u'Magnemite'),
+            [ u'Ditto' ],
+            'genderless; ditto only',
+            exact=True,
+        )
+        self.check_search(
+            dict(breeds_with=u'Tauros'),
+            [ u'Ditto', u'Miltank' ],
+            'all-male breeds with female',
+        )
+        self.assertFalse(
+            any(_.name == u'Tauros' for _ in
+                self.search_results(breeds_with=u'Tauros')),
+            u"all-male can't breed with all-male",
+        )
+
 
     def test_generation(self):
         """Checks searching by generation introduced."""
@@ -710,6 +759,79 @@ class TestPokemonSearchController(TestController):
         )
 
 
+    def test_result_cache(self):
+        u"""The same search, however it's written, is only run once; the
+        second time comes from the result cache, in the same order.
+        """
+        first = self.do_search(type_operator=u'exact',
+                               type=[u'dragon', u'ground'], sort=u'id')
+        hits = pokemon_search_cache.hits
+        second = self.do_search(sort=u'id', type=[u'ground', u'dragon'],
+                                type_operator=u'exact', name=u'')
+
+        self.assertEquals(pokemon_search_cache.hits, hits + 1)
+        self.assertEquals(
+            [_.id for _ in second.tmpl_context.results],
+            [_.id for _ in first.tmpl_context.results],
+        )
+
+
+    def test_pages(self):
+        u"""Results come a page at a time, picking up after the last one, and
+        sorting by evolution chain never splits a family across pages.
+        """
+        criteria = dict(type_operator=u'any', type=u'water',
+                        sort=u'evolution-chain',
+                        display=u'custom-table', column=u'name')
+        everything = [_.id for _ in self.search_results(**criteria)]
+
+        results_per_page = PokedexSearchController.results_per_page
+        PokedexSearchController.results_per_page = 10
+        try:
+            pages = []
+            while True:
+                context = self.do_search(**criteria).tmpl_context
+                pages.append(context.results)
+                if not context.result_page.has_next:
+                    break
+                criteria['after'] = context.result_page.next_after
+        finally:
+            PokedexSearchController.results_per_page = results_per_page
+
+        self.assert_(len(pages) > 1, u'water Pokémon take several pages')
+        self.assertEquals([_.id for page in pages for _ in page], everything)
+
+        chains = [set(_.evolution_chain_id for _ in page) for page in pages]
+        for chain_ids, next_chain_ids in zip(chains, chains[1:]):
+            self.assertFalse(chain_ids & next_chain_ids,
+                             u'families stay on one page')
+
+
+    def test_sort_same_as_sql(self):
+        u"""Searching in memory sorts exactly like the database, including
+        where NULLs go and how names collate.
+        """
+        for sort in (u'habitat', u'type', u'name', u'stat-total'):
+            for backwards in (False, True):
+                criteria = dict(id=u'1-493', sort=sort)
+                if backwards:
+                    criteria['sort_backwards'] = u'y'
+
+                ids = {}
+                in_memory_search = PokedexSearchController.in_memory_search
+                try:
+                    for in_memory in (True, False):
+                        PokedexSearchController.in_memory_search = in_memory
+                        ids[in_memory] = [
+                            _.id for _ in self.search_results(**criteria)]
+                finally:
+                    PokedexSearchController.in_memory_search \
+                        = in_memory_search
+
+                self.assertEquals(ids[True], ids[False],
+                    u"sort by {0}, backwards {1}".format(sort, backwards))
+
+
     def test_crash_vague_join(self):
         """Tests for crashes that occur when searching by evolution position
         and sorting by some other criterion, because the join between 'pokemon'
@@ -730,3 +852,17 @@ class TestPokemonSearchController(TestController):
             [ u'Staryu' ],
             u'joins to habitat still work when searching by evo and move',
         )
+
+
+class TestPokemonSearchControllerSQL(TestPokemonSearchController):
+    u"""Every test above, with the database doing the searching instead of
+    the in-memory columns.
+    """
+
+    def setUp(self):
+        super(TestPokemonSearchControllerSQL, self).setUp()
+        PokedexSearchController.in_memory_search = False
+
+    def tearDown(self):
+        PokedexSearchController.in_memory_search = True
+        super(TestPokemonSearchControllerSQL, self).tearDown()
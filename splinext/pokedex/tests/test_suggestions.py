@@ -0,0 +1,53 @@
+# encoding: utf8
+from unittest import TestCase
+
+from splinext.pokedex.suggestions import Suggestion, SuggestionIndex
+
+def make_suggestion(key, type, language=None, iso639=u'en'):
+    return Suggestion(
+        key=key, name=key.title(), type=type, table=type + u's', row_id=1,
+        language=language, iso639=iso639, iso3166=u'us', image=None,
+        flag=u'flags/us.png',
+    )
+
+class TestSuggestionIndex(TestCase):
+
+    def setUp(self):
+        self.index = SuggestionIndex([
+            make_suggestion(u'pikachu', u'pokemon'),
+            make_suggestion(u'pichu', u'pokemon'),
+            make_suggestion(u'pin missile', u'move'),
+            make_suggestion(u'pikachuu', u'pokemon', u'Japanese', u'ja'),
+            make_suggestion(u'pidgey', u'pokemon'),
+            make_suggestion(u'eevee', u'pokemon'),
+        ], normalize_name=lambda name: name.strip().lower())
+
+    def test_prefix(self):
+        u"""Only names with the prefix come back, English first."""
+        names = [s.key for s in self.index.prefix_lookup(u'Pik')]
+        self.assertEquals(names, [u'pikachu', u'pikachuu'])
+
+    def test_valid_types(self):
+        u"""Types can be given as a list or as a prefix."""
+        names = [s.key for s in
+                 self.index.prefix_lookup(u'pi', valid_types=[u'move'])]
+        self.assertEquals(names, [u'pin missile'])
+
+        names = [s.key for s in self.index.prefix_lookup(u'move:pi')]
+        self.assertEquals(names, [u'pin missile'])
+
+        names = [s.key for s in
+                 self.index.prefix_lookup(u'pi', valid_types=[u'@ja'])]
+        self.assertEquals(names, [u'pikachuu'])
+
+    def test_exact_lookup(self):
+        u"""Exact lookups only match whole names, and give up on anything
+        that needs the real lookup.
+        """
+        names = [s.key for s in self.index.exact_lookup(u'PIKACHU')]
+        self.assertEquals(names, [u'pikachu'])
+
+        self.assertEquals(self.index.exact_lookup(u'pika'), [])
+        self.assertEquals(self.index.exact_lookup(u'move:pikachu'), [])
+        self.assertEquals(self.index.exact_lookup(u'pika*'), [])
+        self.assertEquals(self.index.exact_lookup(u'random'), [])